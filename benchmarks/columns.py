@@ -0,0 +1,63 @@
+"""Extraction of a few fields from every item of a large list of required resources.
+
+Reads the name, a label and the status phase of every required resource, as a
+composite filtering or grouping them would, through the wrappers, through a
+View and as columns read in one pass over the protobuf.
+
+Usage: python -m benchmarks.columns [ITEMS]
+"""
+
+import logging
+import sys
+import timeit
+
+from crossplane.pythonic import BaseComposite, View
+from crossplane.pythonic.proto.v1 import run_function_pb2 as fnv1
+
+
+def build_request(items):
+    request = fnv1.RunFunctionRequest()
+    required = request.required_resources['pods']
+    for ix in range(items):
+        required.items.add().resource.update({
+            'apiVersion': 'v1',
+            'kind': 'Pod',
+            'metadata': {'name': f"pod-{ix}", 'labels': {'app': f"app-{ix % 10}"}},
+            'spec': {'containers': [{'name': 'main', 'image': 'example.com/image'}]},
+            'status': {'phase': 'Running' if ix % 3 else 'Pending'},
+        })
+    return request
+
+
+def wrappers(composite):
+    return [
+        (pod.metadata.name, pod.metadata.labels.app, pod.status.phase)
+        for pod in composite.requireds.pods
+    ]
+
+
+def view(composite):
+    return [
+        (pod.resource.metadata.name, pod.resource.metadata.labels.app, pod.resource.status.phase)
+        for pod in View(composite.request.required_resources.pods.items)
+    ]
+
+
+def columns(composite):
+    return composite.requireds.pods._columns('metadata.name', 'metadata.labels.app', 'status.phase')
+
+
+def main():
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    request = build_request(items)
+    logger = logging.getLogger(__name__)
+    print(f"Items:                {items}")
+    for name, extract in (('Wrappers', wrappers), ('View', view), ('Columns', columns)):
+        timer = timeit.Timer(lambda: extract(BaseComposite(False, request, logger)))
+        number, _ = timer.autorange()
+        best = min(timer.repeat(5, number)) / number
+        print(f"{name + ':':22}{best * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Conversion of plain python trees into protobuf Values.
+
+Converts a large Kubernetes manifest, as loaded from YAML, into a Value using
+Value(), assignment into an existing Value and Yaml(), and copies it from one
+Value into another.
+
+Usage: python -m benchmarks.conversion [CONTAINERS]
+"""
+
+import sys
+import timeit
+
+import yaml
+
+from crossplane.pythonic import protobuf
+
+
+def manifest(containers):
+    return {
+        'apiVersion': 'apps/v1',
+        'kind': 'Deployment',
+        'metadata': {
+            'name': 'benchmark',
+            'namespace': 'default',
+            'labels': {f"label-{ix}": f"value-{ix}" for ix in range(20)},
+            'annotations': {f"example.com/annotation-{ix}": 'x' * 100 for ix in range(20)},
+        },
+        'spec': {
+            'replicas': 3,
+            'paused': False,
+            'template': {
+                'spec': {
+                    'containers': [
+                        {
+                            'name': f"container-{ix}",
+                            'image': f"example.com/image:{ix}",
+                            'args': [f"--flag-{arg}=value" for arg in range(20)],
+                            'env': [{'name': f"ENV_{env}", 'value': str(env)} for env in range(20)],
+                            'ports': [{'containerPort': 8000 + port, 'protocol': 'TCP'} for port in range(5)],
+                            'resources': {'limits': {'cpu': 1.5, 'memory': '1Gi'}, 'requests': {'cpu': 0.5, 'memory': None}},
+                        }
+                        for ix in range(containers)
+                    ],
+                },
+            },
+        },
+    }
+
+
+def main():
+    containers = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    value = manifest(containers)
+    text = yaml.safe_dump(value)
+    target = protobuf.Map()
+    source = protobuf.Value(None, None, value)
+
+    def assign():
+        target.spec = value['spec']
+
+    def copy():
+        target.spec = source.spec
+
+    print(f"Containers:           {containers}")
+    for name, call in (
+        ('Value()', lambda: protobuf.Value(None, None, value)),
+        ('Assignment', assign),
+        ('Copy', copy),
+        ('Copy dependencies', lambda: target._getDependencyPaths),
+        ('Yaml()', lambda: protobuf.Yaml(text)),
+    ):
+        timer = timeit.Timer(call)
+        number, _ = timer.autorange()
+        best = min(timer.repeat(5, number)) / number
+        print(f"{name + ':':22}{best * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
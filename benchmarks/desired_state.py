@@ -0,0 +1,65 @@
+"""Building the response desired state from a request with many desired resources.
+
+Creates a composite for a request carrying the desired resources of earlier
+steps, composes it and returns its response message, once rebuilding every
+resource the way most composes do, once rebuilding none and once failing
+before the response is used.
+
+Usage: python -m benchmarks.desired_state [RESOURCES]
+"""
+
+import logging
+import sys
+import timeit
+
+from crossplane.pythonic import BaseComposite
+
+from .memory import build_request
+
+
+class Rebuild(BaseComposite):
+    def compose(self):
+        for name, observed in self.request.observed.resources:
+            self.resources[name](observed.resource.apiVersion, observed.resource.kind)
+
+
+class Untouched(BaseComposite):
+    def compose(self):
+        pass
+
+
+def measure(call):
+    timer = timeit.Timer(call)
+    number, _ = timer.autorange()
+    return min(timer.repeat(5, number)) / number
+
+
+def main():
+    resources = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    request = build_request(resources)
+    for name, resource in request.observed.resources.items():
+        request.desired.resources[name].CopyFrom(resource)
+    logger = logging.getLogger(__name__)
+
+    def rebuild():
+        composite = Rebuild(False, request, logger)
+        composite.compose()
+        return composite.response._message
+
+    def untouched():
+        composite = Untouched(False, request, logger)
+        composite.compose()
+        return composite.response._message
+
+    def failed():
+        Untouched(False, request, logger)
+
+    print(f"Resources:            {resources}")
+    print(f"Desired bytes:        {request.desired.ByteSize()}")
+    print(f"Rebuild:              {measure(rebuild) * 1000:.2f} ms")
+    print(f"Untouched:            {measure(untouched) * 1000:.2f} ms")
+    print(f"Failed:               {measure(failed) * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
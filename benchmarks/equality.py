@@ -0,0 +1,40 @@
+"""Equality and hashing of large protobuf Values.
+
+Compares and hashes two equal copies of a large manifest, as get_schemas and
+get_requireds do with their Maps on every pass, once without unknowns and once
+with an unknown in every container.
+
+Usage: python -m benchmarks.equality [CONTAINERS]
+"""
+
+import sys
+import timeit
+
+from crossplane.pythonic import protobuf
+
+from .conversion import manifest
+
+
+def measure(call):
+    timer = timeit.Timer(call)
+    number, _ = timer.autorange()
+    return min(timer.repeat(5, number)) / number
+
+
+def main():
+    containers = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    value = manifest(containers)
+    print(f"Containers:           {containers}")
+    for name, unknowns in (('Known', False), ('Unknowns', True)):
+        left = protobuf.Value(None, None, value)
+        right = protobuf.Value(None, None, value)
+        if unknowns:
+            for container in (*left.spec.template.spec.containers, *right.spec.template.spec.containers):
+                container.unknown = protobuf.Unknown()
+        assert left == right
+        print(f"{name + ' ==:':22}{measure(lambda: left == right) * 1000:.2f} ms")
+        print(f"{name + ' hash:':22}{measure(lambda: hash(left)) * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
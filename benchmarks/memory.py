@@ -0,0 +1,101 @@
+"""Memory retained by the protobuf wrappers while composing a request.
+
+Composes a request with many observed resources the way a typical composite
+does, reading every observed field and copying it into the desired resources,
+then reports the memory and the number of wrapper objects alive at the end of
+the compose.
+
+Usage: python -m benchmarks.memory [RESOURCES]
+"""
+
+import gc
+import sys
+import tracemalloc
+
+from crossplane.pythonic import protobuf
+from crossplane.pythonic.proto.v1 import run_function_pb2 as fnv1
+
+
+def build_request(resources):
+    request = fnv1.RunFunctionRequest()
+    request.observed.composite.resource.update({
+        'apiVersion': 'example.crossplane.io/v1',
+        'kind': 'XBenchmark',
+        'metadata': {'name': 'benchmark'},
+        'spec': {'region': 'us-east-1', 'count': resources},
+    })
+    for ix in range(resources):
+        request.observed.resources[f"resource-{ix}"].resource.update({
+            'apiVersion': 'ec2.aws.upbound.io/v1beta1',
+            'kind': 'Subnet',
+            'metadata': {
+                'name': f"benchmark-{ix}",
+                'labels': {f"label-{label}": f"value-{label}" for label in range(5)},
+            },
+            'spec': {
+                'forProvider': {
+                    **{f"field{field}": f"value-{ix}-{field}" for field in range(20)},
+                    'tags': [{'key': f"tag-{tag}", 'value': tag} for tag in range(5)],
+                },
+            },
+            'status': {
+                'atProvider': {f"field{field}": field for field in range(10)},
+                'conditions': [{'type': 'Ready', 'status': 'True'}],
+            },
+        })
+    return request
+
+
+def compose(request):
+    request = protobuf.Message(None, 'request', request.DESCRIPTOR, request)
+    response = fnv1.RunFunctionResponse()
+    response = protobuf.Message(None, 'response', response.DESCRIPTOR, response)
+    region = request.observed.composite.resource.spec.region
+    for name, observed in request.observed.resources:
+        observed = observed.resource
+        desired = response.desired.resources[name].resource
+        desired.apiVersion = observed.apiVersion
+        desired.kind = observed.kind
+        desired.metadata.labels = observed.metadata.labels
+        desired.spec.forProvider.region = region
+        for key, value in observed.spec.forProvider:
+            if key != 'tags':
+                desired.spec.forProvider[key] = value
+        for tag in observed.spec.forProvider.tags:
+            desired.spec.forProvider.tags[protobuf.append] = tag
+        for key, value in observed.status.atProvider:
+            desired.metadata.annotations[key] = str(value)
+        desired.spec.forProvider.missing = observed.status.atProvider.missing
+        response.desired.resources[name].ready = fnv1.READY_TRUE if observed.status.conditions[0].status == 'True' else fnv1.READY_FALSE
+    for name, resource in response.desired.resources:
+        resource.resource._getDependencies
+        resource.resource._getUnknowns
+    return request, response
+
+
+def wrappers():
+    classes = (protobuf.Message, protobuf.MapMessage, protobuf.RepeatedMessage, protobuf.FieldMessage, protobuf.Value)
+    return sum(1 for value in gc.get_objects() if isinstance(value, classes))
+
+
+def main():
+    resources = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    request = build_request(resources)
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    composed = compose(request)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = wrappers()
+    del composed
+    print(f"Resources:            {resources}")
+    print(f"Wrapper objects:      {count}")
+    print(f"Retained memory:      {(current - start) / 1024 / 1024:.2f} MiB")
+    print(f"Peak memory:          {(peak - start) / 1024 / 1024:.2f} MiB")
+    print(f"Bytes per wrapper:    {(current - start) / count:.0f}")
+
+
+if __name__ == '__main__':
+    main()
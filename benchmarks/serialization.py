@@ -0,0 +1,79 @@
+"""Serialization of rendered resources as YAML and JSON.
+
+Builds desired resources the way render outputs them and writes each one to a
+stream, comparing formatting it with the yaml and json representers against
+streaming it with write_to(), reporting the time and the peak memory used.
+
+Usage: python -m benchmarks.serialization [RESOURCES]
+"""
+
+import io
+import json
+import sys
+import time
+import tracemalloc
+
+import yaml
+
+from crossplane.pythonic import protobuf
+
+
+def build(resources):
+    desired = protobuf.Map()
+    for ix in range(resources):
+        resource = desired[f"resource-{ix}"]
+        resource.apiVersion = 'ec2.aws.upbound.io/v1beta1'
+        resource.kind = 'Subnet'
+        resource.metadata.name = f"subnet-{ix}"
+        resource.metadata.annotations['crossplane.io/composition-resource-name'] = f"subnet-{ix}"
+        resource.metadata.labels = {f"label-{label}": f"value-{label}" for label in range(10)}
+        resource.spec.forProvider = {
+            'region': 'us-east-1',
+            'cidrBlock': f"10.0.{ix % 256}.0/24",
+            'mapPublicIpOnLaunch': ix % 2 == 0,
+            'tags': {f"tag-{tag}": f"value-{tag}" for tag in range(10)},
+            'routes': [{'cidr': f"10.{route}.0.0/16", 'gateway': f"gw-{route}"} for route in range(20)],
+        }
+        resource.spec.forProvider.vpcId = protobuf.Unknown()
+    return [resource for _, resource in desired]
+
+
+def formatted(spec):
+    if spec == 'yaml':
+        return lambda resource: yaml.dump(resource, Dumper=protobuf._CDumper or protobuf._Dumper)
+    return lambda resource: json.dumps(resource, indent=2, cls=protobuf._JSONEncoder)
+
+
+def run(resources, write):
+    stream = io.StringIO()
+    for resource in resources:
+        stream.write('---\n')
+        write(stream, resource)
+        # Only keep the current resource, as a terminal would.
+        stream.seek(0)
+        stream.truncate()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    print(f"Resources:            {count}")
+    for spec in ('yaml', 'json'):
+        format = formatted(spec)
+        for name, write in (
+            ('format', lambda stream, resource: stream.write(format(resource))),
+            ('write_to', lambda stream, resource: protobuf.write_to(stream, resource, spec)),
+        ):
+            # Each run gets new resources, as the wrappers created while walking are cached.
+            resources = build(count)
+            start = time.perf_counter()
+            run(resources, write)
+            seconds = time.perf_counter() - start
+            resources = build(count)
+            tracemalloc.start()
+            run(resources, write)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{spec + ' ' + name + ':':22}{seconds * 1000:.2f} ms, {peak / 1024:.1f} KiB peak")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Attribute traversal of the protobuf Value wrappers over large structs.
+
+Builds a struct with many entries, each a few levels deep, and times reading
+every leaf by attribute access, iterating, taking lengths and formatting,
+through the wrappers, through a read-only View, which caches nothing, and
+through precompiled Paths, and also reports the memory each traversal leaves
+allocated.
+
+Usage: python -m benchmarks.traversal [ENTRIES]
+"""
+
+import sys
+import timeit
+import tracemalloc
+
+from crossplane.pythonic import protobuf
+from crossplane.pythonic.proto.v1 import run_function_pb2 as fnv1
+
+
+def build(entries):
+    struct = fnv1.RunFunctionRequest().input
+    struct.update({
+        f"entry{ix}": {
+            'metadata': {'name': f"entry-{ix}", 'labels': {'app': 'benchmark'}},
+            'spec': {'forProvider': {'region': 'us-east-1', 'cidrBlock': '10.0.0.0/16', 'tags': ['a', 'b', 'c']}},
+            'status': {'atProvider': {'id': f"id-{ix}", 'arn': f"arn-{ix}"}},
+        }
+        for ix in range(entries)
+    })
+    return struct
+
+
+def traverse(root):
+    count = 0
+    for key, entry in root:
+        if entry.metadata.name and entry.metadata.labels.app == 'benchmark':
+            count += 1
+        count += len(entry.spec.forProvider.tags)
+        for tag in entry.spec.forProvider.tags:
+            count += len(tag)
+        if entry.spec.forProvider.region == 'us-east-1':
+            count += 1
+        count += len(str(entry.status.atProvider.id))
+        if 'arn' in entry.status.atProvider:
+            count += 1
+        if entry.status.missing.field:
+            count += 1
+    return count
+
+
+_name = protobuf.Path('metadata.name')
+_app = protobuf.Path('metadata.labels.app')
+_tags = protobuf.Path('spec.forProvider.tags')
+_region = protobuf.Path('spec.forProvider.region')
+_id = protobuf.Path('status.atProvider.id')
+_arn = protobuf.Path('status.atProvider.arn')
+_missing = protobuf.Path('status.missing.field')
+
+
+def traverse_paths(struct):
+    count = 0
+    for key in struct:
+        entry = struct[key]
+        if _name.get(entry) and _app.get(entry) == 'benchmark':
+            count += 1
+        tags = _tags.get(entry)
+        count += len(tags)
+        for tag in tags:
+            count += len(tag)
+        if _region.get(entry) == 'us-east-1':
+            count += 1
+        count += len(str(_id.get(entry)))
+        if _arn.has(entry):
+            count += 1
+        if _missing.get(entry):
+            count += 1
+    return count
+
+
+def main():
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    struct = build(entries)
+    print(f"Entries:              {entries}")
+    # The first traversal creates the wrappers, later ones reuse the cached wrappers.
+    first = timeit.Timer(lambda: traverse(protobuf.Value(None, None, struct, 'benchmark')))
+    root = protobuf.Value(None, None, struct, 'benchmark')
+    cached = timeit.Timer(lambda: traverse(root))
+    view = timeit.Timer(lambda: traverse(protobuf.View(struct)))
+    paths = timeit.Timer(lambda: traverse_paths(struct))
+    for name, timer in (('First traversal', first), ('Cached traversal', cached), ('View traversal', view), ('Path traversal', paths)):
+        number, _ = timer.autorange()
+        best = min(timer.repeat(5, number)) / number
+        print(f"{name + ':':22}{best * 1000:.2f} ms, {best * 1000000 / entries:.2f} us per entry")
+    for name, wrap in (('Wrapper memory', lambda: protobuf.Value(None, None, struct, 'benchmark')), ('View memory', lambda: protobuf.View(struct))):
+        tracemalloc.start()
+        root = wrap()
+        traverse(root)
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del root
+        print(f"{name + ':':22}{size / 1024:.1f} KiB retained")
+
+
+if __name__ == '__main__':
+    main()
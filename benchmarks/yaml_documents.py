@@ -0,0 +1,79 @@
+"""Parsing and formatting of a large multi-document observed resources file.
+
+Generates a YAML file of observed resources, such as passed to render with
+--observed-resources, then times YamlAll() and formatting the result as YAML
+with the pure python PyYAML loader and dumper and with the libyaml based ones.
+
+Usage: python -m benchmarks.yaml_documents [RESOURCES]
+"""
+
+import sys
+import timeit
+
+import yaml
+
+from crossplane.pythonic import protobuf
+
+
+def documents(resources):
+    return yaml.safe_dump_all([
+        {
+            'apiVersion': 'ec2.aws.upbound.io/v1beta1',
+            'kind': 'Subnet',
+            'metadata': {
+                'name': f"subnet-{ix}",
+                'annotations': {
+                    'crossplane.io/composition-resource-name': f"subnet-{ix}",
+                    'example.com/script': 'set -e\necho "starting"\nexec /bin/run\n',
+                },
+                'labels': {f"label-{label}": f"value-{label}" for label in range(10)},
+            },
+            'spec': {
+                'forProvider': {
+                    'region': 'us-east-1',
+                    'cidrBlock': f"10.0.{ix % 256}.0/24",
+                    'mapPublicIpOnLaunch': ix % 2 == 0,
+                    'tags': {f"tag-{tag}": f"value-{tag}" for tag in range(10)},
+                },
+            },
+            'status': {
+                'atProvider': {'id': f"subnet-{ix:08x}", 'arn': f"arn:aws:ec2:us-east-1:123456789012:subnet/{ix}"},
+                'conditions': [{'type': 'Ready', 'status': 'True', 'reason': 'Available'}],
+            },
+        }
+        for ix in range(resources)
+    ])
+
+
+def measure(call):
+    timer = timeit.Timer(call)
+    number, _ = timer.autorange()
+    return min(timer.repeat(5, number)) / number
+
+
+def main():
+    resources = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    text = documents(resources)
+    value = protobuf.YamlAll(text)
+    print(f"Resources:            {resources}")
+    print(f"Size:                 {len(text) / 1024:.1f} KiB")
+    print(f"libyaml:              {'yes' if protobuf._CDumper else 'no'}")
+    loader = protobuf._Loader
+    for name, Loader, Dumper in (
+        ('Python', yaml.SafeLoader, protobuf._Dumper),
+        ('libyaml', getattr(yaml, 'CSafeLoader', None), protobuf._CDumper),
+    ):
+        if Loader is None or Dumper is None:
+            continue
+        # YamlAll() always uses the module loader.
+        protobuf._Loader = Loader
+        try:
+            parse = measure(lambda: protobuf.YamlAll(text))
+        finally:
+            protobuf._Loader = loader
+        dump = measure(lambda: yaml.dump(value, Dumper=Dumper))
+        print(f"{name + ' parse:':22}{parse * 1000:.2f} ms")
+        print(f"{name + ' format:':22}{dump * 1000:.2f} ms")
+
+if __name__ == '__main__':
+    main()
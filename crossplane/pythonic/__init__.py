@@ -1,7 +1,7 @@
 
 
 from .composite import BaseComposite
-from .protobuf import append, Map, List, Unknown, Yaml, YamlAll, Json, B64Encode, B64Decode
+from .protobuf import append, Map, List, Unknown, View, Path, Yaml, YamlAll, Json, B64Encode, B64Decode, B64EncodeMap, B64DecodeMap, Columns
 
 __all__ = [
     'BaseComposite',
@@ -9,9 +9,14 @@ __all__ = [
     'Map',
     'List',
     'Unknown',
+    'View',
+    'Path',
     'Yaml',
     'YamlAll',
     'Json',
     'B64Encode',
     'B64Decode',
+    'B64EncodeMap',
+    'B64DecodeMap',
+    'Columns',
 ]
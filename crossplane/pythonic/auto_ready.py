@@ -1,8 +1,24 @@
 
+from . import protobuf
+
+
+# Paths read on every resource, resolved directly against the observed protobuf.
+_apiVersion = protobuf.Path('apiVersion')
+_kind = protobuf.Path('kind')
+_specReplicas = protobuf.Path('spec.replicas')
+_specRestartPolicy = protobuf.Path('spec.restartPolicy')
+_specType = protobuf.Path('spec.type')
+_statusCurrentRevision = protobuf.Path('status.currentRevision')
+_statusLoadBalancerIngress = protobuf.Path('status.loadBalancer.ingress')
+_statusPhase = protobuf.Path('status.phase')
+_statusUpdateRevision = protobuf.Path('status.updateRevision')
+
+
 def resource_ready(resource):
-    if not resource.observed:
+    observed = resource.observed
+    if not observed:
         return None
-    return _checks.get((resource.observed.apiVersion, resource.observed.kind), _check_default).ready(resource)
+    return _checks.get((_apiVersion.get(observed), _kind.get(observed)), _check_default).ready(resource)
 
 
 class ReadyCondition:
@@ -75,7 +91,7 @@ class DaemonSet(Check):
 class Deployment(Check):
     apiVersion = 'apps/v1'
     def ready(self, resource):
-        replicas = resource.observed.spec.replicas or 1
+        replicas = _specReplicas.get(resource.observed) or 1
         for field in ('updatedReplicas', 'availableReplicas'):
             value = resource.status[field]
             if not value:
@@ -105,7 +121,7 @@ class HorizontalPodAutoscaler(Check):
 class Ingress(Check):
     apiVersion = 'networking.k8s.io/v1'
     def ready(self, resource):
-        if not len(resource.status.loadBalancer.ingress):
+        if not len(_statusLoadBalancerIngress.get(resource.observed, ())):
             return resource.status.noLoadBalanceIngresses
         return resource.observed.metadata.name
 
@@ -130,17 +146,18 @@ class Namespace(AlwaysReady):
 class PersistentVolumeClaim(Check):
     apiVersion = 'v1'
     def ready(self, resource):
-        if resource.status.phase != 'Bound':
+        if _statusPhase.get(resource.observed) != 'Bound':
             return resource.status.phaseNotBound
         return resource.observed.metadata.name
 
 class Pod(Check):
     apiVersion = 'v1'
     def ready(self, resource):
-        if resource.status.phase == 'Succeeded':
+        phase = _statusPhase.get(resource.observed)
+        if phase == 'Succeeded':
             return resource.observed.metadata.name
-        if resource.status.phase == 'Running':
-            if resource.observed.spec.restartPolicy == 'Always':
+        if phase == 'Running':
+            if _specRestartPolicy.get(resource.observed) == 'Always':
                 if resource.conditions.Ready.status:
                     return resource.observed.metadata.name
         return resource.status.notSucceededOrRunning
@@ -170,9 +187,9 @@ class Secret(AlwaysReady):
 class Service(Check):
     apiVersion = 'v1'
     def ready(self, resource):
-        if resource.observed.spec.type != 'LoadBalancer':
+        if _specType.get(resource.observed) != 'LoadBalancer':
             return resource.observed.metadata.name
-        if not len(resource.status.loadBalancer.ingress):
+        if not len(_statusLoadBalancerIngress.get(resource.observed, ())):
             return resource.status.noLoadBalancerIngresses
         return resource.observed.metadata.name
 
@@ -182,13 +199,13 @@ class ServiceAccount(AlwaysReady):
 class StatefulSet(Check):
     apiVersion = 'apps/v1'
     def ready(self, resource):
-        replicas = resource.observed.spec.replicas or 1
+        replicas = _specReplicas.get(resource.observed) or 1
         for field in ('readyReplicas', 'currentReplicas'):
             value = resource.status[field]
             if not value:
                 return value
             if replicas != value:
                 return resource.status[F"{field}NotReplicas"]
-        if resource.status.currentRevision != resource.status.updateRevision:
+        if _statusCurrentRevision.get(resource.observed) != _statusUpdateRevision.get(resource.observed):
             return resource.status.currentRevisionNotUpdateReivsion
         return resource.observed.metadata.name
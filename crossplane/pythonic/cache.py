@@ -0,0 +1,172 @@
+"""Bounded caches used by the FunctionRunner."""
+
+import collections
+import hashlib
+import importlib.util
+import logging
+import marshal
+import os
+import pathlib
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+def digest(source):
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+
+class LRUCache:
+    """A least recently used cache bounded by entry count and total size.
+
+    A bound of zero disables that bound.
+    """
+
+    def __init__(self, max_entries=0, max_bytes=0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __iter__(self):
+        return iter(list(self._entries))
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, value, size=0):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+        self._entries[key] = (value, size)
+        self.bytes += size
+        while len(self._entries) > 1 and (
+                (self.max_entries and len(self._entries) > self.max_entries)
+                or (self.max_bytes and self.bytes > self.max_bytes)
+        ):
+            _, entry = self._entries.popitem(last=False)
+            self.bytes -= entry[1]
+            self.evictions += 1
+
+    def pop(self, key, default=None):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return default
+        self.bytes -= entry[1]
+        return entry[0]
+
+    def prune(self, predicate):
+        """Remove the entries for which predicate(key, value) is true, returning how many."""
+        keys = [key for key, entry in self._entries.items() if predicate(key, entry[0])]
+        for key in keys:
+            self.bytes -= self._entries.pop(key)[1]
+        return len(keys)
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+class CompileCache:
+    """Code objects of inline composites keyed by the SHA-256 digest of their source.
+
+    When a directory is configured the code objects are also persisted there as
+    marshal blobs, so they survive class cache invalidations and restarts.
+    """
+
+    def __init__(self, directory=None, max_entries=0, max_bytes=0):
+        self.directory = pathlib.Path(directory).expanduser().resolve() if directory else None
+        self.codes = LRUCache(max_entries, max_bytes)
+        self.compiles = 0
+        self.compile_seconds = 0.0
+        self.loads = 0
+
+    def compile(self, source, key=None):
+        """Return the code object for source and the compile seconds, None if it was cached."""
+        if key is None:
+            key = digest(source)
+        code = self.codes.get(key)
+        if code is not None:
+            return code, None
+        code = self._load(key)
+        if code is not None:
+            self.codes.put(key, code, len(source))
+            return code, None
+        start = time.perf_counter()
+        code = compile(source, '<string>', 'exec')
+        seconds = time.perf_counter() - start
+        self.compiles += 1
+        self.compile_seconds += seconds
+        self.codes.put(key, code, len(source))
+        self._store(key, code)
+        return code, seconds
+
+    def clear(self):
+        self.codes.clear()
+
+    def stats(self):
+        stats = self.codes.stats()
+        stats['compiles'] = self.compiles
+        stats['compile_seconds'] = self.compile_seconds
+        stats['loads'] = self.loads
+        return stats
+
+    def _load(self, key):
+        if not self.directory:
+            return None
+        path = self.directory / f"{key}.marshal"
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Unable to read compile cache {path}: {e}")
+            return None
+        magic = importlib.util.MAGIC_NUMBER
+        if data[:len(magic)] != magic:
+            return None
+        try:
+            code = marshal.loads(data[len(magic):])
+        except (EOFError, ValueError, TypeError):
+            logger.warning(f"Invalid compile cache entry: {path}")
+            return None
+        self.loads += 1
+        return code
+
+    def _store(self, key, code):
+        if not self.directory:
+            return
+        path = self.directory / f"{key}.marshal"
+        temp = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            temp.write_bytes(importlib.util.MAGIC_NUMBER + marshal.dumps(code))
+            os.replace(temp, path)
+        except OSError as e:
+            logger.warning(f"Unable to write compile cache {path}: {e}")
+            temp.unlink(missing_ok=True)
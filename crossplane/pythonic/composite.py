@@ -52,24 +52,30 @@ class Connection:
 
 class TTL:
     def __get__(self, composite, objtype=None):
-        if composite.response.meta.ttl.nanos:
-            return float(composite.response.meta.ttl.seconds) + (float(composite.response.meta.ttl.nanos) / 1000000000.0)
-        return int(composite.response.meta.ttl.seconds)
+        if composite._response.meta.ttl.nanos:
+            return float(composite._response.meta.ttl.seconds) + (float(composite._response.meta.ttl.nanos) / 1000000000.0)
+        return int(composite._response.meta.ttl.seconds)
 
     def __set__(self, composite, ttl):
         if isinstance(ttl, int):
-            composite.response.meta.ttl.seconds = ttl
-            composite.response.meta.ttl.nanos = 0
+            composite._response.meta.ttl.seconds = ttl
+            composite._response.meta.ttl.nanos = 0
         elif isinstance(ttl, float):
-            composite.response.meta.ttl.seconds = int(ttl)
+            composite._response.meta.ttl.seconds = int(ttl)
             if ttl.is_integer():
-                composite.response.meta.ttl.nanos = 0
+                composite._response.meta.ttl.nanos = 0
             else:
-                composite.response.meta.ttl.nanos = int((ttl - int(composite.response.meta.ttl.seconds)) * 1000000000)
+                composite._response.meta.ttl.nanos = int((ttl - int(composite._response.meta.ttl.seconds)) * 1000000000)
         else:
             raise ValueError('ttl must be an int or float')
 
 
+class Response:
+    def __get__(self, composite, objtype=None):
+        composite._materialize()
+        return composite._response
+
+
 class Ready:
     def __get__(self, composite, objtype=None):
         if hasattr(composite, '_ready'):
@@ -101,15 +107,21 @@ class BaseComposite:
                     seconds=60,
                 ),
             ),
-            desired=request.desired,
             context=request.context,
         )
-        self.response = protobuf.Message(None, 'response', response.DESCRIPTOR, response)
+        # Desired resources are only copied from the request when first used,
+        # see _materialize(), the rest of the desired state is copied now.
+        response.desired.SetInParent()
+        if request.desired.HasField('composite'):
+            response.desired.composite.CopyFrom(request.desired.composite)
+        self._desiredResources = request.desired.resources
+        self._pending = set(request.desired.resources)
+        self._response = protobuf.Message(None, 'response', response.DESCRIPTOR, response)
         self.logger = logger
         self.capabilities = Capabilities(self.request.meta.capabilities)
         self.parameters = self.request.input.parameters
         self.credentials = Credentials(self.request)
-        self.context = self.response.context
+        self.context = self._response.context
         self.environment = self.context['apiextensions.crossplane.io/environment']
         self.requireds = Requireds(self)
         self.watched = self.requireds['ops.crossplane.io/watched-resource'][0]
@@ -120,7 +132,7 @@ class BaseComposite:
         self.unknownsFatal = False
 
         observed = self.request.observed.composite
-        desired = self.response.desired.composite
+        desired = self._response.desired.composite
         self.observed = observed.resource
         self.desired = desired.resource
         self.apiVersion = self.observed.apiVersion
@@ -128,11 +140,35 @@ class BaseComposite:
         self.metadata = self.observed.metadata
         self.spec = self.observed.spec
         self.status = self.desired.status
-        self.output = self.response.output
-        self.conditions = Conditions(observed, self.response)
-        self.results = Results(self.response)
-        self.events = Results(self.response) # Deprecated, use self.results
+        self.output = self._response.output
+        self.conditions = Conditions(observed, self._response)
+        self.results = Results(self._response)
+        self.events = Results(self._response) # Deprecated, use self.results
+
+    def _materialize(self, name=None, resource=True):
+        # Copy desired resources from the request into the response, all still pending
+        # if name is None. Without resource only the ready state and connection details
+        # are copied, for when the resource itself is being replaced.
+        if name is None:
+            names = self._pending
+            self._pending = set()
+        elif name in self._pending:
+            names = (name,)
+            self._pending.discard(name)
+        else:
+            return
+        desired = self._response._message.desired.resources
+        for name in names:
+            source = self._desiredResources[name]
+            if resource:
+                desired[name].CopyFrom(source)
+            else:
+                desired[name].connection_details.update(source.connection_details)
+                desired[name].ready = source.ready
 
+    # Seconds compose may run for, None for no limit other than the request deadline.
+    composeTimeout = None
+    response = Response()
     ttl = TTL()
     connectionSecret = ConnectionSecret()
     connection = Connection()
@@ -230,31 +266,54 @@ class Resources:
         return resource
 
     def __bool__(self):
-        return bool(self._composite.response.desired.resources)
+        return bool(self._composite._pending) or bool(self._composite._response.desired.resources)
 
     def __len__(self):
-        return len(self._composite.response.desired.resources)
+        return len(self._composite._pending) + len(self._composite._response.desired.resources)
 
     def __contains__(self, key):
-        return key in self._composite.response.desired.resources
+        return key in self._composite._pending or key in self._composite._response.desired.resources
 
     def __iter__(self):
-        for name, resource in self._composite.response.desired.resources:
+        for name in self._names():
             yield name, self[name]
 
+    def _names(self):
+        names = set(self._composite._pending)
+        names.update(self._composite._response._message.desired.resources)
+        return sorted(names)
+
+    def _columns(self, *paths, desired=False, numpy=False):
+        # The values at each path in every observed, or desired, resource in iteration
+        # order as one list per path, read directly from the protobuf.
+        names = self._names()
+        if desired:
+            composite = self._composite
+            resources = composite._response._message.desired.resources
+            rows = [
+                (composite._desiredResources[name] if name in composite._pending else resources[name]).resource
+                for name in names
+            ]
+        else:
+            resources = self._composite.request._message.observed.resources
+            rows = [resources[name].resource if name in resources else protobuf._Unknown for name in names]
+        return protobuf._columns(rows, paths, numpy)
+
     def __setattr__(self, key, resource):
         self[key] = resource
 
     def __setitem__(self, key, resource):
-        self._composite.response.desired.resources[key].resource = resource
+        self._composite._materialize(key, False)
+        self._composite._response.desired.resources[key].resource = resource
         self._cache.pop(key, None)
 
     def __delattr__(self, key):
         del self[key]
 
     def __delitem__(self, key):
-        if key in self._composite.response.desired.resources:
-            del self._composite.response.desired.resources[key]
+        self._composite._pending.discard(key)
+        if key in self._composite._response.desired.resources:
+            del self._composite._response.desired.resources[key]
         self._cache.pop(key, None)
 
 
@@ -263,9 +322,8 @@ class Resource:
         self._composite = composite
         self.name = name
         observed = composite.request.observed.resources[name]
-        desired = composite.response.desired.resources[name]
         self.observed = observed.resource
-        self.desired = desired.resource
+        self._desired = None
         self.conditions = Conditions(observed)
         self.connection = observed.connection_details
         self.autoReady = None
@@ -273,6 +331,8 @@ class Resource:
         self.unknownsFatal = None
 
     def __call__(self, kind=_notset, apiVersion=_notset, namespace=_notset, name=_notset):
+        if self._desired is None:
+            self._composite._materialize(self.name, False)
         self.desired()
         if kind != _notset:
             # Allow for apiVersion in the first arg and kind in the second arg
@@ -290,6 +350,13 @@ class Resource:
             self.metadata.name = name
         return self
 
+    @property
+    def desired(self):
+        if self._desired is None:
+            self._composite._materialize(self.name)
+            self._desired = self._composite._response.desired.resources[self.name].resource
+        return self._desired
+
     @property
     def apiVersion(self):
         return self.desired.apiVersion
@@ -436,12 +503,12 @@ class Requireds:
         if self._composite.crossplane_v1:
             for name, resource in self._composite.request.extra_resources:
                 names.add(name)
-            for name, resource in self._composite.response.requirements.extra_resources:
+            for name, resource in self._composite._response.requirements.extra_resources:
                 names.add(name)
         else:
             for name, resource in self._composite.request.required_resources:
                 names.add(name)
-            for name, resource in self._composite.response.requirements.resources:
+            for name, resource in self._composite._response.requirements.resources:
                 names.add(name)
         return len(names)
 
@@ -449,12 +516,12 @@ class Requireds:
         if self._composite.crossplane_v1:
             if key in self._composite.request.extra_resources:
                 return True
-            if key in self._composite.response.requirements.extra_resources:
+            if key in self._composite._response.requirements.extra_resources:
                 return True
         else:
             if key in self._composite.request.required_resources:
                 return True
-            if key in self._composite.response.requirements.resources:
+            if key in self._composite._response.requirements.resources:
                 return True
         return False
 
@@ -463,12 +530,12 @@ class Requireds:
         if self._composite.crossplane_v1:
             for name, resource in self._composite.request.extra_resources:
                 names.add(name)
-            for name, resource in self._composite.response.requirements.extra_resources:
+            for name, resource in self._composite._response.requirements.extra_resources:
                 names.add(name)
         else:
             for name, resource in self._composite.request.required_resources:
                 names.add(name)
-            for name, resource in self._composite.response.requirements.resources:
+            for name, resource in self._composite._response.requirements.resources:
                 names.add(name)
         for name in sorted(names):
             yield name, self[name]
@@ -478,10 +545,10 @@ class RequiredResources:
     def __init__(self, composite, name):
         self.name = name
         if composite.crossplane_v1:
-            self._selector = composite.response.requirements.extra_resources[name]
+            self._selector = composite._response.requirements.extra_resources[name]
             self._resources = composite.request.extra_resources[name]
         else:
-            self._selector = composite.response.requirements.resources[name]
+            self._selector = composite._response.requirements.resources[name]
             self._resources = composite.request.required_resources[name]
         self._cache = {}
 
@@ -568,6 +635,13 @@ class RequiredResources:
         for ix in range(len(self)):
             yield self[ix]
 
+    def _columns(self, *paths, numpy=False):
+        # The values at each path in every required resource as one list per path,
+        # read directly from the protobuf.
+        resources = self._resources._message
+        rows = () if resources is protobuf._Unknown else [item.resource for item in resources.items]
+        return protobuf._columns(rows, paths, numpy)
+
 
 class RequiredResource:
     def __init__(self, name, ix, resource):
@@ -610,14 +684,14 @@ class Schemas:
         names = set()
         for name, schema in self._composite.request.required_schemas:
             names.add(name)
-        for name, selector in self._composite.response.requirements.schemas:
+        for name, selector in self._composite._response.requirements.schemas:
             names.add(name)
         return len(names)
 
     def __contains__(self, key):
         if key in self._composite.request.required_schemas:
             return True
-        if key in self._composite.response.requirements.schemas:
+        if key in self._composite._response.requirements.schemas:
             return True
         return False
 
@@ -625,7 +699,7 @@ class Schemas:
         names = set()
         for name, schema in self._composite.request.required_schemas:
             names.add(name)
-        for name, selector in self._composite.response.requirements.schemas:
+        for name, selector in self._composite._response.requirements.schemas:
             names.add(name)
         for name in sorted(names):
             yield name, self[name]
@@ -634,7 +708,7 @@ class Schemas:
 class Schema:
     def __init__(self, composite, name):
         self.name = name
-        self._selector = composite.response.requirements.schemas[name]
+        self._selector = composite._response.requirements.schemas[name]
         self._schema = composite.request.required_schemas[name].openapi_v3
 
     def __call__(self, kind=_notset, apiVersion=_notset):
@@ -1010,35 +1084,35 @@ class _Connection:
 
     @property
     def observed(self):
-        return self._composite.response.observed.composite.connection_details
+        return self._composite._response.observed.composite.connection_details
 
     def __getattr__(self, key):
         return self[key]
 
     def __getitem__(self, key):
-        return self._composite.response.desired.composite.connection_details[key]
+        return self._composite._response.desired.composite.connection_details[key]
 
     def __bool__(self):
-        return bool(self._composite.response.desired.composite.connection_details)
+        return bool(self._composite._response.desired.composite.connection_details)
 
     def __len__(self):
-        return len(self._composite.response.desired.composite.connection_details)
+        return len(self._composite._response.desired.composite.connection_details)
 
     def __contains__(self, key):
-        return key in self._composite.response.desired.composite.connection_details
+        return key in self._composite._response.desired.composite.connection_details
 
     def __iter__(self):
-        for key, value in self._composite.response.desired.composite.connection_details:
+        for key, value in self._composite._response.desired.composite.connection_details:
             yield key, value
 
     def __str__(self):
         return format(self)
 
     def __format__(self, spec='yaml'):
-        return format(self._composite.response.desired.composite.connection_details, spec)
+        return format(self._composite._response.desired.composite.connection_details, spec)
 
     def __call__(self, **kwargs):
-        self._composite.response.desired.composite.connection_details(**kwargs)
+        self._composite._response.desired.composite.connection_details(**kwargs)
         if self._composite.crossplane_v1:
             return
         del self._composite.resources[self._resource_name]
@@ -1056,7 +1130,7 @@ class _Connection:
                 if not value:
                     return
             value = str(value)
-        self._composite.response.desired.composite.connection_details[key] = value
+        self._composite._response.desired.composite.connection_details[key] = value
         if self._composite.crossplane_v1 or not self._composite.connectionSecret.name:
             return
         if self._resource_name in self._composite.resources:
@@ -1077,7 +1151,7 @@ class _Connection:
         del self[key]
 
     def __delitem__(self, key):
-        del self._composite.response.desired.composite.connection_details[key]
+        del self._composite._response.desired.composite.connection_details[key]
         if self._composite.crossplane_v1:
             return
         if self._resource_name in self._composite.resources:
@@ -0,0 +1,95 @@
+"""Bounded executors used to run composes off of the gRPC event loop."""
+
+import asyncio
+import concurrent.futures
+import logging
+import multiprocessing
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+MODES = ('inline', 'thread', 'process')
+
+
+class Overloaded(Exception):
+    """Raised when the executor already has its maximum number of pending calls."""
+
+
+# Raised by a call an executor pool could not run as its child process died. The pool is
+# replaced, so only the calls it was running fail.
+Broken = concurrent.futures.BrokenExecutor
+
+
+class ComposeExecutor:
+    """Runs calls in a thread or process pool, rejecting calls instead of queueing without limit.
+
+    At most workers calls run at once and at most backlog more wait for a worker,
+    any further calls raise Overloaded.
+    """
+
+    def __init__(self, mode, workers, backlog=0, initializer=None, initargs=()):
+        if mode not in ('thread', 'process'):
+            raise ValueError(f"Invalid executor mode: {mode}")
+        self.mode = mode
+        self.workers = workers
+        self.limit = workers + backlog
+        self.pending = 0
+        self.rejected = 0
+        self.replaced = 0
+        self._initializer = initializer
+        self._initargs = initargs
+        self._lock = threading.Lock()
+        self.pool = self._create_pool()
+
+    def _create_pool(self):
+        if self.mode == 'thread':
+            return concurrent.futures.ThreadPoolExecutor(self.workers, thread_name_prefix='compose')
+        return concurrent.futures.ProcessPoolExecutor(
+            self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=self._initializer,
+            initargs=self._initargs,
+        )
+
+    @property
+    def process(self):
+        return self.mode == 'process'
+
+    async def run(self, call, *args):
+        with self._lock:
+            if self.pending >= self.limit:
+                self.rejected += 1
+                raise Overloaded(f"Compose executor overloaded with {self.pending} pending composes, retry later")
+            self.pending += 1
+        pool = self.pool
+        try:
+            future = pool.submit(call, *args)
+        except Broken:
+            self._release(None)
+            self._replace(pool)
+            raise
+        # A call stays pending until it completes, even if the caller stopped waiting for it.
+        future.add_done_callback(self._release)
+        try:
+            return await asyncio.wrap_future(future)
+        except Broken:
+            self._replace(pool)
+            raise
+
+    def _release(self, future):
+        with self._lock:
+            self.pending -= 1
+
+    def _replace(self, pool):
+        """Replace a broken pool, unless a call it was also running already has."""
+        with self._lock:
+            if self.pool is not pool:
+                return
+            self.pool = self._create_pool()
+            self.replaced += 1
+        logger.warning(f"Compose executor {self.mode} pool broken, replaced it")
+        pool.shutdown(wait=False)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
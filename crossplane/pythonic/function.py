@@ -1,52 +1,133 @@
 """A Crossplane composition function."""
 
 import asyncio
+import dis
+import functools
 import importlib
 import inspect
 import logging
 import sys
+import sysconfig
+import time
 
 import grpc
+from . import (
+    cache,
+    command,
+    executor,
+    profiling,
+)
 from .proto.v1 import run_function_pb2 as fnv1
 from .proto.v1 import run_function_pb2_grpc as grpcv1
 from .. import pythonic
 
 logger = logging.getLogger(__name__)
 
+# Modules in these locations are never invalidated, so are not tracked as dependencies.
+LIBRARY_PATHS = tuple(sorted({
+    sysconfig.get_path(name)
+    for name in ('stdlib', 'platstdlib', 'purelib', 'platlib')
+    if sysconfig.get_path(name)
+}))
+PYTHONIC_PACKAGE = __name__.rpartition('.')[0]
+
 
 class FunctionRunner(grpcv1.FunctionRunnerService):
     """A FunctionRunner handles gRPC RunFunctionRequests."""
 
-    def __init__(self, renderUnknowns=False, crossplane_v1=False):
+    def __init__(self, renderUnknowns=False, crossplane_v1=False, class_cache_size=1024, class_cache_bytes=32*1024*1024, compile_cache_dir=None, compose_timeout=None, phase_timings=False, profile_dir=None, compose_executor=None):
         """Create a new FunctionRunner."""
         self.renderUnknowns = renderUnknowns
         self.crossplane_v1 = crossplane_v1
-        self.clazzes = {}
+        self.clazzes = cache.LRUCache(class_cache_size, class_cache_bytes)
+        self.codes = cache.CompileCache(compile_cache_dir, class_cache_size, class_cache_bytes)
+        self.compose_timeout = compose_timeout
+        self.phase_timings = phase_timings
+        self.profiler = profiling.Profiler(profile_dir) if profile_dir else None
+        self.executor = compose_executor
+        # A metrics.Metrics observing the requests run by RunFunction, if enabled.
+        self.metrics = None
 
     def invalidate_module(self, module):
+        modules = set()
         ix = len(module)
         while ix > 0:
             module = module[:ix]
+            modules.add(module)
             if module in sys.modules:
                 del sys.modules[module]
             ix = module.rfind('.')
         importlib.invalidate_caches()
-        self.clazzes.clear()
+        # Only drop the cached classes that depend on one of the invalidated modules.
+        dropped = self.clazzes.prune(lambda key, entry: not modules.isdisjoint(entry[1]))
+        if dropped:
+            logger.debug(f"Invalidated {dropped} cached composite(s) depending on: {','.join(sorted(modules))}")
 
     async def RunFunction(
-        self, request: fnv1.RunFunctionRequest, _: grpc.aio.ServicerContext
+        self, request: fnv1.RunFunctionRequest, context: grpc.aio.ServicerContext
     ) -> fnv1.RunFunctionResponse:
+        timeout = context.time_remaining() if context else None
         try:
-            return await self.run_function(request)
+            if not self.metrics:
+                return await self.run_request(request, timeout)
+            start = time.monotonic()
+            record = {}
+            response = await self.run_request(request, timeout, record)
+            self.metrics.observe(record, response, time.monotonic() - start)
+            return response
+        except executor.Overloaded as e:
+            code, message = grpc.StatusCode.RESOURCE_EXHAUSTED, str(e)
+        except executor.Broken as e:
+            code, message = grpc.StatusCode.UNAVAILABLE, f"Compose executor broken, retry later: {e}"
+        if context is None:
+            return self.fatal(request, logger, message)
+        # Crossplane retries a request failing with an error status, instead of reporting a fatal result.
+        logger.warning(message)
+        await context.abort(code, message)
+
+    async def run_request(self, request, timeout=None, record=None):
+        """Run a request, timeout is the seconds remaining until the client deadline, if any.
+
+        If record is a dict, the composite, step and phase seconds are recorded in it.
+        """
+        try:
+            if self.executor and self.executor.process:
+                # The child process is abandoned if the deadline is exceeded, it cannot be interrupted.
+                start = time.monotonic()
+                try:
+                    response, child = await asyncio.wait_for(
+                        self.executor.run(
+                            run_process,
+                            request.SerializeToString(),
+                            timeout,
+                            dict(self.profiler.targets) if self.profiler else None,
+                        ),
+                        timeout,
+                    )
+                except TimeoutError:
+                    return self.fatal(request, logger, f"Deadline exceeded after {time.monotonic() - start:.3f}s")
+                if 'profiled' in child:
+                    self.profiler.done(child['profiled'])
+                if record is not None:
+                    record.update(child)
+                return fnv1.RunFunctionResponse.FromString(response)
+            return await self.run_function(request, timeout, record)
+        except (executor.Overloaded, executor.Broken):
+            raise
         except Exception as e:
             return self.fatal(request, logger, 'RunFunction', e)
 
-    async def run_function(self, request):
+    async def run_function(self, request, timeout=None, record=None):
+        start = time.monotonic()
+        if record is None:
+            record = {}
+        phases = record['phases'] = Phases(start)
         composite = request.observed.composite.resource
         if composite and composite.fields:
             name = list(reversed(composite['apiVersion'].split('/')[0].split('.')))
             name.append(composite['kind'])
-            name.append(composite['metadata']['name'])
+            resource_name = composite['metadata']['name']
+            name.append(resource_name)
             logger = logging.getLogger('.'.join(name))
             if 'inlined' in request.input and request.input['inlined']:
                 if 'spec' not in composite or request.input['inlined'] not in composite['spec']:
@@ -59,51 +140,37 @@ class FunctionRunner(grpcv1.FunctionRunnerService):
             operation = False
         else:
             logger = logging.getLogger('operation')
+            resource_name = None
             if 'composite' not in request.input:
                 return self.fatal(request, logger, 'Missing operation input "composite"')
             composite = request.input['composite']
             operation = True
 
+        if '\n' in composite:
+            key = cache.digest(composite)
+        else:
+            key = composite
+            record['composite'] = composite
+
         # Ideally this is something the Function API provides
         if 'step' in request.input:
             step = request.input['step']
         else:
-            step = str(hash(composite))
-
-        clazz = self.clazzes.get(composite)
-        if not clazz:
-            if '\n' in composite:
-                module = Module()
-                try:
-                    exec(composite, module.__dict__)
-                except Exception as e:
-                    return self.fatal(request, logger, 'Exec', e)
-                for field in dir(module):
-                    value = getattr(module, field)
-                    if inspect.isclass(value) and issubclass(value, pythonic.BaseComposite) and value != pythonic.BaseComposite:
-                        if clazz:
-                            return self.fatal(request, logger, 'Composite script has multiple BaseComposite classes')
-                        clazz = value
-                if not clazz:
-                    return self.fatal(request, logger, 'Composite script does not have a BaseComposite class')
-            else:
-                composite = composite.rsplit('.', 1)
-                if len(composite) == 1:
-                    return self.fatal(request, logger, f"Composite class name does not include module: {composite[0]}")
-                try:
-                    module = importlib.import_module(composite[0])
-                except Exception as e:
-                    return self.fatal(request, logger, 'Import module', e)
-                clazz = getattr(module, composite[1], None)
-                if not clazz:
-                    return self.fatal(request, logger, f"{composite[0]} does not define: {composite[1]}")
-                composite = '.'.join(composite)
-                if not inspect.isclass(clazz):
-                    return self.fatal(request, logger, f"{composite} is not a class")
-                if not issubclass(clazz, pythonic.BaseComposite):
-                    return self.fatal(request, logger, f"{composite} is not a subclass of BaseComposite")
-            self.clazzes[composite] = clazz
+            # The step must be the same in every process, which str hashes are not.
+            step = key if '\n' in composite else cache.digest(composite)
+        record['step'] = step
+        clazz = self.clazzes.get(key)
+        if clazz:
+            clazz = clazz[0]
+        else:
+            try:
+                clazz = self.load_class(composite, key, logger)
+            except LoadError as e:
+                return self.fatal(request, logger, *e.args)
 
+        if '\n' in composite:
+            record['composite'] = clazz.__name__
+        phases('load')
         if operation:
             if '\n' in composite:
                 logger = logging.getLogger(f"operation.{clazz.__name__}")
@@ -114,7 +181,23 @@ class FunctionRunner(grpcv1.FunctionRunnerService):
             composite = clazz(self.crossplane_v1, request, logger)
         except Exception as e:
             return self.fatal(request, logger, 'Instantiate', e)
+        phases('instantiate')
 
+        compose_timeout = self.compose_timeout
+        if composite.composeTimeout is not None:
+            compose_timeout = composite.composeTimeout
+        if 'composeTimeout' in request.input:
+            compose_timeout = request.input['composeTimeout']
+        if compose_timeout is not None and (isinstance(compose_timeout, bool) or not isinstance(compose_timeout, (int, float)) or not compose_timeout > 0):
+            return self.fatal(request, logger, f"composeTimeout must be a positive number of seconds: {compose_timeout}")
+        deadline = False
+        if timeout is not None:
+            timeout -= time.monotonic() - start
+            if compose_timeout is None or timeout < compose_timeout:
+                compose_timeout = timeout
+                deadline = True
+
+        step_name = step
         step = composite.context._pythonic[step]
         iteration = int(step.iteration) + 1
         step.iteration = iteration
@@ -127,15 +210,49 @@ class FunctionRunner(grpcv1.FunctionRunnerService):
         else:
             logger.debug(f"Starting compose, {ordinal(len(composite.context._pythonic))} step, {ordinal(iteration)} pass")
 
+        profile = None
+        if self.profiler and self.profiler.targets:
+            target = self.profiler.match((record['composite'], clazz.__name__, resource_name, step_name))
+            if target:
+                profile = self.profiler.profile()
+                if not profile:
+                    logger.debug('Compose not profiled while another compose is profiled')
+
+        limit = asyncio.timeout(compose_timeout)
         try:
-            result = composite.compose()
-            if asyncio.iscoroutine(result):
-                await result
+            start = time.monotonic()
+            async with limit:
+                await self.compose(composite, profile)
+        except TimeoutError as e:
+            elapsed = time.monotonic() - start
+            phases('compose')
+            # A TimeoutError raised by the compose itself is not the compose timing out.
+            if not limit.expired():
+                return self.fatal(request, logger, 'Compose', e)
+            if deadline:
+                return self.fatal(request, logger, f"Compose deadline exceeded in step {step_name} after {elapsed:.3f}s")
+            return self.fatal(request, logger, f"Compose timed out in step {step_name} after {elapsed:.3f}s")
+        except (executor.Overloaded, executor.Broken):
+            phases('compose')
+            raise
         except Exception as e:
+            phases('compose')
             return self.fatal(request, logger, 'Compose', e)
+        finally:
+            if profile:
+                self.profiler.release()
+                # Profiling never changes the outcome of the compose.
+                try:
+                    self.profiler.dump(profile, record['composite'])
+                except Exception as e:
+                    logger.warning(f"Profile dump failed: {e}")
+                self.profiler.done(target)
+                record['profiled'] = target
+        phases('compose')
 
         schemas = self.get_schemas(step, composite)
         requireds = self.get_requireds(step, composite)
+        phases('requirements')
         if schemas or requireds:
             if schemas:
                 logger.debug(f"Required schemas: {','.join(schemas)}")
@@ -143,14 +260,100 @@ class FunctionRunner(grpcv1.FunctionRunnerService):
                 logger.debug(f"Required resources: {','.join(requireds)}")
         else:
             self.process_usages(composite)
+            phases('usages')
             self.process_unknowns(composite)
+            phases('unknowns')
             # Perform auto ready on all resources.
             for name, resource in composite.resources:
                 resource.ready
+            phases('ready')
             logger.info('Completed compose')
 
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Phase timings: {phases}")
+        if self.phase_timings:
+            composite._response.output['phaseSeconds'] = dict(phases)
         return composite.response._message
 
+    def load_class(self, composite, key, logger):
+        """Load a composite class and put it in the class cache, raising LoadError if it cannot be."""
+        clazz = None
+        if '\n' in composite:
+            module = Module()
+            try:
+                code, seconds = self.codes.compile(composite, key)
+                if seconds is not None:
+                    logger.debug(f"Compiled composite in {seconds * 1000.0:.3f}ms")
+                loaded = set(sys.modules)
+                exec(code, module.__dict__)
+            except Exception as e:
+                raise LoadError('Exec', e)
+            for field in dir(module):
+                value = getattr(module, field)
+                if inspect.isclass(value) and issubclass(value, pythonic.BaseComposite) and value != pythonic.BaseComposite:
+                    if clazz:
+                        raise LoadError('Composite script has multiple BaseComposite classes')
+                    clazz = value
+            if not clazz:
+                raise LoadError('Composite script does not have a BaseComposite class')
+            # Names imported only for a constant are not found in the namespace.
+            modules = module_dependencies(module.__dict__, code_imports(code) | imported_modules(loaded))
+        else:
+            composite = composite.rsplit('.', 1)
+            if len(composite) == 1:
+                raise LoadError(f"Composite class name does not include module: {composite[0]}")
+            loaded = set(sys.modules)
+            try:
+                module = importlib.import_module(composite[0])
+            except Exception as e:
+                raise LoadError('Import module', e)
+            clazz = getattr(module, composite[1], None)
+            if not clazz:
+                raise LoadError(f"{composite[0]} does not define: {composite[1]}")
+            composite = '.'.join(composite)
+            if not inspect.isclass(clazz):
+                raise LoadError(f"{composite} is not a class")
+            if not issubclass(clazz, pythonic.BaseComposite):
+                raise LoadError(f"{composite} is not a subclass of BaseComposite")
+            modules = module_dependencies(module.__dict__, {module.__name__, clazz.__module__} | imported_modules(loaded))
+        evictions = self.clazzes.evictions
+        self.clazzes.put(key, (clazz, modules), len(composite))
+        if self.clazzes.evictions != evictions:
+            logger.debug(f"Class cache evicted {self.clazzes.evictions - evictions} composite(s)")
+        return clazz
+
+    def preload(self, composite):
+        """Load a composite class into the class cache before it is first requested."""
+        key = cache.digest(composite) if '\n' in composite else composite
+        if key not in self.clazzes:
+            self.load_class(composite, key, logger)
+
+    async def compose(self, composite, profile=None):
+        call = composite.compose
+        if profile:
+            call = functools.partial(profiling.run, profile, call)
+        # A synchronous compose run in an executor is abandoned if it times out,
+        # while it would block the event loop if run inline.
+        if self.executor and not inspect.iscoroutinefunction(composite.compose):
+            result = await self.executor.run(call)
+        else:
+            result = call()
+        if asyncio.iscoroutine(result):
+            if not profile:
+                await result
+                return
+            # Anything else the event loop runs meanwhile is profiled as well.
+            try:
+                profile.enable()
+            except ValueError as e:
+                logger.warning(f"Compose not profiled: {e}")
+                await result
+                return
+            try:
+                await result
+            finally:
+                profile.disable()
+
     def fatal(self, request, logger, message, exception=None):
         if exception:
             message += ' exception'
@@ -204,38 +407,33 @@ class FunctionRunner(grpcv1.FunctionRunnerService):
             apiVersion = 'apiextensions.crossplane.io/v1beta1'
         else:
             apiVersion = 'protection.crossplane.io/v1beta1'
+        debug = composite.logger.isEnabledFor(logging.DEBUG)
         for _, resource in sorted(entry for entry in composite.resources):
-            dependencies = resource.desired._getDependencies
+            usages = resource.usages or (resource.usages is None and composite.usages)
+            if not (debug or usages):
+                # Dependencies of copied values are expanded on demand, skip it when unused.
+                continue
+            dependencies = resource.desired._getDependencyPaths
             if dependencies:
-                if composite.logger.isEnabledFor(logging.DEBUG):
-                    for destination, source in sorted(dependencies.items()):
-                        destination = self.trimFullName(destination)
-                        source = self.trimFullName(source)
+                if debug:
+                    for destination, source in sorted(
+                        (self.trimFullName(destination), self.trimFullName(source))
+                        for destination, source in dependencies.items()
+                    ):
                         composite.logger.debug(f"Dependency: {destination} = {source}")
-                if resource.usages or (resource.usages is None and composite.usages):
+                if usages:
                     resources = {}
                     requireds = {}
-                    for destination, source in sorted(dependencies.items()):
-                        name = source.split('.')
-                        if (len(name) > 5 and
-                            name[0] in ('request', 'response') and
-                            name[1] in ('observed', 'desired') and
-                            name[2] == 'resources' and
-                            name[4] == 'resource'
-                        ):
-                            if name[3] not in resources:
-                                resources[name[3]] = []
-                            resources[name[3]].append(f"{'.'.join(destination.split('.')[5:])} = {'.'.join(name[5:])}")
-                        elif (len(name) > 5 and
-                            name[0] == 'request' and
-                            name[1] in ('required_resources', 'extra_resources') and
-                            name[3].startswith('items[') and name[3][-1] == ']' and
-                            name[4] == 'resource'
-                        ):
-                            key = (name[2], int(name[3][6:-1]))
-                            if key not in requireds:
-                                requireds[key] = []
-                            requireds[key].append(f"{'.'.join(destination.split('.')[5:])} = {'.'.join(name[5:])}")
+                    for destination, source in sorted(dependencies.items(), key=lambda item: format_path(item[0])):
+                        origin, path = path_origin(source)
+                        if origin is None or not path:
+                            continue
+                        reason = f"{format_path(path_origin(destination)[1])} = {format_path(path)}"
+                        match origin:
+                            case ('resource', name):
+                                resources.setdefault(name, []).append(reason)
+                            case ('required', name, index):
+                                requireds.setdefault((name, index), []).append(reason)
                     for name, dependencies in resources.items():
                         source = composite.resources[name]
                         name = [resource.name, str(source.kind)]
@@ -292,7 +490,7 @@ class FunctionRunner(grpcv1.FunctionRunnerService):
         warningResources = []
         fatalResources = []
         for name, resource in sorted(entry for entry in composite.resources):
-            unknowns = resource.desired._getUnknowns
+            unknowns = resource.desired._getUnknownPaths
             if unknowns:
                 unknownResources.append(name)
                 warning = False
@@ -304,9 +502,10 @@ class FunctionRunner(grpcv1.FunctionRunnerService):
                         fatalResources.append(name)
                         fatal = True
                 if composite.logger.isEnabledFor(logging.DEBUG):
-                    for destination, source in sorted(unknowns.items()):
-                        destination = self.trimFullName(destination)
-                        source = self.trimFullName(source)
+                    for destination, source in sorted(
+                        (self.trimFullName(destination), self.trimFullName(source))
+                        for destination, source in unknowns.items()
+                    ):
                         if fatal:
                             composite.logger.error(f'Observed unknown: {destination} = {source}')
                         elif warning:
@@ -350,40 +549,164 @@ class FunctionRunner(grpcv1.FunctionRunnerService):
         if result:
             result(reason, message)
 
-    def trimFullName(self, name):
-        name = name.split('.')
-        for values in (
-                ('request', 'observed', 'composite', 'resource'),
-                ('response', 'desired', 'composite', 'resource'),
-                ('request', 'observed', 'resources', None, 'resource'),
-                ('response', 'desired', 'resources', None, 'resource'),
-                ('request', 'required_resources', None, 'items', None, 'resource'),
-                ('request', 'extra_resources', None, 'items', None, 'resource'),
-        ):
-            if len(values) < len(name):
-                ix = 0
-                for iv, value in enumerate(values):
-                    if value:
-                        if value != name[ix]:
-                            if not name[ix].startswith(f"{values[iv]}[") or iv+1 >= len(values) or values[iv+1]:
-                                break
-                            continue
-                    ix += 1
-                else:
-                    ix = 0
-                    for value in values:
-                        if value:
-                            if value == name[ix]:
-                                del name[ix]
-                            elif ix:
-                                name[ix-1] += name[ix][len(value):]
-                                del name[ix]
-                            else:
-                                name[ix] = name[ix][len(value):]
-                        else:
-                            ix += 1
-                    break
-        return '.'.join(name)
+    def trimFullName(self, path):
+        origin, rest = path_origin(path)
+        if origin is None or not rest:
+            return format_path(path)
+        match origin:
+            case ('composite',):
+                return format_path(rest)
+            case ('resource', name):
+                return format_path(rest, name)
+            case ('required', name, index):
+                return format_path(rest, f"{name}[{index}]")
+
+
+def path_origin(path):
+    """Split a wrapper path into the resource it is in and the path within that resource.
+
+    The origin is ('composite',), ('resource', name) or ('required', name, index),
+    or None if the path is not within a resource.
+    """
+    match path:
+        case ('request', 'observed', 'composite', 'resource', *rest) | ('response', 'desired', 'composite', 'resource', *rest):
+            return ('composite',), tuple(rest)
+        case ('request' | 'response', 'observed' | 'desired', 'resources', str() as name, 'resource', *rest):
+            return ('resource', name), tuple(rest)
+        case ('request', 'required_resources' | 'extra_resources', str() as name, 'items', int() as index, 'resource', *rest):
+            return ('required', name, index), tuple(rest)
+    return None, path
+
+
+def format_path(path, name=''):
+    for key in path:
+        if isinstance(key, int):
+            name += f"[{key}]"
+        elif not name:
+            name = key
+        elif key.isidentifier():
+            name += f".{key}"
+        else:
+            name += f"['{key}']"
+    return name
+
+
+# The FunctionRunner of a compose executor child process.
+_process_runner = None
+
+
+class LoadError(Exception):
+    """Raised when a composite class cannot be loaded, with the arguments of FunctionRunner.fatal."""
+
+    def __str__(self):
+        if len(self.args) > 1:
+            return f"{self.args[0]} exception: {self.args[1]}"
+        return self.args[0]
+
+
+class Phases(dict):
+    """The seconds spent in each phase of running a request.
+
+    Calling it with a phase name records the seconds since the previous phase ended.
+    """
+
+    def __init__(self, start):
+        super().__init__()
+        self.mark = start
+
+    def __call__(self, phase):
+        now = time.monotonic()
+        self[phase] = now - self.mark
+        self.mark = now
+
+    def __str__(self):
+        return ', '.join(f"{phase} {seconds * 1000.0:.3f}ms" for phase, seconds in self.items())
+
+    def __reduce__(self):
+        # Only the timings are returned from compose executor child processes.
+        return dict, (dict(self),)
+
+
+def initialize_process(args, *runner_args):
+    """Initialize a compose executor child process."""
+    global _process_runner
+    command.Command(args).initialize_function()
+    _process_runner = FunctionRunner(*runner_args)
+    for composite in getattr(args, 'preload', ()):
+        try:
+            _process_runner.preload(composite)
+        except LoadError as e:
+            logger.error(f"Preload {composite} failed: {e}")
+
+
+def run_process(request, timeout=None, profile_targets=None):
+    """Run a serialized RunFunctionRequest in a compose executor child process."""
+    request = fnv1.RunFunctionRequest.FromString(request)
+    if _process_runner.profiler:
+        # The parent process counts the profiled composes.
+        _process_runner.profiler.targets = profile_targets or {}
+    record = {}
+    response = asyncio.run(_process_runner.run_request(request, timeout, record))
+    return response.SerializeToString(), record
+
+
+def module_dependencies(namespace, modules=None):
+    """Return the names of the modules the namespace transitively references.
+
+    Standard library, installed library and function-pythonic modules are not included.
+    """
+    modules = {module for module in modules or () if module in sys.modules and _tracked_module(sys.modules[module])}
+    namespaces = [namespace, *(sys.modules[module].__dict__ for module in modules)]
+    while namespaces:
+        for value in list(namespaces.pop().values()):
+            if inspect.ismodule(value):
+                module = value.__name__
+            else:
+                module = getattr(value, '__module__', None)
+                if not isinstance(module, str):
+                    continue
+            if module in modules:
+                continue
+            value = sys.modules.get(module)
+            if value is None or not _tracked_module(value):
+                continue
+            modules.add(module)
+            namespaces.append(value.__dict__)
+    return modules
+
+
+def imported_modules(loaded):
+    """Return the names of the modules imported since sys.modules had the loaded names.
+
+    Packages only imported as the parent of an imported module are not included.
+    """
+    modules = sys.modules.keys() - loaded
+    parents = {module.rpartition('.')[0] for module in modules}
+    return {module for module in modules if module not in parents}
+
+
+def code_imports(code):
+    """Return the names of the modules the code, or code it defines, imports."""
+    modules = set()
+    codes = [code]
+    while codes:
+        code = codes.pop()
+        for instruction in dis.get_instructions(code):
+            if instruction.opname == 'IMPORT_NAME':
+                modules.add(instruction.argval)
+        codes.extend(const for const in code.co_consts if inspect.iscode(const))
+    return modules
+
+
+def _tracked_module(module):
+    name = module.__name__
+    if name == PYTHONIC_PACKAGE or name.startswith(PYTHONIC_PACKAGE + '.'):
+        return False
+    path = getattr(module, '__file__', None)
+    if path is None:
+        # Namespace packages, such as function-pythonic ConfigMap packages, have no file.
+        return hasattr(module, '__path__')
+    return not path.startswith(LIBRARY_PATHS)
 
 
 def ordinal(ix):
@@ -402,8 +725,13 @@ class Module:
         self.Map = pythonic.Map
         self.List = pythonic.List
         self.Unknown = pythonic.Unknown
+        self.View = pythonic.View
+        self.Path = pythonic.Path
         self.Yaml = pythonic.Yaml
         self.YamlAll = pythonic.YamlAll
         self.Json = pythonic.Json
         self.B64Encode = pythonic.B64Encode
         self.B64Decode = pythonic.B64Decode
+        self.B64EncodeMap = pythonic.B64EncodeMap
+        self.B64DecodeMap = pythonic.B64DecodeMap
+        self.Columns = pythonic.Columns
@@ -1,24 +1,51 @@
 
 import asyncio
 import logging
+import multiprocessing
 import os
 import pathlib
 import shlex
 import signal
 import sys
+import time
 
 import grpc
+from grpc_health.v1 import health as grpc_health
+from grpc_health.v1 import health_pb2
+from grpc_health.v1 import health_pb2_grpc
 
 from . import (
     __about__,
     command,
+    executor,
     function,
+    metrics,
+    profiling,
 )
+from .proto.v1 import run_function_pb2 as fnv1
 from .proto.v1 import run_function_pb2_grpc as grpcv1
 
 
 logger = logging.getLogger(__name__)
 
+COMPRESSIONS = {
+    'none': grpc.Compression.NoCompression,
+    'gzip': grpc.Compression.Gzip,
+    'deflate': grpc.Compression.Deflate,
+}
+
+# The service reported by the health service along with the server.
+SERVICE = fnv1.DESCRIPTOR.services_by_name['FunctionRunnerService'].full_name
+# Seconds between checks of the --workers processes.
+SUPERVISE_INTERVAL = 1.0
+# A worker exiting within RESTART_WINDOW seconds of starting has failed. It is restarted after
+# RESTART_DELAY seconds, doubled for each consecutive failure up to RESTART_DELAY_MAX seconds,
+# and the server stops once a worker has failed more than RESTART_LIMIT times in a row.
+RESTART_WINDOW = 60.0
+RESTART_DELAY = 1.0
+RESTART_DELAY_MAX = 30.0
+RESTART_LIMIT = 5
+
 
 class Command(command.Command):
     name = 'grpc'
@@ -27,6 +54,7 @@ class Command(command.Command):
     @classmethod
     def add_parser_arguments(cls, parser):
         cls.add_function_arguments(parser)
+        parser.set_defaults(worker=None)
         parser.add_argument(
             '--address',
             default='0.0.0.0:9443',
@@ -87,6 +115,134 @@ class Command(command.Command):
             metavar='INSTALL',
             help='Pip install command to install additional Python packages.'
         )
+        parser.add_argument(
+            '--class-cache-size',
+            type=int,
+            default=1024,
+            metavar='ENTRIES',
+            help='Maximum number of composite classes to cache, 0 for no limit, default 1024.',
+        )
+        parser.add_argument(
+            '--class-cache-bytes',
+            type=int,
+            default=32*1024*1024,
+            metavar='BYTES',
+            help='Maximum total size of cached inline composite sources, 0 for no limit, default 32MiB.',
+        )
+        parser.add_argument(
+            '--compile-cache-dir',
+            metavar='DIRECTORY',
+            help='Directory to persist compiled inline composites to, default is to only cache them in memory.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            metavar='WORKERS',
+            help='Number of gRPC server processes sharing the listen address, default 1.',
+        )
+        parser.add_argument(
+            '--compose-timeout',
+            type=float,
+            metavar='SECONDS',
+            help='Seconds a compose may run for before it is cancelled, default is only the request deadline.',
+        )
+        parser.add_argument(
+            '--compose-executor',
+            choices=executor.MODES,
+            default='inline',
+            help='Where to run composes: inline on the gRPC event loop, synchronous composes in a thread pool, or requests in a process pool, default inline.',
+        )
+        parser.add_argument(
+            '--compose-workers',
+            type=int,
+            default=4,
+            metavar='WORKERS',
+            help='Number of compose executor threads or processes, default 4.',
+        )
+        parser.add_argument(
+            '--compose-backlog',
+            type=int,
+            default=64,
+            metavar='COMPOSES',
+            help='Number of composes waiting for a compose executor worker before composes are rejected, default 64.',
+        )
+        parser.add_argument(
+            '--health-address',
+            metavar='ADDRESS',
+            help='Address to also serve the gRPC health service on without TLS, for Kubernetes gRPC probes, default only --address.',
+        )
+        parser.add_argument(
+            '--preload',
+            action='append',
+            default=[],
+            metavar='MODULE.CLASS',
+            help='Composite classes to load before reporting the server as serving.',
+        )
+        parser.add_argument(
+            '--max-concurrent-rpcs',
+            type=int,
+            metavar='RPCS',
+            help='Maximum number of concurrent RPCs, further RPCs are rejected with RESOURCE_EXHAUSTED, default no limit.',
+        )
+        parser.add_argument(
+            '--max-receive-message-size',
+            type=int,
+            metavar='BYTES',
+            help='Maximum size of a received request, -1 for no limit, default 4MiB. Requests over 64MiB also need --allow-oversize-protos.',
+        )
+        parser.add_argument(
+            '--max-send-message-size',
+            type=int,
+            metavar='BYTES',
+            help='Maximum size of a sent response, -1 for no limit, default no limit.',
+        )
+        parser.add_argument(
+            '--compression',
+            choices=COMPRESSIONS,
+            default='none',
+            help='Compression of responses, default none.',
+        )
+        parser.add_argument(
+            '--keepalive-time',
+            type=float,
+            metavar='SECONDS',
+            help='Seconds between keepalive pings sent on idle connections, default 2 hours.',
+        )
+        parser.add_argument(
+            '--keepalive-timeout',
+            type=float,
+            metavar='SECONDS',
+            help='Seconds to wait for a keepalive ping acknowledgement before closing the connection, default 20.',
+        )
+        parser.add_argument(
+            '--keepalive-min-ping-interval',
+            type=float,
+            metavar='SECONDS',
+            help='Minimum seconds between keepalive pings clients may send, including without RPCs in flight, default 5 minutes.',
+        )
+        parser.add_argument(
+            '--phase-timings',
+            action='store_true',
+            help='Include the seconds spent in each phase of a request in the response output phaseSeconds field.',
+        )
+        parser.add_argument(
+            '--profile-dir',
+            metavar='DIRECTORY',
+            help='Directory to write cProfile stats of profiled composes to, enables SIGUSR1 and the /profile metrics endpoint to start profiling.',
+        )
+        parser.add_argument(
+            '--profile-count',
+            type=int,
+            default=1,
+            metavar='COMPOSES',
+            help='Number of composes profiled after a SIGUSR1, default 1.',
+        )
+        parser.add_argument(
+            '--metrics-address',
+            metavar='ADDRESS',
+            help='Address to serve Prometheus metrics on at /metrics, --workers servers add the worker number to the port, default no metrics.',
+        )
 
     def initialize(self):
         if not self.args.tls_certs_dir and not self.args.insecure:
@@ -95,21 +251,105 @@ class Command(command.Command):
         if (self.args.packages_environmentconfigs or self.args.packages_compositions) and self.args.packages_namespace:
             print('--packages-namespace cannot be used with --packages-environment-configs or --packages-compositions', file=sys.stderr)
             sys.exit(1)
+        if self.args.class_cache_size < 0 or self.args.class_cache_bytes < 0:
+            print('--class-cache-size and --class-cache-bytes cannot be negative', file=sys.stderr)
+            sys.exit(1)
+        if self.args.workers < 1:
+            print('--workers must be positive', file=sys.stderr)
+            sys.exit(1)
+        if self.args.workers > 1 and (self.args.packages_configmaps or self.args.packages_secrets or self.args.packages_environmentconfigs or self.args.packages_compositions):
+            print('--workers cannot be used with --packages options', file=sys.stderr)
+            sys.exit(1)
+        if self.args.compose_timeout is not None and self.args.compose_timeout <= 0:
+            print('--compose-timeout must be positive', file=sys.stderr)
+            sys.exit(1)
+        if self.args.compose_workers < 1 or self.args.compose_backlog < 0:
+            print('--compose-workers must be positive and --compose-backlog cannot be negative', file=sys.stderr)
+            sys.exit(1)
+        if self.args.metrics_address and not self.args.metrics_address.rpartition(':')[2].isdigit():
+            print('--metrics-address must be HOST:PORT', file=sys.stderr)
+            sys.exit(1)
+        if self.args.max_concurrent_rpcs is not None and self.args.max_concurrent_rpcs < 1:
+            print('--max-concurrent-rpcs must be positive', file=sys.stderr)
+            sys.exit(1)
+        for option in ('max_receive_message_size', 'max_send_message_size'):
+            size = getattr(self.args, option)
+            if size is not None and size < -1:
+                print(f"--{option.replace('_', '-')} must be -1 or more", file=sys.stderr)
+                sys.exit(1)
+        for option in ('keepalive_time', 'keepalive_timeout', 'keepalive_min_ping_interval'):
+            seconds = getattr(self.args, option)
+            if seconds is not None and seconds <= 0:
+                print(f"--{option.replace('_', '-')} must be positive", file=sys.stderr)
+                sys.exit(1)
+        if self.args.profile_count < 1:
+            print('--profile-count must be positive', file=sys.stderr)
+            sys.exit(1)
+        if self.args.compose_executor == 'process' and (self.args.packages_configmaps or self.args.packages_secrets or self.args.packages_environmentconfigs or self.args.packages_compositions):
+            print('--compose-executor process cannot be used with --packages options', file=sys.stderr)
+            sys.exit(1)
         if self.args.pip_install:
             import pip._internal.cli.main
             pip._internal.cli.main.main(['install', '--user', *shlex.split(self.args.pip_install)])
 
         self.initialize_function()
-        logger.info(f"Version: {__about__.__version__}")
+        if self.args.worker is None:
+            logger.info(f"Version: {__about__.__version__}")
 
         # enables read only volumes or mismatched uid volumes
         sys.dont_write_bytecode = True
 
     async def run(self):
+        if self.args.workers > 1 and self.args.worker is None:
+            await self.supervise()
+            return
         grpc.aio.init_grpc_aio()
-        grpc_runner = function.FunctionRunner(self.args.render_unknowns, self.args.crossplane_v1)
-        grpc_server = grpc.aio.server()
-        grpcv1.add_FunctionRunnerServiceServicer_to_server(grpc_runner, grpc_server)
+        runner_args = (
+            self.args.render_unknowns,
+            self.args.crossplane_v1,
+            self.args.class_cache_size,
+            self.args.class_cache_bytes,
+            self.args.compile_cache_dir,
+            self.args.compose_timeout,
+            self.args.phase_timings,
+            self.args.profile_dir,
+        )
+        if self.args.compose_executor == 'inline':
+            compose_executor = None
+        else:
+            compose_executor = executor.ComposeExecutor(
+                self.args.compose_executor,
+                self.args.compose_workers,
+                self.args.compose_backlog,
+                function.initialize_process,
+                (self.args, *runner_args),
+            )
+            logger.info(f"Compose executor: {self.args.compose_executor}, workers: {self.args.compose_workers}")
+        grpc_runner = function.FunctionRunner(*runner_args, compose_executor)
+        grpc_server = grpc.aio.server(
+            options=server_options(self.args),
+            maximum_concurrent_rpcs=self.args.max_concurrent_rpcs,
+            compression=COMPRESSIONS[self.args.compression],
+        )
+        health = grpc_health.aio.HealthServicer()
+        await set_health(health, health_pb2.HealthCheckResponse.NOT_SERVING)
+        health_pb2_grpc.add_HealthServicer_to_server(health, grpc_server)
+        health_server = None
+        if self.args.health_address:
+            health_server = grpc.aio.server(options=[('grpc.so_reuseport', 1)] if self.args.worker is not None else [])
+            health_pb2_grpc.add_HealthServicer_to_server(health, health_server)
+            health_server.add_insecure_port(self.args.health_address)
+            await health_server.start()
+        metrics_server = None
+        if self.args.metrics_address:
+            grpc_runner.metrics = metrics.Metrics(grpc_runner)
+            metrics.add_servicer_to_server(grpc_runner, grpc_server, grpc_runner.metrics)
+            address = self.args.metrics_address
+            if self.args.worker is not None:
+                address = metrics.worker_address(address, self.args.worker)
+            metrics_server = await metrics.serve(grpc_runner.metrics, address)
+        else:
+            grpcv1.add_FunctionRunnerServiceServicer_to_server(grpc_runner, grpc_server)
         if self.args.insecure:
             grpc_server.add_insecure_port(self.args.address)
         else:
@@ -126,9 +366,22 @@ class Command(command.Command):
                 ),
             )
         await grpc_server.start()
+        if grpc_runner.profiler:
+            asyncio.get_event_loop().add_signal_handler(
+                signal.SIGUSR1,
+                grpc_runner.profiler.enable,
+                profiling.ANY,
+                self.args.profile_count,
+            )
+        for composite in self.args.preload:
+            try:
+                grpc_runner.preload(composite)
+            except function.LoadError as e:
+                logger.error(f"Preload {composite} failed: {e}")
 
         if self.args.packages_configmaps or self.args.packages_secrets or self.args.packages_environmentconfigs or self.args.packages_compositions:
             from . import packages
+            ready = asyncio.Event()
             async with asyncio.TaskGroup() as tasks:
                 tasks.create_task(grpc_server.wait_for_termination())
                 tasks.create_task(packages.operator(
@@ -140,11 +393,125 @@ class Command(command.Command):
                     self.args.packages_environmentconfigs,
                     self.args.packages_compositions,
                     self.args.packages_dir,
+                    health,
+                    ready,
                 ))
+                await ready.wait()
+                await packages.sync()
+                await set_health(health, health_pb2.HealthCheckResponse.SERVING)
         else:
             def stop():
-                asyncio.ensure_future(grpc_server.stop(5))
+                asyncio.ensure_future(stop_server(grpc_server, health))
             loop = asyncio.get_event_loop()
             loop.add_signal_handler(signal.SIGINT, stop)
             loop.add_signal_handler(signal.SIGTERM, stop)
+            await set_health(health, health_pb2.HealthCheckResponse.SERVING)
             await grpc_server.wait_for_termination()
+        if health_server:
+            await health_server.stop(None)
+        if metrics_server:
+            metrics_server.close()
+        if compose_executor:
+            compose_executor.shutdown()
+
+    async def supervise(self):
+        context = multiprocessing.get_context('spawn')
+        workers = {}
+        started = {}
+        failures = {}
+        restarts = {}
+        stopping = False
+        failed = False
+
+        def start(worker):
+            process = context.Process(target=run_worker, args=(self.args, worker), name=f"worker-{worker}")
+            process.start()
+            workers[worker] = process
+            started[worker] = time.monotonic()
+            logger.info(f"Started worker {worker}, pid {process.pid}")
+
+        def signal_workers(signum):
+            for process in workers.values():
+                if process.is_alive():
+                    os.kill(process.pid, signum)
+
+        def stop(signum):
+            nonlocal stopping
+            stopping = True
+            restarts.clear()
+            signal_workers(signum)
+
+        loop = asyncio.get_event_loop()
+        loop.add_signal_handler(signal.SIGINT, stop, signal.SIGINT)
+        loop.add_signal_handler(signal.SIGTERM, stop, signal.SIGTERM)
+        if self.args.profile_dir:
+            loop.add_signal_handler(signal.SIGUSR1, signal_workers, signal.SIGUSR1)
+        for worker in range(self.args.workers):
+            start(worker)
+        while workers or restarts:
+            await asyncio.sleep(SUPERVISE_INTERVAL)
+            now = time.monotonic()
+            for worker, process in list(workers.items()):
+                if process.is_alive():
+                    continue
+                process.join()
+                del workers[worker]
+                if stopping:
+                    logger.info(f"Worker {worker} stopped")
+                    continue
+                if now - started[worker] < RESTART_WINDOW:
+                    failures[worker] = failures.get(worker, 0) + 1
+                else:
+                    failures[worker] = 1
+                if failures[worker] > RESTART_LIMIT:
+                    logger.error(f"Worker {worker} exited with code {process.exitcode}, failed {failures[worker]} times in a row, stopping")
+                    failed = True
+                    stop(signal.SIGTERM)
+                    continue
+                delay = min(RESTART_DELAY * 2 ** (failures[worker] - 1), RESTART_DELAY_MAX)
+                logger.warning(f"Worker {worker} exited with code {process.exitcode}, restarting in {delay:g}s")
+                restarts[worker] = now + delay
+            for worker, restart in list(restarts.items()):
+                if restart <= now:
+                    del restarts[worker]
+                    start(worker)
+        if failed:
+            sys.exit(1)
+
+
+async def set_health(health, status):
+    """Set the status of the server and of the FunctionRunnerService."""
+    await health.set('', status)
+    await health.set(SERVICE, status)
+
+
+async def stop_server(grpc_server, health, grace=5):
+    """Report NOT_SERVING, then stop the server once in flight requests complete or after grace seconds."""
+    await health.enter_graceful_shutdown()
+    await grpc_server.stop(grace)
+
+
+def server_options(args):
+    """The gRPC server channel options for the command line options."""
+    options = []
+    if args.worker is not None:
+        options.append(('grpc.so_reuseport', 1))
+    if args.max_receive_message_size is not None:
+        options.append(('grpc.max_receive_message_length', args.max_receive_message_size))
+    if args.max_send_message_size is not None:
+        options.append(('grpc.max_send_message_length', args.max_send_message_size))
+    if args.keepalive_time is not None:
+        options.append(('grpc.keepalive_time_ms', int(args.keepalive_time * 1000)))
+    if args.keepalive_timeout is not None:
+        options.append(('grpc.keepalive_timeout_ms', int(args.keepalive_timeout * 1000)))
+    if args.keepalive_min_ping_interval is not None:
+        options.append(('grpc.http2.min_ping_interval_without_data_ms', int(args.keepalive_min_ping_interval * 1000)))
+        options.append(('grpc.keepalive_permit_without_calls', 1))
+    return options
+
+
+def run_worker(args, worker):
+    """Run one gRPC server process of a --workers server."""
+    args.worker = worker
+    args.pip_install = None
+    asyncio.run(Command(args).run())
@@ -0,0 +1,302 @@
+"""Prometheus text format metrics of a FunctionRunner, served over HTTP."""
+
+import asyncio
+import bisect
+import logging
+import urllib.parse
+
+import grpc
+
+from . import profiling
+from .proto.v1 import run_function_pb2 as fnv1
+
+
+logger = logging.getLogger(__name__)
+
+SERVICE = 'apiextensions.fn.proto.v1.FunctionRunnerService'
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BYTES_BUCKETS = tuple(1024 * 4 ** ix for ix in range(10))
+SEVERITIES = {
+    fnv1.SEVERITY_FATAL: 'fatal',
+    fnv1.SEVERITY_WARNING: 'warning',
+    fnv1.SEVERITY_NORMAL: 'normal',
+}
+# Seconds a client of the metrics server has to send the request line and headers.
+HEADER_TIMEOUT = 5.0
+# Maximum number of composes a POST to /profile may profile.
+PROFILE_COUNT_MAX = 1000
+# Maximum number of targets POSTs to /profile may have waiting to be profiled at once.
+PROFILE_TARGETS_MAX = 16
+
+
+class Counter:
+    """A counter for each combination of label values."""
+
+    type = 'counter'
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values = {}
+
+    def inc(self, labels=(), amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        for labels, value in sorted(self.values.items()):
+            yield self.name, _labels(self.labels, labels), value
+
+
+class Histogram:
+    """A histogram for each combination of label values.
+
+    Each observation only increments one bucket, the buckets are made cumulative
+    when the metrics are rendered.
+    """
+
+    type = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=SECONDS_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self.values = {}
+
+    def observe(self, labels, value):
+        counts = self.values.get(labels)
+        if counts is None:
+            # A count per bucket, one for +Inf, then the sum.
+            counts = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def samples(self):
+        for labels, counts in sorted(self.values.items()):
+            total = 0
+            for bucket, count in zip((*self.buckets, '+Inf'), counts):
+                total += count
+                yield f"{self.name}_bucket", _labels(self.labels, labels, le=bucket), total
+            yield f"{self.name}_sum", _labels(self.labels, labels), counts[-1]
+            yield f"{self.name}_count", _labels(self.labels, labels), total
+
+
+class Gauge:
+    """A value read when the metrics are rendered, such as a cache statistic."""
+
+    def __init__(self, name, help, value, type='gauge'):
+        self.name = name
+        self.help = help
+        self.value = value
+        self.type = type
+
+    def samples(self):
+        value = self.value()
+        if value is not None:
+            yield self.name, '', value
+
+
+class Metrics:
+    """The metrics of a FunctionRunner.
+
+    Requests are observed on the gRPC event loop once they complete, so updating
+    them is a few dict lookups and additions. Cache and executor statistics are
+    only read when the metrics are rendered.
+    """
+
+    def __init__(self, runner):
+        self.runner = runner
+        labels = ('composite', 'step')
+        self.requests = Histogram(
+            'function_pythonic_request_duration_seconds',
+            'Seconds to run a function request, by the most severe result.',
+            (*labels, 'severity'),
+        )
+        self.phases = Histogram(
+            'function_pythonic_phase_duration_seconds',
+            'Seconds spent in each phase of a function request.',
+            (*labels, 'phase'),
+        )
+        self.request_bytes = Histogram(
+            'function_pythonic_request_bytes',
+            'Serialized size of function requests.',
+            buckets=BYTES_BUCKETS,
+        )
+        self.response_bytes = Histogram(
+            'function_pythonic_response_bytes',
+            'Serialized size of function responses.',
+            buckets=BYTES_BUCKETS,
+        )
+        self.results = Counter(
+            'function_pythonic_results_total',
+            'Results returned in function responses.',
+            (*labels, 'severity'),
+        )
+        self.metrics = [self.requests, self.phases, self.request_bytes, self.response_bytes, self.results]
+        for name, help, type, stats, key in (
+                ('class_cache_hits_total', 'Composite class cache hits.', 'counter', self._clazzes, 'hits'),
+                ('class_cache_misses_total', 'Composite class cache misses.', 'counter', self._clazzes, 'misses'),
+                ('class_cache_evictions_total', 'Composite class cache evictions.', 'counter', self._clazzes, 'evictions'),
+                ('class_cache_entries', 'Composite classes cached.', 'gauge', self._clazzes, 'entries'),
+                ('compile_cache_compiles_total', 'Inline composites compiled.', 'counter', self._codes, 'compiles'),
+                ('compile_cache_loads_total', 'Inline composites loaded from the compile cache directory.', 'counter', self._codes, 'loads'),
+                ('compose_executor_pending', 'Composes running or waiting in the compose executor.', 'gauge', self._executor, 'pending'),
+                ('compose_executor_rejected_total', 'Composes rejected by an overloaded compose executor.', 'counter', self._executor, 'rejected'),
+                ('compose_executor_replaced_total', 'Compose executor pools replaced after a child process died.', 'counter', self._executor, 'replaced'),
+        ):
+            self.metrics.append(Gauge(f"function_pythonic_{name}", help, _stat(stats, key), type))
+
+    def _clazzes(self):
+        return self.runner.clazzes.stats()
+
+    def _codes(self):
+        return self.runner.codes.stats()
+
+    def _executor(self):
+        if self.runner.executor is None:
+            return None
+        return {'pending': self.runner.executor.pending, 'rejected': self.runner.executor.rejected, 'replaced': self.runner.executor.replaced}
+
+    def observe(self, record, response, seconds):
+        """Observe a completed request, record holds what run_request found out about it."""
+        labels = (record.get('composite', ''), record.get('step', ''))
+        severity = None
+        for result in response.results:
+            self.results.inc((*labels, SEVERITIES.get(result.severity, 'unspecified')))
+            # Fatal is the lowest severity value.
+            if result.severity in SEVERITIES and (severity is None or result.severity < severity):
+                severity = result.severity
+        self.requests.observe((*labels, SEVERITIES.get(severity, 'none')), seconds)
+        for phase, seconds in record.get('phases', {}).items():
+            self.phases.observe((*labels, phase), seconds)
+
+    # Payload sizes are observed where gRPC (de)serializes the messages, computing them
+    # from the messages would cost another pass over them.
+    def deserialize_request(self, data):
+        self.request_bytes.observe((), len(data))
+        return fnv1.RunFunctionRequest.FromString(data)
+
+    def serialize_response(self, response):
+        data = response.SerializeToString()
+        self.response_bytes.observe((), len(data))
+        return data
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_number(value)}")
+        lines.append('')
+        return '\n'.join(lines)
+
+
+def add_servicer_to_server(servicer, server, metrics):
+    """Add the FunctionRunnerService servicer like grpcv1 does, observing payload sizes."""
+    handlers = {
+        'RunFunction': grpc.unary_unary_rpc_method_handler(
+            servicer.RunFunction,
+            request_deserializer=metrics.deserialize_request,
+            response_serializer=metrics.serialize_response,
+        ),
+    }
+    server.add_generic_rpc_handlers((grpc.method_handlers_generic_handler(SERVICE, handlers),))
+    server.add_registered_method_handlers(SERVICE, handlers)
+
+
+async def serve(metrics, address):
+    """Start serving the metrics at /metrics on address, returning the asyncio server.
+
+    If the runner has a profiler, a POST to /profile?target=TARGET&count=COUNT starts
+    profiling the next count composes of target, default the next compose of any composite.
+    """
+    host, port = address.rsplit(':', 1)
+
+    async def read_head(reader):
+        line = await reader.readline()
+        while (await reader.readline()).strip():
+            pass
+        return line
+
+    async def handle(reader, writer):
+        try:
+            line = await asyncio.wait_for(read_head(reader), HEADER_TIMEOUT)
+            parts = line.decode('latin-1').split()
+            url = urllib.parse.urlsplit(parts[1] if len(parts) >= 2 else '')
+            if parts and parts[0] in ('GET', 'HEAD') and url.path == '/metrics':
+                status = '200 OK'
+                body = metrics.render().encode('utf-8')
+            elif parts and parts[0] == 'POST' and url.path == '/profile' and metrics.runner.profiler:
+                query = dict(urllib.parse.parse_qsl(url.query))
+                try:
+                    target = query.get('target', profiling.ANY)
+                    count = int(query.get('count', 1))
+                    if not 1 <= count <= PROFILE_COUNT_MAX:
+                        raise ValueError(f"Profile count must be from 1 to {PROFILE_COUNT_MAX}: {count}")
+                    targets = metrics.runner.profiler.targets
+                    if target not in targets and len(targets) >= PROFILE_TARGETS_MAX:
+                        raise ValueError(f"Profiling at most {PROFILE_TARGETS_MAX} targets at once")
+                    metrics.runner.profiler.enable(target, count)
+                    status = '200 OK'
+                    body = f"Profiling the next {count} compose(s) of {target}\n".encode('utf-8')
+                except ValueError as e:
+                    status = '400 Bad Request'
+                    body = f"{e}\n".encode('utf-8')
+            else:
+                status = '404 Not Found'
+                body = b'Not Found\n'
+            head = (
+                f"HTTP/1.1 {status}\r\n"
+                'Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n'
+                f"Content-Length: {len(body)}\r\n"
+                'Connection: close\r\n'
+                '\r\n'
+            )
+            writer.write(head.encode('latin-1'))
+            if parts and parts[0] != 'HEAD':
+                writer.write(body)
+            await writer.drain()
+        except TimeoutError:
+            logger.warning(f"Metrics request not received within {HEADER_TIMEOUT:g}s")
+        except Exception as e:
+            logger.warning(f"Metrics request failed: {e}")
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host.strip('[]') or None, int(port))
+    logger.info(f"Serving metrics on {address}")
+    return server
+
+
+def worker_address(address, worker):
+    """The metrics address of a --workers worker, the port is offset by the worker number."""
+    host, port = address.rsplit(':', 1)
+    return f"{host}:{int(port) + worker}"
+
+
+def _stat(stats, key):
+    def value():
+        values = stats()
+        return None if values is None else values[key]
+    return value
+
+
+def _labels(names, values, **extra):
+    labels = [*zip(names, values), *extra.items()]
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _number(value):
+    if isinstance(value, float):
+        if value.is_integer():
+            return str(int(value))
+        return repr(value)
+    return str(value)
@@ -1,41 +1,76 @@
 
 import base64
+import collections
 import logging
 import pathlib
 import sys
 
 import kopf
+import kr8s
+import kr8s.asyncio
 
 
+logger = logging.getLogger(__name__)
+
 GRPC_SERVER = None
 GRPC_RUNNER = None
+GRPC_HEALTH = None
 PACKAGES_DIR = None
+# The group, version and plural of the watched resources, and the namespaces they are watched in.
+RESOURCES = []
+NAMESPACES = None
 PACKAGE_LABEL = 'function-pythonic.package'
 PACKAGE_LABELS = {PACKAGE_LABEL: kopf.PRESENT}
 
+Resource = collections.namedtuple('Resource', ('group', 'version', 'plural'))
+
 
-def operator(grpc_server, grpc_runner, packages_configmaps, packages_secrets, packages_namespaces, packages_environmentconfigs, packages_compositions, packages_dir):
+def operator(grpc_server, grpc_runner, packages_configmaps, packages_secrets, packages_namespaces, packages_environmentconfigs, packages_compositions, packages_dir, grpc_health=None, ready_flag=None):
     logging.getLogger('kopf.objects').setLevel(logging.INFO)
-    global GRPC_SERVER, GRPC_RUNNER, PACKAGES_DIR
+    global GRPC_SERVER, GRPC_RUNNER, GRPC_HEALTH, PACKAGES_DIR, RESOURCES, NAMESPACES
     GRPC_SERVER = grpc_server
     GRPC_RUNNER = grpc_runner
+    GRPC_HEALTH = grpc_health
     PACKAGES_DIR = pathlib.Path(packages_dir).expanduser().resolve()
     sys.path.insert(0, str(PACKAGES_DIR))
+    RESOURCES = []
+    NAMESPACES = packages_namespaces
     if packages_configmaps:
-        on_resource('', 'v1', 'configmaps')
+        RESOURCES.append(Resource('', 'v1', 'configmaps'))
     if packages_secrets:
-        on_resource('', 'v1', 'secrets')
+        RESOURCES.append(Resource('', 'v1', 'secrets'))
     if not packages_namespaces:
         if packages_environmentconfigs:
-            on_resource('apiextensions.crossplane.io', 'v1beta1', 'environmentconfigs')
+            RESOURCES.append(Resource('apiextensions.crossplane.io', 'v1beta1', 'environmentconfigs'))
         if packages_compositions:
-            on_resource('apiextensions.crossplane.io', 'v1', 'compositions')
+            RESOURCES.append(Resource('apiextensions.crossplane.io', 'v1', 'compositions'))
+    for resource in RESOURCES:
+        on_resource(*resource)
     return kopf.operator(
         standalone=True,
         clusterwide=not packages_namespaces,
         namespaces=packages_namespaces,
+        ready_flag=ready_flag,
     )
 
+
+async def sync():
+    """Write the packages of the existing package resources.
+
+    The operator reports it is ready before its resume handlers have processed the existing
+    resources, so they are listed and written before the server reports it is serving. The
+    resume handlers then leave the unchanged files as they are.
+    """
+    count = 0
+    for resource in RESOURCES:
+        kind = f"{resource.plural}.{resource.version}.{resource.group}" if resource.group else resource.plural
+        for namespace in ([None] if resource.group else NAMESPACES or [kr8s.ALL]):
+            async for body in kr8s.asyncio.get(kind, namespace=namespace, label_selector=PACKAGE_LABEL, raw=True):
+                resource_create(resource, body.get('metadata', {}).get('labels', {}), 'Synced', body, logger)
+                count += 1
+    logger.info(f"Synced {count} package resource(s)")
+
+
 def on_resource(group, version, plural):
     kopf.on.create(group, version, plural, labels=PACKAGE_LABELS)(create)
     kopf.on.resume(group, version, plural, labels=PACKAGE_LABELS)(create)
@@ -50,6 +85,8 @@ async def startup(settings, **_):
 
 @kopf.on.cleanup()
 async def cleanup(**_):
+    if GRPC_HEALTH:
+        await GRPC_HEALTH.enter_graceful_shutdown()
     await GRPC_SERVER.stop(5)
 
 
@@ -113,12 +150,16 @@ def package_create(resource, action, package_dir, package, logger):
         if validate_entry(name, value, logger):
             package_name = package_dir / name
             if isinstance(value, str):
-                package_name.parent.mkdir(parents=True, exist_ok=True)
                 if resource.plural == 'secrets':
-                    package_name.write_bytes(base64.b64decode(value.encode('utf-8')))
+                    content = base64.b64decode(value.encode('utf-8'))
                 else:
-                    package_name.write_text(value)
+                    content = value.encode('utf-8')
                 module, name = package_file_name(package_name)
+                if package_name.is_file() and package_name.read_bytes() == content:
+                    logger.debug(f"Unchanged {'module' if module else 'file'}: {name}")
+                    continue
+                package_name.parent.mkdir(parents=True, exist_ok=True)
+                package_name.write_bytes(content)
                 if module:
                     GRPC_RUNNER.invalidate_module(name)
                     logger.info(f"{action} module: {name}")
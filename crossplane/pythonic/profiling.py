@@ -0,0 +1,93 @@
+"""On demand cProfile capture of the composes of chosen composites."""
+
+import cProfile
+import itertools
+import logging
+import os
+import pathlib
+import re
+import time
+
+
+logger = logging.getLogger(__name__)
+
+# Matches the compose of every composite.
+ANY = '*'
+_UNSAFE = re.compile(r'[^\w.-]')
+
+
+class Profiler:
+    """Profiles the next composes of targeted composites, dumping the stats to a directory.
+
+    A target is a composite class name, a composite module reference, a composite
+    resource name, a step name or ANY. Each target is profiled for a count of composes,
+    after which it is removed. While there are no targets a request only checks that
+    targets is empty. Only one profile is enabled at a time, as Python only allows one
+    profiler to be active, so composes overlapping a profiled compose are not profiled.
+    """
+
+    def __init__(self, directory):
+        self.directory = pathlib.Path(directory).expanduser()
+        self.targets = {}
+        self.sequence = itertools.count(1)
+        self.active = False
+
+    def enable(self, target, count=1):
+        if count < 1:
+            raise ValueError(f"Invalid profile count: {count}")
+        self.targets[target] = count
+        logger.info(f"Profiling the next {count} compose(s) of {target}")
+
+    def match(self, names, targets=None):
+        """Return the first target matching one of the names, if any."""
+        if targets is None:
+            targets = self.targets
+        for name in names:
+            if name and name in targets:
+                return name
+        if ANY in targets:
+            return ANY
+        return None
+
+    def done(self, target):
+        """Count a profiled compose of target."""
+        count = self.targets.get(target)
+        if count is None:
+            return
+        if count > 1:
+            self.targets[target] = count - 1
+        else:
+            del self.targets[target]
+
+    def profile(self):
+        """Return a new profile, or None while another compose is profiled."""
+        if self.active:
+            return None
+        self.active = True
+        return cProfile.Profile()
+
+    def release(self):
+        """Allow another compose to be profiled once the profiled compose completes."""
+        self.active = False
+
+    def dump(self, profile, name):
+        """Write the stats of a profiled compose of the composite name, returning the file path."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        name = _UNSAFE.sub('_', name)
+        path = self.directory / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(self.sequence)}.prof"
+        profile.dump_stats(path)
+        logger.info(f"Profiled compose: {path}")
+        return path
+
+
+def run(profile, call):
+    """Run call profiled, or unprofiled if another profiler is already active."""
+    try:
+        profile.enable()
+    except ValueError as e:
+        logger.warning(f"Compose not profiled: {e}")
+        return call()
+    try:
+        return call()
+    finally:
+        profile.disable()
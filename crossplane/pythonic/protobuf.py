@@ -16,15 +16,41 @@
 ##################################################################################
 
 import base64
+import collections.abc
 import datetime
+import google.protobuf.message
 import google.protobuf.struct_pb2
+import io
 import json
+import re
 import sys
 import yaml
 
 _Unknown = object()
 append = sys.maxsize
 
+# The libyaml based loader, when PyYAML was built with it.
+_Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+class _EmptyDict(dict):
+    # Shared by all wrappers until they need a dict of their own, see _writable.
+    __slots__ = ()
+
+    def __setitem__(self, key, value):
+        raise TypeError('The shared empty dict is read only')
+
+_Empty = _EmptyDict()
+_CONTAINERS = frozenset(('struct_value', 'list_value', 'Struct', 'ListValue'))
+
+
+def _writable(wrapper, name):
+    value = getattr(wrapper, name)
+    if value is _Empty:
+        value = {}
+        object.__setattr__(wrapper, name, value)
+    return value
+
 
 def Map(**kwargs):
     return Value(None, None, kwargs)
@@ -40,14 +66,14 @@ def Yaml(string, readOnly=None):
         if not string:
             return string
         string = str(string)
-    return Value(None, None, yaml.safe_load(string), readOnly)
+    return Value(None, None, yaml.load(string, Loader=_Loader), readOnly)
 
 def YamlAll(string, readOnly=None):
     if isinstance(string, (FieldMessage, Value)):
         if not string:
             return string
         string = str(string)
-    return Value(None, None, [document for document in yaml.safe_load_all(string)], readOnly)
+    return Value(None, None, [document for document in yaml.load_all(string, Loader=_Loader)], readOnly)
 
 def Json(string, readOnly=None):
     if isinstance(string, (FieldMessage, Value)):
@@ -61,7 +87,9 @@ def B64Encode(string):
         if not string:
             return string
         string = str(string)
-    return base64.b64encode(string.encode('utf-8')).decode('utf-8')
+    if isinstance(string, str):
+        string = string.encode('utf-8')
+    return base64.b64encode(string).decode('ascii')
 
 def B64Decode(string):
     if isinstance(string, (FieldMessage, Value)):
@@ -70,18 +98,48 @@ def B64Decode(string):
         string = str(string)
     return base64.b64decode(string.encode('utf-8')).decode('utf-8')
 
+def B64EncodeMap(data):
+    # Base 64 encode all the bytes or string values of a map, such as connection details,
+    # into a dict of strings, such as for the data of a Secret.
+    encoded = {}
+    for key, value in _mapItems(data):
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        if not isinstance(value, bytes):
+            raise TypeError(f"B64EncodeMap value of {key} is not a string or bytes: {value.__class__.__name__}")
+        encoded[key] = base64.b64encode(value).decode('ascii')
+    return encoded
+
+def B64DecodeMap(data):
+    # Base 64 decode all the string or bytes values of a map, such as the data of a Secret,
+    # into a dict of bytes, such as for connection details, without decoding them as UTF-8.
+    decoded = {}
+    for key, value in _mapItems(data):
+        if isinstance(value, (str, bytes)):
+            decoded[key] = base64.b64decode(value)
+    return decoded
+
+def Columns(values, *paths, desired=False, numpy=False):
+    # The values at each path in every item of a list or map Value, self.resources or
+    # required resources, as one list per path. The _columns methods are underscored
+    # so they do not hide fields of the same name.
+    if desired:
+        return values._columns(*paths, desired=True, numpy=numpy)
+    return values._columns(*paths, numpy=numpy)
+
 
 class Message:
+    __slots__ = ('_parent', '_key', '_descriptor', '_message', '_readOnly', '_cache')
+
     def __init__(self, parent, key, descriptor, message=_Unknown, readOnly=False):
         self._set_attribute('_parent', parent)
         self._set_attribute('_key', key)
         self._set_attribute('_descriptor', descriptor)
         self._set_attribute('_message', message)
         self._set_attribute('_readOnly', readOnly)
-        self._set_attribute('_cache', {})
+        self._set_attribute('_cache', _Empty)
 
-    def _set_attribute(self, key, value):
-        self.__dict__[key] = value
+    _set_attribute = object.__setattr__
 
     def __getattr__(self, key):
         return self[key]
@@ -111,7 +169,7 @@ class Message:
                 value = Message(self, key, field.message_type, value, self._readOnly)
         else:
             value = FieldMessage(self, key, field.type, value)
-        self._cache[key] = value
+        _writable(self, '_cache')[key] = value
         return value
 
     def __bool__(self):
@@ -129,26 +187,26 @@ class Message:
 
     def __hash__(self):
         if self._message is not _Unknown:
-            return hash(tuple(hash(item) for item in sorted(iter(self), key=lambda item: item[0])))
+            return hash(frozenset((key, hash(value)) for key, value in self))
         return 0
 
     def __eq__(self, other):
+        return _equal(self, other)
+
+    def _compare(self, other):
         if not isinstance(other, Message):
             return False
         if self._descriptor.full_name != other._descriptor.full_name:
             return False
         if self._message is _Unknown:
-            return other._message is _Unknown
+            return [] if other._message is _Unknown else False
         elif other._message is _Unknown:
             return False
-        if len(self) != len(other):
+        if not (_hasCachedUnknowns(self) or _hasCachedUnknowns(other)):
+            if self._message.SerializeToString(deterministic=True) == other._message.SerializeToString(deterministic=True):
+                return []
             return False
-        for key, value in self:
-            if key not in other:
-                return False
-            if value != other[key]:
-                return False
-        return True
+        return [(value, other[key]) for key, value in self]
 
     def __str__(self):
         return format(self)
@@ -156,6 +214,13 @@ class Message:
     def __format__(self, spec='yaml'):
         return _formatObject(self, spec)
 
+    def _path(self):
+        if self._key is None:
+            return ()
+        if self._parent is None:
+            return (self._key,)
+        return self._parent._path() + (self._key,)
+
     def _fullName(self, key=None):
         if self._key is not None:
             if self._parent is not None:
@@ -177,14 +242,14 @@ class Message:
             raise ValueError(f"{self._readOnly} is read only")
         key = self._validate_key(key)
         if self._message is _Unknown:
-            self.__dict__['_message'] = self._parent._create_child(self._key)
+            self._set_attribute('_message', self._parent._create_child(self._key))
         return getattr(self._message, key)
 
     def __call__(self, **kwargs):
         if self._readOnly:
             raise ValueError(f"{self._readOnly} is read only")
         if self._message is _Unknown:
-            self.__dict__['_message'] = self._parent._create_child(self._key)
+            self._set_attribute('_message', self._parent._create_child(self._key))
         self._message.Clear()
         self._cache.clear()
         for key, value in kwargs.items():
@@ -202,7 +267,7 @@ class Message:
             raise AttributeError(obj=self, name=key)
         field = self._descriptor.fields_by_name[key]
         if self._message is _Unknown:
-            self.__dict__['_message'] = self._parent._create_child(self._key)
+            self._set_attribute('_message', self._parent._create_child(self._key))
         if isinstance(value, Message):
             value = value._message
         elif isinstance(value, (MapMessage, RepeatedMessage)):
@@ -240,16 +305,17 @@ class Message:
 
 
 class MapMessage:
+    __slots__ = ('_parent', '_key', '_field', '_messages', '_readOnly', '_cache')
+
     def __init__(self, parent, key, field, messages=_Unknown, readOnly=False):
         self._set_attribute('_parent', parent)
         self._set_attribute('_key', key)
         self._set_attribute('_field', field)
         self._set_attribute('_messages', messages)
         self._set_attribute('_readOnly', readOnly)
-        self._set_attribute('_cache', {})
+        self._set_attribute('_cache', _Empty)
 
-    def _set_attribute(self, key, value):
-        self.__dict__[key] = value
+    _set_attribute = object.__setattr__
 
     def __getattr__(self, key):
         return self[key]
@@ -271,7 +337,7 @@ class MapMessage:
                 value = Message(self, key, self._field.message_type, value, self._readOnly)
         else:
             value = FieldMessage(self, key, self._field.type, value)
-        self._cache[key] = value
+        _writable(self, '_cache')[key] = value
         return value
 
     def __bool__(self):
@@ -289,11 +355,14 @@ class MapMessage:
                 yield key, self[key]
 
     def __hash__(self):
-        if self._nessages is not None:
-            return hash(tuple(hash(item) for item in sorted(iter(self), key=lambda item: item[0])))
+        if self._messages is not _Unknown:
+            return hash(frozenset((key, hash(self[key])) for key in self._messages))
         return 0
 
     def __eq__(self, other):
+        return _equal(self, other)
+
+    def _compare(self, other):
         if not isinstance(other, MapMessage):
             return False
         if self._field.type != other._field.type:
@@ -302,17 +371,17 @@ class MapMessage:
             if self._field.message_type.full_name != other._field.message_type.full_name:
                 return False
         if self._messages is _Unknown:
-            return other._messages is _Unknown
+            return [] if other._messages is _Unknown else False
         elif other._messages is _Unknown:
             return False
         if len(self) != len(other):
             return False
-        for key, value in self:
-            if key not in other:
+        pairs = []
+        for key in self._messages:
+            if key not in other._messages:
                 return False
-            if value != other[key]:
-                return False
-        return True
+            pairs.append((self[key], other[key]))
+        return pairs
 
     def __str__(self):
         return format(self)
@@ -320,6 +389,13 @@ class MapMessage:
     def __format__(self, spec='yaml'):
         return _formatObject(self, spec)
 
+    def _path(self):
+        if self._key is None:
+            return ()
+        if self._parent is None:
+            return (self._key,)
+        return self._parent._path() + (self._key,)
+
     def _fullName(self, key=None):
         if self._key is not None:
             if self._parent is not None:
@@ -341,14 +417,14 @@ class MapMessage:
             raise ValueError(f"{self._readOnly} is read only")
         key = self._validate_key(key)
         if self._messages is _Unknown:
-            self.__dict__['_messages'] = self._parent._create_child(self._key)
+            self._set_attribute('_messages', self._parent._create_child(self._key))
         return self._messages[key]
 
     def __call__(self, **kwargs):
         if self._readOnly:
             raise ValueError(f"{self._readOnly} is read only")
         if self._messages is _Unknown:
-            self.__dict__['_messages'] = self._parent._create_child(self._key)
+            self._set_attribute('_messages', self._parent._create_child(self._key))
         self._messages.clear()
         self._cache.clear()
         for key, value in kwargs.items():
@@ -363,7 +439,7 @@ class MapMessage:
             raise ValueError(f"{self._readOnly} is read only")
         key = self._validate_key(key)
         if self._messages is _Unknown:
-            self._messages = self._parent._create_child(self._key)
+            self._set_attribute('_messages', self._parent._create_child(self._key))
         if isinstance(message, Message):
             message = message._message
         elif isinstance(message, (MapMessage, RepeatedMessage)):
@@ -403,13 +479,17 @@ class MapMessage:
 
 
 class RepeatedMessage:
+    __slots__ = ('_parent', '_key', '_field', '_messages', '_readOnly', '_cache')
+
     def __init__(self, parent, key, field, messages=_Unknown, readOnly=False):
-        self._parent = parent
-        self._key = key
-        self._field = field
-        self._messages = messages
-        self._readOnly = readOnly
-        self._cache = {}
+        self._set_attribute('_parent', parent)
+        self._set_attribute('_key', key)
+        self._set_attribute('_field', field)
+        self._set_attribute('_messages', messages)
+        self._set_attribute('_readOnly', readOnly)
+        self._set_attribute('_cache', _Empty)
+
+    _set_attribute = object.__setattr__
 
     def __getitem__(self, key):
         key = self._validate_key(key)
@@ -442,7 +522,7 @@ class RepeatedMessage:
                 value = Message(self, key, self._field.message_type, value, self._readOnly)
         else:
             value = FieldMessage(self, key, self._field.type, value)
-        self._cache[key] = value
+        _writable(self, '_cache')[key] = value
         return value
 
     def __bool__(self):
@@ -469,6 +549,9 @@ class RepeatedMessage:
         return 0
 
     def __eq__(self, other):
+        return _equal(self, other)
+
+    def _compare(self, other):
         if not isinstance(other, RepeatedMessage):
             return False
         if self._field.type != other._field.type:
@@ -477,15 +560,12 @@ class RepeatedMessage:
             if self._field.message_type.full_name != other._field.message_type.full_name:
                 return False
         if self._messages is _Unknown:
-            return other._messages is _Unknown
+            return [] if other._messages is _Unknown else False
         elif other._messages is _Unknown:
             return False
         if len(self) != len(other):
             return False
-        for ix, value in enumerate(self):
-            if value != other[ix]:
-                return False
-        return True
+        return [(self[ix], other[ix]) for ix in range(len(self._messages))]
 
     def __str__(self):
         return format(self)
@@ -493,6 +573,13 @@ class RepeatedMessage:
     def __format__(self, spec='yaml'):
         return _formatObject(self, spec)
 
+    def _path(self):
+        if self._key is None:
+            return ()
+        if self._parent is None:
+            return (self._key,)
+        return self._parent._path() + (self._key,)
+
     def _fullName(self, key=None):
         if self._key is not None:
             if self._parent is not None:
@@ -511,7 +598,7 @@ class RepeatedMessage:
             raise ValueError(f"{self._readOnly} is read only")
         key = self._validate_key(key)
         if self._messages is _Unknown:
-            self.__dict__['_messages'] = self._parent._create_child(self._key)
+            self._set_attribute('_messages', self._parent._create_child(self._key))
         if key == append:
             key = len(self._messages)
         elif key < 0:
@@ -524,7 +611,7 @@ class RepeatedMessage:
         if self._readOnly:
             raise ValueError(f"{self._readOnly} is read only")
         if self._messages is _Unknown:
-            self.__dict__['_messages'] = self._parent._create_child(self._key)
+            self._set_attribute('_messages', self._parent._create_child(self._key))
         self._messages.clear()
         self._cache.clear()
         for arg in args:
@@ -536,7 +623,7 @@ class RepeatedMessage:
             raise ValueError(f"{self._readOnly} is read only")
         key = self._validate_key(key)
         if self._messages is _Unknown:
-            self._messages = self._parent._create_child(self._key)
+            self._set_attribute('_messages', self._parent._create_child(self._key))
         if key < 0:
             key = len(self._messages) + key
         if isinstance(message, Message):
@@ -572,7 +659,7 @@ class RepeatedMessage:
         if self._readOnly:
             raise ValueError(f"{self._readOnly} is read only")
         if self._messages is _Unknown:
-            self._messages = self._parent._create_child(self._key)
+            self._set_attribute('_messages', self._parent._create_child(self._key))
         if message is _Unknown:
             message = self._messages.add()
         else:
@@ -590,6 +677,8 @@ class RepeatedMessage:
 
 
 class FieldMessage:
+    __slots__ = ('_parent', '_key', '_kind', '_value')
+
     def __init__(self, parent, key, kind, value):
         self._parent = parent
         self._key = key
@@ -621,6 +710,9 @@ class FieldMessage:
             return self._value == other._value
         return self._value == other
 
+    def _compare(self, other):
+        return [] if self == other else False
+
     def __bytes__(self):
         if self._value is _Unknown:
             return None
@@ -650,6 +742,13 @@ class FieldMessage:
             return None
         return float(self._value)
 
+    def _path(self):
+        if self._key is None:
+            return ()
+        if self._parent is None:
+            return (self._key,)
+        return self._parent._path() + (self._key,)
+
     def _fullName(self, key=None):
         if self._key is not None:
             if self._parent is not None:
@@ -668,33 +767,45 @@ class FieldMessage:
 
 
 class ProtobufValue:
+    __slots__ = ()
+
     @property
     def _protobuf_value(self):
         return None
 
 
 class Value:
+    __slots__ = ('_parent', '_key', '_root', '_value', '_kind', '_readOnly', '_dependencies', '_copies', '_overrides', '_unknowns', '_tracked', '_cache')
+
     def __init__(self, parent, key, value=_Unknown, readOnly=None):
         self._set_attribute('_parent', parent)
         self._set_attribute('_key', key)
-        self._set_attribute('_dependencies', {})
-        self._set_attribute('_unknowns', {})
-        self._set_attribute('_cache', {})
+        self._set_attribute('_root', parent._root if isinstance(parent, Value) else self)
+        self._set_attribute('_tracked', _Empty)
+        self._set_attribute('_dependencies', _Empty)
+        self._set_attribute('_copies', _Empty)
+        self._set_attribute('_overrides', _Empty)
+        self._set_attribute('_unknowns', _Empty)
+        self._set_attribute('_cache', _Empty)
         self._set_attribute('_readOnly', None)
         if isinstance(value, (google.protobuf.struct_pb2.Value, google.protobuf.struct_pb2.Struct, google.protobuf.struct_pb2.ListValue)) or value is _Unknown:
-            self._set_attribute('_value', value)
+            self._set_value(value)
         else:
-            self._set_attribute('_value', google.protobuf.struct_pb2.Value())
+            self._set_value(google.protobuf.struct_pb2.Value())
             if value is None:
                 self._value.null_value = 0
             elif isinstance(value, dict):
-                self._value.struct_value.Clear()
-                for k, v in value.items():
-                    self[k] = v
+                if not _convert(self._value, value):
+                    self._value.struct_value.Clear()
+                    self._refresh_kind()
+                    for k, v in value.items():
+                        self[k] = v
             elif isinstance(value, (tuple, list)):
-                self._value.list_value.Clear()
-                for ix, v in enumerate(value):
-                    self[ix] = v
+                if not _convert(self._value, value):
+                    self._value.list_value.Clear()
+                    self._refresh_kind()
+                    for ix, v in enumerate(value):
+                        self[ix] = v
             elif isinstance(value, bool): # Must be before number check
                 self._value.bool_value = value
             elif isinstance(value, (int, float)):
@@ -703,10 +814,34 @@ class Value:
                 self._value.string_value = value
             else:
                 raise ValueError(f"Unexpected Value type: {value.__class__}")
+            self._refresh_kind()
         self._set_attribute('_readOnly', readOnly)
 
-    def _set_attribute(self, key, value):
-        self.__dict__[key] = value
+    _set_attribute = object.__setattr__
+
+    def _set_value(self, value):
+        self._set_attribute('_value', value)
+        self._set_attribute('_kind', _kindOf(value))
+
+    def _refresh_kind(self):
+        # The kind is cached, so must be refreshed whenever the kind of _value may have changed.
+        self._set_attribute('_kind', _kindOf(self._value))
+
+    def _tracking(self, name):
+        # Returns the writable _dependencies, _copies, _overrides or _unknowns dict, registering this Value
+        # with the root Value the first time any is written.
+        values = getattr(self, name)
+        if values is _Empty:
+            values = {}
+            self._set_attribute(name, values)
+            _writable(self._root, '_tracked')[id(self)] = self
+        return values
+
+    def _detach(self):
+        # Called when the parent no longer caches this Value, but may still change its _value.
+        self._set_attribute('__class__', _DetachedValue)
+        for child in self._cache.values():
+            child._detach()
 
     def __enter__(self):
         return self
@@ -770,8 +905,8 @@ class Value:
                     raise ValueError(f"Invalid key \"{key}\" for kind: {self._kind}")
         else:
             raise NotImplementedError()
-        value = Value(self, key, value, self._readOnly)
-        self._cache[key] = value
+        value = self.__class__(self, key, value, self._readOnly)
+        _writable(self, '_cache')[key] = value
         return value
 
     def __bool__(self):
@@ -830,10 +965,8 @@ class Value:
 
     def __hash__(self):
         match self._kind:
-            case 'struct_value' | 'Struct':
-                return hash(tuple(hash(item) for item in sorted(iter(self), key=lambda item: item[0])))
-            case 'list_value' | 'ListValue':
-                return hash(tuple(hash(item) for item in self))
+            case 'struct_value' | 'Struct' | 'list_value' | 'ListValue':
+                return hash(self._serialized())
             case 'string_value':
                 return hash(self._value.string_value)
             case 'null_value':
@@ -845,34 +978,42 @@ class Value:
         return 0
 
     def __eq__(self, other):
+        return _equal(self, other)
+
+    def _compare(self, other):
+        # Returns False if not equal, otherwise the pairs of children still to compare.
         kind = self._kind
-        if isinstance(other, Value) and other._kind != kind:
-            return False
+        if isinstance(other, Value):
+            if other._kind != kind:
+                return False
+            if kind in ('struct_value', 'Struct', 'list_value', 'ListValue'):
+                return [] if self._serialized() == other._serialized() else False
         match kind:
             case 'struct_value' | 'Struct':
-                if not isinstance(other, (Value, dict)):
+                if not isinstance(other, dict):
                     return False
                 if len(self) != len(other):
                     return False
+                pairs = []
                 for key, value in self:
                     if key not in other:
                         return False
-                    if value != other[key]:
-                        return False
-                return True
+                    pairs.append((value, other[key]))
+                return pairs
             case 'list_value' | 'ListValue':
-                if not isinstance(other, (Value, tuple, list)):
+                if not isinstance(other, (tuple, list)):
                     return False
                 if len(self) != len(other):
                     return False
-                for ix, value in enumerate(self):
-                    if value != other[ix]:
-                        return False
-                return True
+                return [(value, other[ix]) for ix, value in enumerate(self)]
             case 'Unknown':
                 if isinstance(other, Value):
-                    return other._isUnknown
+                    return []
                 return False
+        return [] if self._equalScalar(other) else False
+
+    def _equalScalar(self, other):
+        match self._kind:
             case 'string_value':
                 if isinstance(other, Value):
                     return self._value.string_value == other._value.string_value
@@ -970,6 +1111,13 @@ class Value:
                 return 0.0
         raise TypeError(f"Cannot convert kind to float: {kind}")
 
+    def _path(self):
+        if self._key is None:
+            return ()
+        if self._parent is None:
+            return (self._key,)
+        return self._parent._path() + (self._key,)
+
     def _fullName(self, key=None):
         if self._key is not None:
             if self._parent is not None:
@@ -1000,9 +1148,15 @@ class Value:
     def __call__(self, *args, **kwargs):
         if self._readOnly:
             raise ValueError(f"{self._readOnly} is read only")
-        self.__dict__['_value'] = google.protobuf.struct_pb2.Value()
+        if args or kwargs:
+            # Values sharing this Value's protobuf are assigned as they were before it is reset.
+            args = [self._snapshot(value) for value in args]
+            kwargs = {key: self._snapshot(value) for key, value in kwargs.items()}
+        self._set_value(google.protobuf.struct_pb2.Value())
         self._cache.clear()
         self._dependencies.clear()
+        self._copies.clear()
+        self._overrides.clear()
         self._unknowns.clear()
         if len(kwargs):
             if len(args):
@@ -1023,6 +1177,13 @@ class Value:
         if self._readOnly:
             raise ValueError(f"{self._readOnly} is read only")
         key = self._validate_key(key)
+        snapshot = None
+        if isinstance(value, View):
+            # Taken before this Value changes, as the View may be of it or one of its ancestors.
+            snapshot = value._snapshot()
+        elif isinstance(value, Value) and value._kind in _CONTAINERS and self._shares(value):
+            # Taken before this Value changes, as it may be the value or one of its descendants.
+            snapshot = value._raw.SerializeToString()
         if isinstance(key, str):
             if self._ensure_map() == 'struct_value':
                 values = self._value.struct_value.fields
@@ -1041,9 +1202,17 @@ class Value:
                 values.add()
         else:
             raise NotImplementedError()
-        self._cache.pop(key, None)
+        child = self._cache.pop(key, None)
+        if child is not None:
+            child._detach()
         self._dependencies.pop(key, None)
+        self._copies.pop(key, None)
+        self._overrides.pop(key, None)
         self._unknowns.pop(key, None)
+        self._override(key)
+        self._assign(values, key, value, snapshot)
+
+    def _assign(self, values, key, value, snapshot=None):
         if isinstance(value, ProtobufValue):
             value = value._protobuf_value
         if value is None:
@@ -1051,21 +1220,23 @@ class Value:
         elif isinstance(value, bool): # Must be before int check
             values[key].bool_value = value
         elif isinstance(value, bytes):
-            values[key].string_value = value._value.decode('utf-8')
+            values[key].string_value = value.decode('utf-8')
         elif isinstance(value, str):
             values[key].string_value = value
         elif isinstance(value, (int, float)):
             values[key].number_value = value
         elif isinstance(value, dict):
-            values[key].struct_value.Clear()
-            for k, v in value.items():
-                self[key][k] = v
+            if not _convert(values[key], value):
+                values[key].struct_value.Clear()
+                for k, v in value.items():
+                    self[key][k] = v
         elif isinstance(value, (list, tuple)):
-            values[key].list_value.Clear()
-            for ix, v in enumerate(value):
-                self[key][ix] = v
+            if not _convert(values[key], value):
+                values[key].list_value.Clear()
+                for ix, v in enumerate(value):
+                    self[key][ix] = v
         elif isinstance(value, FieldMessage):
-            self._dependencies[key] = value
+            self._tracking('_dependencies')[key] = value
             if isinstance(value._value, str):
                 values[key].string_value = value._value
             elif isinstance(value._value, bytes):
@@ -1080,17 +1251,40 @@ class Value:
                 self._setUnknown(key, value)
             else:
                 raise ValueError(f"Unexpected field type: {value._value.__class__}")
+        elif isinstance(value, View):
+            if value:
+                value._assignTo(values[key], snapshot)
+            else:
+                self._setUnknown(key, Unknown())
         elif isinstance(value, Value):
-            self._dependencies[key] = value
+            self._tracking('_dependencies')[key] = value
             match value._kind:
                 case 'struct_value' | 'Struct':
-                    values[key].struct_value.Clear()
-                    for k, v in value:
-                        self[key][k] = v
+                    if value._hasUnknowns:
+                        values[key].struct_value.Clear()
+                        for k, v in value:
+                            self[key][k] = v
+                    else:
+                        if snapshot is None and self._shares(value):
+                            snapshot = value._raw.SerializeToString()
+                        if snapshot is None:
+                            values[key].struct_value.CopyFrom(value._raw)
+                        else:
+                            values[key].struct_value.ParseFromString(snapshot)
+                        self._tracking('_copies')[key] = value
                 case 'list_value' | 'ListValue':
-                    values[key].list_value.Clear()
-                    for ix, v in enumerate(value):
-                        self[key][ix] = v
+                    if value._hasUnknowns:
+                        values[key].list_value.Clear()
+                        for ix, v in enumerate(value):
+                            self[key][ix] = v
+                    else:
+                        if snapshot is None and self._shares(value):
+                            snapshot = value._raw.SerializeToString()
+                        if snapshot is None:
+                            values[key].list_value.CopyFrom(value._raw)
+                        else:
+                            values[key].list_value.ParseFromString(snapshot)
+                        self._tracking('_copies')[key] = value
                 case 'string_value':
                     values[key].string_value = value._value.string_value
                 case 'null_value':
@@ -1106,6 +1300,37 @@ class Value:
         else:
             raise ValueError(f"Unexpected type: {value.__class__}")
 
+    def _override(self, key, ancestors=False):
+        # Records that key of this Value no longer holds what was copied into it, or only into
+        # one of its ancestors, so no longer depends on the source of the copy even if equal to it.
+        node, path = self, [key]
+        while True:
+            if node._copies and path[-1] in node._copies and not (ancestors and node is self):
+                node._tracking('_overrides').setdefault(path[-1], set()).add(tuple(reversed(path[:-1])))
+            if isinstance(node, _DetachedValue) or not isinstance(node._parent, Value):
+                return
+            path.append(node._key)
+            node = node._parent
+
+    def _snapshot(self, value):
+        if isinstance(value, View):
+            return value._copy()
+        if not isinstance(value, Value) or value._kind not in _CONTAINERS or value._hasUnknowns or not self._shares(value):
+            return value
+        copy = value._value.__class__()
+        copy.CopyFrom(value._value)
+        return Value(None, None, copy)
+
+    def _shares(self, value):
+        # Whether value may be this Value, one of its ancestors or descendants. CopyFrom a
+        # protobuf into its own subtree crashes the process, so these are assigned from a
+        # serialized snapshot instead. Wrappers do not reliably match the protobuf tree, and
+        # root Values may be of any protobuf, so only Values of distinct request and response
+        # messages are known not to share it.
+        top = _top(self._root)
+        other = _top(value._root)
+        return not (isinstance(top, Message) and isinstance(other, Message) and top._message is not other._message)
+
     @property
     def _raw(self):
         match self._kind:
@@ -1128,7 +1353,9 @@ class Value:
 
     def _setUnknown(self, key, value):
         self._dependencies.pop(key, None)
-        self._unknowns[key] = value
+        self._copies.pop(key, None)
+        self._overrides.pop(key, None)
+        self._tracking('_unknowns')[key] = value
         match self._kind:
             case 'struct_value':
                 if key in self._value.struct_value.fields:
@@ -1171,9 +1398,14 @@ class Value:
                         del self._value[key]
                 case _:
                     raise ValueError(f"Invalid key \"{key}\" for kind: {self._kind}")
-            self._cache.pop(key, None)
+            child = self._cache.pop(key, None)
+            if child is not None:
+                child._detach()
             self._dependencies.pop(key, None)
+            self._copies.pop(key, None)
+            self._overrides.pop(key, None)
             self._unknowns.pop(key, None)
+            self._override(key)
         elif isinstance(key, int):
             match kind:
                 case 'list_value':
@@ -1182,16 +1414,32 @@ class Value:
                     values = self._value
                 case _:
                     raise ValueError(f"Invalid key \"{key}\" for kind: {self._kind}")
+            # The items from a deleted item on no longer hold what was copied into an ancestor
+            # at their index, while copies into this list move with its items.
+            for ix in range(key, len(values.values)):
+                self._override(ix, True)
             if key < len(values.values):
                 del values[key]
-            self._cache.pop(key, None)
+            child = self._cache.pop(key, None)
+            if child is not None:
+                child._detach()
             self._dependencies.pop(key, None)
+            self._copies.pop(key, None)
+            self._overrides.pop(key, None)
             self._unknowns.pop(key, None)
             for ix in sorted(self._dependencies.keys()):
                 if ix > key:
                     self._cache.pop(ix, None)
-                    self._dependencies[ix - 1] = self._dependences[ix]
+                    self._dependencies[ix - 1] = self._dependencies[ix]
                     del self._dependencies[ix]
+            for ix in sorted(self._copies.keys()):
+                if ix > key:
+                    self._copies[ix - 1] = self._copies[ix]
+                    del self._copies[ix]
+            for ix in sorted(self._overrides.keys()):
+                if ix > key:
+                    self._overrides[ix - 1] = self._overrides[ix]
+                    del self._overrides[ix]
             for ix in sorted(self._unknowns.keys()):
                 if ix > key:
                     self._cache.pop(ix, None)
@@ -1213,6 +1461,7 @@ class Value:
                 fields = self._value.struct_value.fields
             else:
                 fields = self._value.fields
+            self._override(key)
             fields[key].Clear()
             return fields[key]
         if isinstance(key, int):
@@ -1226,6 +1475,7 @@ class Value:
                 key = len(values) + key
             while key >= len(values):
                 values.add()
+            self._override(key)
             values[key].Clear()
             return values[key]
         raise NotImplementedError()
@@ -1243,11 +1493,12 @@ class Value:
         kind = self._kind
         if kind == 'Unknown':
             if self._parent is None:
-                self.__dict__['_value'] = google.protobuf.struct_pb2.Value()
+                self._set_value(google.protobuf.struct_pb2.Value())
             else:
-                self.__dict__['_value'] = self._parent._create_child(self._key)
-            if isinstance(self._value, google.protobuf.struct_pb2.Value) and self._value.WhichOneof('kind') is None:
+                self._set_value(self._parent._create_child(self._key))
+            if self._kind == 'Unknown':
                 self._value.struct_value.Clear()
+                self._refresh_kind()
             kind = self._kind
         if kind not in ('struct_value', 'Struct'):
             raise ValueError(f"Invalid map kind: {kind}")
@@ -1257,28 +1508,17 @@ class Value:
         kind = self._kind
         if kind == 'Unknown':
             if self._parent is None:
-                self.__dict__['_value'] = google.protobuf.struct_pb2.Value()
+                self._set_value(google.protobuf.struct_pb2.Value())
             else:
-                self.__dict__['_value'] = self._parent._create_child(self._key)
-            if isinstance(self._value, google.protobuf.struct_pb2.Value) and self._value.WhichOneof('kind') is None:
+                self._set_value(self._parent._create_child(self._key))
+            if self._kind == 'Unknown':
                 self._value.list_value.Clear()
+                self._refresh_kind()
             kind = self._kind
         if kind not in ('list_value', 'ListValue'):
             raise ValueError(f"Invalid list kind: {kind}")
         return kind
 
-    @property
-    def _kind(self):
-        if isinstance(self._value, google.protobuf.struct_pb2.Value):
-            return self._value.WhichOneof('kind') or 'Unknown'
-        if isinstance(self._value, google.protobuf.struct_pb2.Struct):
-            return 'Struct'
-        if isinstance(self._value, google.protobuf.struct_pb2.ListValue):
-            return 'ListValue'
-        if self._value is _Unknown:
-            return 'Unknown'
-        raise ValueError(f"Unexpected value type: {self._value.__class__}")
-
     @property
     def _isUnknown(self):
         return self._kind == 'Unknown'
@@ -1291,74 +1531,664 @@ class Value:
     def _isList(self):
         return self._kind in ('list_value', 'ListValue')
 
+    def _columns(self, *paths, numpy=False):
+        # The values at each path in every item of this list, or every value of this map
+        # in key order, as one list per path. NumPy arrays if numpy is true.
+        node = View(self)._node
+        if isinstance(node, google.protobuf.struct_pb2.ListValue):
+            rows = node.values
+        elif isinstance(node, google.protobuf.struct_pb2.Struct):
+            rows = [node.fields[key] for key in sorted(node.fields)]
+        else:
+            rows = ()
+        return _columns(rows, paths, numpy)
+
+    def _lineage(self, value):
+        # The Values from this Value down to value, None if value is no longer in this tree.
+        lineage = [value]
+        while value is not self:
+            parent = value._parent
+            if not isinstance(parent, Value) or parent._cache.get(value._key) is not value:
+                return None
+            lineage.append(parent)
+            value = parent
+        lineage.reverse()
+        return lineage
+
+    @property
+    def _hasUnknowns(self):
+        return any(lineage[-1]._unknowns for lineage in self._trackedLineages())
+
+    def _trackedLineages(self):
+        # The lineages of the Values in this tree which have dependencies or unknowns, shallowest first.
+        root = self._root
+        lineages = []
+        for key, value in list(root._tracked.items()):
+            if value._dependencies or value._unknowns:
+                lineage = self._lineage(value)
+                if lineage is not None:
+                    lineages.append(lineage)
+                elif self is root:
+                    # Values that leave the tree never return to it.
+                    del root._tracked[key]
+        lineages.sort(key=len)
+        return lineages
+
+    @property
+    def _getUnknownPaths(self):
+        unknowns = {}
+        for lineage in self._trackedLineages():
+            value = lineage[-1]
+            path = value._path()
+            for key, unknown in value._unknowns.items():
+                unknowns[path + (key,)] = unknown._path()
+        return unknowns
+
+    @property
+    def _getDependencyPaths(self):
+        dependencies = {}
+        for lineage in self._trackedLineages():
+            value = lineage[-1]
+            path = value._path()
+            for key, dependency in value._dependencies.items():
+                dependencies[path + (key,)] = dependency._path()
+            for key, source in value._copies.items():
+                sourcePath = source._path()
+                for suffix in value._copiedPaths(key, source):
+                    dependencies[path + (key,) + suffix] = sourcePath + suffix
+            for key, unknown in value._unknowns.items():
+                dependencies[path + (key,)] = unknown._path()
+        return dependencies
+
     @property
     def _getUnknowns(self):
         unknowns = {}
-        for key, unknown in self._unknowns.items():
-            unknowns[self._fullName(key)] = unknown._fullName()
-        if self._isMap:
-            for key, value in self:
-                if isinstance(value, Value):
-                    unknowns.update(value._getUnknowns)
-        elif self._isList:
-            for value in self:
-                if isinstance(value, Value):
-                    unknowns.update(value._getUnknowns)
+        for lineage in self._trackedLineages():
+            value = lineage[-1]
+            for key, unknown in value._unknowns.items():
+                unknowns[value._fullName(key)] = unknown._fullName()
         return unknowns
 
     @property
     def _getDependencies(self):
         dependencies = {}
-        for key, dependency in self._dependencies.items():
-            dependencies[self._fullName(key)] = dependency._fullName()
-        for key, unknown in self._unknowns.items():
-            dependencies[self._fullName(key)] = unknown._fullName()
-        if self._isMap:
-            for key, value in self:
-                if isinstance(value, Value):
-                    dependencies.update(value._getDependencies)
-        elif self._isList:
-            for value in self:
-                if isinstance(value, Value):
-                    dependencies.update(value._getDependencies)
+        for lineage in self._trackedLineages():
+            value = lineage[-1]
+            for key, dependency in value._dependencies.items():
+                dependencies[value._fullName(key)] = dependency._fullName()
+            for key, source in value._copies.items():
+                for suffix in value._copiedPaths(key, source):
+                    destination = value[key]
+                    origin = source
+                    for segment in suffix:
+                        destination = destination[segment]
+                        origin = origin[segment]
+                    dependencies[destination._fullName()] = origin._fullName()
+            for key, unknown in value._unknowns.items():
+                dependencies[value._fullName(key)] = unknown._fullName()
         return dependencies
 
+    def _serialized(self):
+        # The deterministic serialization of the protobuf with the unknowns as empty Values,
+        # equal Values serialize the same whichever way their unknowns are held.
+        unknowns = [lineage for lineage in self._trackedLineages() if lineage[-1]._unknowns]
+        if not unknowns:
+            return self._value.SerializeToString(deterministic=True)
+        value = self._value.__class__()
+        value.CopyFrom(self._value)
+        for lineage in unknowns:
+            node = value
+            for child in lineage[1:]:
+                node = _child(node, child._key)
+            for key in lineage[-1]._unknowns:
+                _child(node, key).Clear()
+        return value.SerializeToString(deterministic=True)
+
+    def _copiedPaths(self, key, source):
+        # The paths below key that still hold what was copied from source, each of which
+        # depends on the same path below source, as if the copy had been made key by key.
+        # Paths assigned, deleted or reset since the copy are overridden, whatever their value.
+        match self._kind:
+            case 'struct_value':
+                destination = self._value.struct_value.fields.get(key)
+            case 'Struct':
+                destination = self._value.fields.get(key)
+            case 'list_value':
+                values = self._value.list_value.values
+                destination = values[key] if key < len(values) else None
+            case 'ListValue':
+                destination = self._value.values[key] if key < len(self._value.values) else None
+            case _:
+                destination = None
+        overrides = self._overrides.get(key, ())
+        if destination is None or source._kind == 'Unknown' or () in overrides:
+            return []
+        paths = []
+        _copiedPaths(destination, overrides, (), paths)
+        return paths
+
     def _patchUnknowns(self, patches):
-        for key in list(self._unknowns.keys()):
-            self[key] = patches[key]
-        if self._isMap:
-            for key, value in self:
-                if isinstance(value, Value) and len(value):
-                    patch = patches[key]
-                    if isinstance(patch, Value) and patch._kind == value._kind and len(patch):
-                        value._patchUnknowns(patch)
-        elif self._isList:
-            for ix, value in enumerate(self):
-                if isinstance(value, Value) and len(value):
-                    patch = patches[ix]
-                    if isinstance(patch, Value) and patch._kind == value._kind and len(patch):
-                        value._patchUnknowns(patch)
+        for lineage in self._trackedLineages():
+            value = lineage[-1]
+            # Patching a shallower Value may have removed this one from the tree.
+            if not value._unknowns or self._lineage(value) is None:
+                continue
+            patch = patches
+            for child in lineage[1:]:
+                patch = patch[child._key]
+                if not (isinstance(patch, Value) and patch._kind == child._kind and len(patch) and len(child)):
+                    break
+            else:
+                for key in list(value._unknowns.keys()):
+                    value[key] = patch[key]
 
     def _renderUnknowns(self, trimFullName):
-        for key, unknown in list(self._unknowns.items()):
-            self[key] = f"UNKNOWN:{trimFullName(unknown._fullName())}"
-            self._dependencies[key] = unknown
-        if self._isMap:
-            for key, value in self:
-                if isinstance(value, Value) and len(value):
-                    value._renderUnknowns(trimFullName)
-        elif self._isList:
-            for ix, value in enumerate(self):
-                if isinstance(value, Value) and len(value):
-                    value._renderUnknowns(trimFullName)
+        for lineage in self._trackedLineages():
+            value = lineage[-1]
+            for key, unknown in list(value._unknowns.items()):
+                value[key] = f"UNKNOWN:{trimFullName(unknown._path())}"
+                value._tracking('_dependencies')[key] = unknown
+
+
+class _DetachedValue(Value):
+    # A Value that may be changed by a parent that no longer caches it, so does not cache its kind.
+    # Its children are also created detached.
+    __slots__ = ()
+
+    @property
+    def _kind(self):
+        return _kindOf(self._value)
+
+    def _set_value(self, value):
+        self._set_attribute('_value', value)
+
+    def _refresh_kind(self):
+        pass
+
+    def _detach(self):
+        pass
+
+
+class View:
+    # A read-only view of a protobuf tree for reading without creating wrappers.
+    # Reads return plain python scalars and Views of the protobuf children, nothing is cached.
+    # Unknowns and dependencies of Values are not tracked, so assigning a read from a View
+    # into a desired resource does not make the resource depend on its source.
+    __slots__ = ('_node',)
+
+    def __init__(self, node):
+        if isinstance(node, View):
+            node = node._node
+        elif isinstance(node, Message):
+            node = node._message
+        elif isinstance(node, (MapMessage, RepeatedMessage)):
+            node = node._messages
+        elif isinstance(node, Value):
+            node = node._value
+        if isinstance(node, google.protobuf.struct_pb2.Value):
+            match node.WhichOneof('kind'):
+                case 'struct_value':
+                    node = node.struct_value
+                case 'list_value':
+                    node = node.list_value
+                case None:
+                    node = _Unknown
+        elif not (node is _Unknown or _isContainer(node)):
+            raise ValueError(f"Unexpected View type: {node.__class__}")
+        object.__setattr__(self, '_node', node)
+
+    def __getattr__(self, key):
+        return self[key]
+
+    def __getitem__(self, key):
+        if isinstance(key, FieldMessage):
+            key = key._value
+        return _viewOf(_lookup(self._node, key))
+
+    def __setattr__(self, key, value):
+        raise ValueError('View is read only')
+
+    __setitem__ = __setattr__
+
+    def __delattr__(self, key):
+        raise ValueError('View is read only')
+
+    __delitem__ = __delattr__
+
+    def __bool__(self):
+        return self._node is not _Unknown
+
+    def __len__(self):
+        node = self._node
+        if isinstance(node, google.protobuf.struct_pb2.Struct):
+            return len(node.fields)
+        if isinstance(node, google.protobuf.struct_pb2.ListValue):
+            return len(node.values)
+        if isinstance(node, google.protobuf.message.Message):
+            return 0 if isinstance(node, google.protobuf.struct_pb2.Value) else len(node.DESCRIPTOR.fields)
+        if node is _Unknown:
+            return 0
+        return len(node)
+
+    def __contains__(self, item):
+        node = self._node
+        if isinstance(node, google.protobuf.struct_pb2.Struct):
+            return item in node.fields
+        if isinstance(node, google.protobuf.struct_pb2.ListValue):
+            return any(value == item for value in self)
+        if isinstance(node, google.protobuf.message.Message):
+            return not isinstance(node, google.protobuf.struct_pb2.Value) and item in node.DESCRIPTOR.fields_by_name
+        if isinstance(node, collections.abc.Mapping):
+            return item in node
+        return any(value == item for value in self)
+
+    def __iter__(self):
+        node = self._node
+        if isinstance(node, google.protobuf.struct_pb2.Struct):
+            for key in sorted(node.fields):
+                yield key, _viewOf(node.fields[key])
+        elif isinstance(node, google.protobuf.struct_pb2.ListValue):
+            for value in node.values:
+                yield _viewOf(value)
+        elif isinstance(node, google.protobuf.message.Message):
+            if not isinstance(node, google.protobuf.struct_pb2.Value):
+                for key in sorted(node.DESCRIPTOR.fields_by_name):
+                    yield key, _viewOf(getattr(node, key))
+        elif isinstance(node, collections.abc.Mapping):
+            for key in sorted(node):
+                yield key, _viewOf(node[key])
+        elif node is not _Unknown:
+            for value in node:
+                yield _viewOf(value)
+
+    def __hash__(self):
+        if isinstance(self._node, google.protobuf.message.Message):
+            return hash(self._node.SerializeToString(deterministic=True))
+        return hash(tuple(self))
+
+    def __eq__(self, other):
+        if isinstance(other, (Message, MapMessage, RepeatedMessage, Value)):
+            other = View(other)
+        if isinstance(other, View):
+            if isinstance(self._node, google.protobuf.message.Message) and isinstance(other._node, google.protobuf.message.Message):
+                return self._node == other._node
+            return self._plain() == other._plain()
+        return self._plain() == other
+
+    def _plain(self):
+        # This level as a dict or list of the child Views and scalars.
+        node = self._node
+        if node is _Unknown:
+            return _Unknown
+        if isinstance(node, google.protobuf.struct_pb2.Value):
+            return _viewOf(node)
+        if isinstance(node, google.protobuf.struct_pb2.ListValue) or not isinstance(node, (google.protobuf.message.Message, collections.abc.Mapping)):
+            return [value for value in self]
+        return {key: value for key, value in self}
+
+    def __str__(self):
+        return format(self)
+
+    def __format__(self, spec='yaml'):
+        return _formatObject(self, spec)
+
+    def _assignTo(self, target, snapshot=None):
+        # Copies this View's protobuf into the struct_pb2.Value target. The View may be of the
+        # target or one of its ancestors, which CopyFrom crashes on, so it is copied from a
+        # serialized snapshot instead.
+        node = self._node
+        if snapshot is None:
+            snapshot = self._snapshot()
+        if isinstance(node, google.protobuf.struct_pb2.Struct):
+            target.struct_value.ParseFromString(snapshot)
+        elif isinstance(node, google.protobuf.struct_pb2.ListValue):
+            target.list_value.ParseFromString(snapshot)
+        elif isinstance(node, google.protobuf.struct_pb2.Value):
+            target.ParseFromString(snapshot)
+        else:
+            raise ValueError(f"Unable to assign a View of: {node.__class__}")
+
+    def _snapshot(self):
+        # The serialized protobuf of a View of a struct_pb2 message, otherwise None.
+        if isinstance(self._node, (google.protobuf.struct_pb2.Struct, google.protobuf.struct_pb2.ListValue, google.protobuf.struct_pb2.Value)):
+            return self._node.SerializeToString()
+        return None
+
+    def _copy(self):
+        # A View of a copy of this View's protobuf, unchanged by any changes to the original.
+        node = self._node
+        if not isinstance(node, (google.protobuf.struct_pb2.Struct, google.protobuf.struct_pb2.ListValue, google.protobuf.struct_pb2.Value)):
+            return self
+        copy = node.__class__()
+        copy.CopyFrom(node)
+        return _newView(copy)
+
+_Unknown_View = View(_Unknown)
+
+
+def _lookup(node, key):
+    # The raw child at key of a raw protobuf or python container, _Unknown if missing.
+    if isinstance(node, google.protobuf.struct_pb2.Value):
+        match node.WhichOneof('kind'):
+            case 'struct_value':
+                node = node.struct_value
+            case 'list_value':
+                node = node.list_value
+            case _:
+                return _Unknown
+    if isinstance(node, google.protobuf.struct_pb2.Struct):
+        return node.fields.get(key, _Unknown) if isinstance(key, str) else _Unknown
+    if isinstance(node, google.protobuf.struct_pb2.ListValue):
+        return _item(node.values, key)
+    if isinstance(node, google.protobuf.message.Message):
+        if key not in node.DESCRIPTOR.fields_by_name:
+            raise AttributeError(obj=node, name=key)
+        return getattr(node, key)
+    if isinstance(node, collections.abc.Mapping):
+        return node[key] if key in node else _Unknown
+    if _isContainer(node):
+        return _item(node, key)
+    return _Unknown
+
+
+def _item(values, key):
+    if not isinstance(key, int):
+        return _Unknown
+    if key < 0:
+        key += len(values)
+    if 0 <= key < len(values):
+        return values[key]
+    return _Unknown
+
+
+def _viewOf(value):
+    # Plain python scalars of a protobuf value, otherwise a View of it.
+    if isinstance(value, google.protobuf.struct_pb2.Value):
+        match value.WhichOneof('kind'):
+            case 'string_value':
+                return value.string_value
+            case 'number_value':
+                number = value.number_value
+                return int(number) if number.is_integer() else number
+            case 'bool_value':
+                return value.bool_value
+            case 'null_value':
+                return None
+            case 'struct_value':
+                return _newView(value.struct_value)
+            case 'list_value':
+                return _newView(value.list_value)
+        return _Unknown_View
+    if value is _Unknown:
+        return _Unknown_View
+    if _isContainer(value):
+        return View(value)
+    return value
+
+
+def _newView(node):
+    # A View of an already normalized node, skipping the checks in View.__init__.
+    view = object.__new__(View)
+    object.__setattr__(view, '_node', node)
+    return view
+
+
+def _mapItems(data):
+    # The items of a wrapper, View, protobuf or python map, read directly from the protobuf.
+    node = View(data)._node
+    if isinstance(node, google.protobuf.struct_pb2.Struct):
+        return [(key, _viewOf(value)) for key, value in node.fields.items()]
+    if isinstance(node, collections.abc.Mapping):
+        return node.items()
+    return ()
+
+
+def _isContainer(value):
+    if isinstance(value, (str, bytes)):
+        return False
+    return isinstance(value, (google.protobuf.message.Message, collections.abc.Mapping, collections.abc.Sequence))
+
+
+class Path:
+    # A path of keys parsed once, such as 'status.loadBalancer.ingress[0].ip' or
+    # "metadata.labels['a.b/c']", and resolved directly against the protobuf of a
+    # wrapper or View in a single call, without creating a wrapper for each key.
+    # Like View, get and has do not track unknowns or dependencies, set assigns
+    # through the wrappers so that it does.
+    __slots__ = ('_keys',)
+
+    def __init__(self, path):
+        if isinstance(path, Path):
+            keys = path._keys
+        elif isinstance(path, str):
+            keys = _parsePath(path)
+        else:
+            keys = tuple(path)
+        object.__setattr__(self, '_keys', keys)
+
+    def __setattr__(self, key, value):
+        raise ValueError('Path is read only')
+
+    def _resolve(self, object):
+        if isinstance(object, Value):
+            return self._resolveNode(object._value)
+        return self._resolveNode(View(object)._node)
+
+    def _resolveNode(self, node):
+        for key in self._keys:
+            if node is _Unknown:
+                break
+            # Inline the common walk down nested Structs.
+            if node.__class__ is _StructValue and key.__class__ is str and node.HasField('struct_value'):
+                fields = node.struct_value.fields
+                node = fields[key] if key in fields else _Unknown
+            else:
+                node = _lookup(node, key)
+        return node
+
+    def get(self, object, default=None):
+        value = _viewOf(self._resolve(object))
+        if value is _Unknown_View:
+            return default
+        return value
+
+    __call__ = get
+
+    def has(self, object):
+        return _viewOf(self._resolve(object)) is not _Unknown_View
+
+    def set(self, object, value):
+        if not self._keys:
+            raise ValueError('Unable to set an empty Path')
+        for key in self._keys[:-1]:
+            object = object[key]
+        object[self._keys[-1]] = value
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __hash__(self):
+        return hash(self._keys)
+
+    def __eq__(self, other):
+        return isinstance(other, Path) and self._keys == other._keys
+
+    def __str__(self):
+        path = ''
+        for key in self._keys:
+            if isinstance(key, int):
+                path += f"[{key}]"
+            elif _PathName.fullmatch(key):
+                path += f".{key}" if path else key
+            else:
+                path += f"[{key!r}]"
+        return path
+
+    def __repr__(self):
+        return f"Path({str(self)!r})"
+
+
+_StructValue = google.protobuf.struct_pb2.Value
+
+
+_PathName = re.compile(r'[^.\[\]\'"]+')
+_PathKey = re.compile(r'''(?:^|\.)([^.\[\]\'"]+)|\[(-?\d+)\]|\[('|")(.*?)\3\]''')
+
+
+def _parsePath(path):
+    keys = []
+    position = 0
+    while position < len(path):
+        match = _PathKey.match(path, position)
+        # Names are separated by dots, indexes and quoted keys are not.
+        if not match or (match.group(1) is not None and (path[position] == '.') != (position > 0)):
+            raise ValueError(f"Invalid path: {path}")
+        name, index, quote, quoted = match.groups()
+        if name is not None:
+            keys.append(name)
+        elif index is not None:
+            keys.append(int(index))
+        else:
+            keys.append(quoted)
+        position = match.end()
+    return tuple(keys)
+
+
+def _columns(nodes, paths, numpy=False):
+    # One pass over the raw nodes, reading every path of each into that path's column.
+    paths = [path if isinstance(path, Path) else Path(path) for path in paths]
+    columns = [[] for path in paths]
+    for node in nodes:
+        for path, column in zip(paths, columns):
+            value = _viewOf(path._resolveNode(node))
+            column.append(None if value is _Unknown_View else value)
+    if numpy:
+        columns = [_numpyColumn(column) for column in columns]
+    return columns
+
+
+def _numpyColumn(column):
+    # NumPy is optional, only imported when numpy columns are requested.
+    import numpy
+    types = {value.__class__ for value in column}
+    if types <= {str} or types <= {int, float} or types == {bool}:
+        return numpy.array(column)
+    array = numpy.empty(len(column), dtype=object)
+    for ix, value in enumerate(column):
+        array[ix] = value
+    return array
+
+
+def _convert(target, value):
+    # Converts a plain python dict or list tree into the struct_pb2.Value target without
+    # creating any wrappers. Returns False if the tree contains anything else, such as
+    # wrappers whose dependencies must be tracked, leaving the conversion to the caller.
+    try:
+        if isinstance(value, dict):
+            target.struct_value.Clear()
+            target.struct_value.update(value)
+        else:
+            target.list_value.Clear()
+            target.list_value.extend(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def _copiedPaths(destination, overrides, path, paths):
+    kind, children = _children(destination)
+    if kind == 'map':
+        keys = children
+    elif kind == 'list':
+        keys = range(len(children))
+    else:
+        return
+    for key in keys:
+        child = children[key]
+        childPath = path + (key,)
+        if childPath in overrides or child.WhichOneof('kind') is None:
+            continue
+        paths.append(childPath)
+        _copiedPaths(child, overrides, childPath, paths)
+
+
+def _top(wrapper):
+    # The outermost wrapper of the tree the wrapper is in.
+    while wrapper._parent is not None:
+        wrapper = wrapper._parent
+    return wrapper
+
+
+def _children(value):
+    # The kind and the fields or values of a struct_pb2 message.
+    if isinstance(value, google.protobuf.struct_pb2.Struct):
+        return 'map', value.fields
+    if isinstance(value, google.protobuf.struct_pb2.ListValue):
+        return 'list', value.values
+    match value.WhichOneof('kind'):
+        case 'struct_value':
+            return 'map', value.struct_value.fields
+        case 'list_value':
+            return 'list', value.list_value.values
+    return None, None
+
+
+def _child(value, key):
+    # The child at key of a struct_pb2 message, adding it if missing.
+    if isinstance(value, google.protobuf.struct_pb2.Value):
+        value = value.struct_value if isinstance(key, str) else value.list_value
+    if isinstance(key, str):
+        return value.fields[key]
+    while key >= len(value.values):
+        value.values.add()
+    return value.values[key]
+
+
+def _equal(left, right):
+    # Compares wrapper trees using an explicit stack, so deep trees do not recurse.
+    pairs = [(left, right)]
+    while pairs:
+        left, right = pairs.pop()
+        if isinstance(left, (Message, MapMessage, RepeatedMessage, FieldMessage, Value)):
+            children = left._compare(right)
+        else:
+            children = [] if left == right else False
+        if children is False:
+            return False
+        pairs.extend(children)
+    return True
+
+
+def _hasCachedUnknowns(message):
+    # Whether any Value cached below the message has unknowns, which its protobuf does not hold.
+    wrappers = [message]
+    while wrappers:
+        wrapper = wrappers.pop()
+        if isinstance(wrapper, Value):
+            if wrapper._hasUnknowns:
+                return True
+        elif not isinstance(wrapper, FieldMessage):
+            wrappers.extend(wrapper._cache.values())
+    return False
+
+
+def _kindOf(value):
+    if isinstance(value, google.protobuf.struct_pb2.Value):
+        return value.WhichOneof('kind') or 'Unknown'
+    if isinstance(value, google.protobuf.struct_pb2.Struct):
+        return 'Struct'
+    if isinstance(value, google.protobuf.struct_pb2.ListValue):
+        return 'ListValue'
+    if value is _Unknown:
+        return 'Unknown'
+    raise ValueError(f"Unexpected value type: {value.__class__}")
 
 
 def _formatObject(object, spec='yaml'):
     match spec:
-        case 'json':
-            return json.dumps(object, indent=2, cls=_JSONEncoder)
-        case 'jsonc':
-            return json.dumps(object, separators=(',', ':'), cls=_JSONEncoder)
         case 'protobuf':
             if isinstance(object, Message):
                 return str(object._message)
@@ -1368,7 +2198,246 @@ def _formatObject(object, spec='yaml'):
                 return str(object._value)
             return format(object)
         case _:
-            return yaml.dump(object, Dumper=_Dumper)
+            stream = io.StringIO()
+            write_to(stream, object, spec)
+            return stream.getvalue()
+
+
+def write_to(stream, object, spec='yaml'):
+    # Writes format(object, spec) to the text stream while walking the wrappers,
+    # without first building python dicts and lists of the whole tree.
+    wrapper = isinstance(object, (Message, MapMessage, RepeatedMessage, FieldMessage, Value, View))
+    match spec:
+        case 'json' | 'jsonc':
+            if spec == 'json':
+                indent, separators = 2, (',', ': ')
+            else:
+                indent, separators = None, (',', ':')
+            if wrapper:
+                _walk(_JsonWriter(stream, indent, separators), object, True)
+            else:
+                json.dump(object, stream, indent=indent, separators=separators, cls=_JSONEncoder)
+        case 'protobuf':
+            stream.write(_formatObject(object, spec))
+        case _:
+            if wrapper:
+                writer = _YamlWriter(stream)
+                try:
+                    _walk(writer, object, False)
+                    writer.close()
+                finally:
+                    writer.dumper.dispose()
+            else:
+                yaml.dump(object, stream, Dumper=_CDumper or _Dumper)
+
+
+def _walk(writer, object, nulls):
+    # Unknown messages are written as null when nulls is set, as JSON does.
+    if isinstance(object, Value):
+        _walkValue(writer, object, nulls, None)
+    elif isinstance(object, View):
+        node = object._node
+        if node is _Unknown or isinstance(node, (google.protobuf.struct_pb2.Struct, google.protobuf.struct_pb2.ListValue, google.protobuf.struct_pb2.Value)):
+            _walkRaw(writer, node)
+        elif isinstance(node, google.protobuf.message.Message):
+            _walk(writer, Message(None, None, node.DESCRIPTOR, node, 'View'), nulls)
+        elif isinstance(node, collections.abc.Mapping):
+            writer.start_map()
+            for key, value in object:
+                writer.key(key)
+                _walk(writer, value, nulls)
+            writer.end()
+        else:
+            writer.start_list()
+            for value in object:
+                _walk(writer, value, nulls)
+            writer.end()
+    elif isinstance(object, (Message, MapMessage)):
+        if nulls and not object:
+            writer.scalar(None)
+            return
+        writer.start_map()
+        for key, value in object:
+            writer.key(key)
+            _walk(writer, value, nulls)
+        writer.end()
+    elif isinstance(object, RepeatedMessage):
+        if nulls and not object:
+            writer.scalar(None)
+            return
+        writer.start_list()
+        for value in object:
+            _walk(writer, value, nulls)
+        writer.end()
+    elif isinstance(object, FieldMessage):
+        writer.field(object)
+    else:
+        writer.scalar(object)
+
+
+def _walkValue(writer, value, nulls, unknowns):
+    # Only the Values on the way to unknowns need to be walked as wrappers,
+    # all others are walked as their raw protobuf.
+    if unknowns is None:
+        unknowns = {
+            id(node)
+            for lineage in value._trackedLineages() if lineage[-1]._unknowns
+            for node in lineage
+        }
+    if id(value) not in unknowns:
+        _walkRaw(writer, value._value)
+    elif value._isMap:
+        writer.start_map()
+        for key, child in value:
+            writer.key(key)
+            if isinstance(child, Value):
+                _walkValue(writer, child, nulls, unknowns)
+            else:
+                _walk(writer, child, nulls)
+        writer.end()
+    else:
+        writer.start_list()
+        for child in value:
+            if isinstance(child, Value):
+                _walkValue(writer, child, nulls, unknowns)
+            else:
+                _walk(writer, child, nulls)
+        writer.end()
+
+
+def _walkRaw(writer, value):
+    if isinstance(value, google.protobuf.struct_pb2.Struct):
+        kind, fields = 'struct_value', value.fields
+    elif isinstance(value, google.protobuf.struct_pb2.ListValue):
+        kind, values = 'list_value', value.values
+    elif value is _Unknown:
+        kind = None
+    else:
+        kind = value.WhichOneof('kind')
+        if kind == 'struct_value':
+            fields = value.struct_value.fields
+        elif kind == 'list_value':
+            values = value.list_value.values
+    match kind:
+        case 'struct_value':
+            writer.start_map()
+            for key in sorted(fields):
+                writer.key(key)
+                _walkRaw(writer, fields[key])
+            writer.end()
+        case 'list_value':
+            writer.start_list()
+            for item in values:
+                _walkRaw(writer, item)
+            writer.end()
+        case 'string_value':
+            writer.scalar(value.string_value)
+        case 'null_value':
+            writer.scalar(None)
+        case 'number_value':
+            number = value.number_value
+            writer.scalar(int(number) if number.is_integer() else number)
+        case 'bool_value':
+            writer.scalar(value.bool_value)
+        case _:
+            writer.scalar('<<UNKNOWN>>')
+
+
+class _JsonWriter:
+    # Writes the same text as json.dump with the given indent and separators.
+
+    def __init__(self, stream, indent, separators):
+        self.write = stream.write
+        self.indent = indent
+        self.separator, self.colon = separators
+        self.encode = _JSONEncoder().encode
+        self.closes = []
+        self.empty = False
+        self.keyed = False
+
+    def _next(self):
+        if self.keyed:
+            self.keyed = False
+        elif self.closes:
+            separator = '' if self.empty else self.separator
+            if self.indent is not None:
+                separator += '\n' + ' ' * (self.indent * len(self.closes))
+            self.write(separator)
+        self.empty = False
+
+    def _start(self, open, close):
+        self._next()
+        self.write(open)
+        self.closes.append(close)
+        self.empty = True
+
+    def start_map(self):
+        self._start('{', '}')
+
+    def start_list(self):
+        self._start('[', ']')
+
+    def end(self):
+        close = self.closes.pop()
+        if not self.empty and self.indent is not None:
+            self.write('\n' + ' ' * (self.indent * len(self.closes)))
+        self.write(close)
+        self.empty = False
+
+    def key(self, key):
+        self._next()
+        if not isinstance(key, str):
+            key = self.encode(key)
+        self.write(self.encode(key))
+        self.write(self.colon)
+        self.keyed = True
+
+    def scalar(self, value):
+        self._next()
+        self.write(self.encode(value))
+
+    field = scalar
+
+
+class _YamlWriter:
+    # Emits the same events yaml.dump serializes, using the representers for the scalars.
+
+    def __init__(self, stream):
+        self.dumper = (_CDumper or _Dumper)(stream)
+        self.ends = []
+        self.dumper.open()
+        self.dumper.emit(yaml.DocumentStartEvent(explicit=None))
+
+    def close(self):
+        self.dumper.emit(yaml.DocumentEndEvent(explicit=None))
+        self.dumper.close()
+
+    def start_map(self):
+        self.dumper.emit(yaml.MappingStartEvent(None, 'tag:yaml.org,2002:map', True, flow_style=False))
+        self.ends.append(yaml.MappingEndEvent)
+
+    def start_list(self):
+        self.dumper.emit(yaml.SequenceStartEvent(None, 'tag:yaml.org,2002:seq', True, flow_style=False))
+        self.ends.append(yaml.SequenceEndEvent)
+
+    def end(self):
+        self.dumper.emit(self.ends.pop()())
+
+    def key(self, key):
+        self.scalar(key)
+
+    def scalar(self, value):
+        self._emit(self.dumper.represent_data(value))
+
+    def field(self, field):
+        self._emit(self.dumper.represent_message_field(field))
+
+    def _emit(self, node):
+        implicit = (
+            node.tag == self.dumper.resolve(yaml.ScalarNode, node.value, (True, False)),
+            node.tag == self.dumper.resolve(yaml.ScalarNode, node.value, (False, True)),
+        )
+        self.dumper.emit(yaml.ScalarEvent(None, node.tag, implicit, node.value, style=node.style))
 
 
 class _JSONEncoder(json.JSONEncoder):
@@ -1385,7 +2454,7 @@ class _JSONEncoder(json.JSONEncoder):
             return object._value
         if isinstance(object, Value):
             match object._kind:
-                case 'struct_value' | 'Struc':
+                case 'struct_value' | 'Struct':
                     return {key: value for key, value in object}
                 case 'list_value' | 'ListValue':
                     return [value for value in object]
@@ -1409,7 +2478,8 @@ class _JSONEncoder(json.JSONEncoder):
         return super(_JSONEncoder, self).default(object)
 
 
-class _Dumper(yaml.SafeDumper):
+class _Representer:
+    # The representers shared by the pure python and libyaml based dumpers.
 
     def represent_str(self, data):
         return self.represent_scalar('tag:yaml.org,2002:str', data, '|' if '\n' in data else None)
@@ -1461,9 +2531,22 @@ class _Dumper(yaml.SafeDumper):
             case _:
                 return self.represent_str('<<UNEXPECTED>>')
 
-_Dumper.add_representer(str, _Dumper.represent_str)
-_Dumper.add_representer(Message, _Dumper.represent_message_dict)
-_Dumper.add_representer(MapMessage, _Dumper.represent_message_dict)
-_Dumper.add_representer(RepeatedMessage, _Dumper.represent_message_list)
-_Dumper.add_representer(FieldMessage, _Dumper.represent_message_field)
-_Dumper.add_representer(Value, _Dumper.represent_value)
+
+class _Dumper(_Representer, yaml.SafeDumper):
+    pass
+
+if hasattr(yaml, 'CSafeDumper'):
+    class _CDumper(_Representer, yaml.CSafeDumper):
+        pass
+else:
+    _CDumper = None
+
+for dumper in (_Dumper, _CDumper):
+    if dumper:
+        dumper.add_representer(str, dumper.represent_str)
+        dumper.add_representer(Message, dumper.represent_message_dict)
+        dumper.add_representer(MapMessage, dumper.represent_message_dict)
+        dumper.add_representer(RepeatedMessage, dumper.represent_message_list)
+        dumper.add_representer(FieldMessage, dumper.represent_message_field)
+        dumper.add_representer(Value, dumper.represent_value)
+        dumper.add_representer(_DetachedValue, dumper.represent_value)
@@ -140,24 +140,24 @@ class Command(command.Command):
 
         # Print the composite.
         print('---')
-        print(str(render.composite), end='')
+        protobuf.write_to(sys.stdout, render.composite)
         # Print Composite connection if requested.
         if self.args.include_connection_xr:
             print('---')
-            print(str(render.connection), end='')
+            protobuf.write_to(sys.stdout, render.connection)
         # Print the composed resources.
         for resource in sorted(render.resources, key=lambda resource: str(resource.metadata.annotations['crossplane.io/composition-resource-name'])):
             print('---')
-            print(str(resource), end='')
+            protobuf.write_to(sys.stdout, resource)
         # Print the results (AKA events) if requested.
         if self.args.include_function_results:
             for result in render.results:
                 print('---')
-                print(str(result), end='')
+                protobuf.write_to(sys.stdout, result)
         # Print the final context if requested.
         if self.args.include_context:
             print('---')
-            print(str(render.context), end='')
+            protobuf.write_to(sys.stdout, render.context)
 
     async def setup_composite(self, api=None):
         # Obtain the Composite to render.
@@ -237,12 +237,12 @@ class Command(command.Command):
         resources = []
         for entry in entries:
             if entry.is_file():
-                for document in yaml.safe_load_all(entry.read_text()):
+                for document in yaml.load_all(entry.read_text(), Loader=protobuf._Loader):
                     resources.append(protobuf.Value(None, None, document))
             elif entry.is_dir():
                 for file in entry.iterdir():
                     if file.suffix in ('.yaml', '.yml'):
-                        for document in yaml.safe_load_all(file.read_text()):
+                        for document in yaml.load_all(file.read_text(), Loader=protobuf._Loader):
                             resources.append(protobuf.Value(None, None, document))
             else:
                 print(f"Specified resource is not a file or a directory: {entry}", file=sys.stderr)
@@ -357,10 +357,7 @@ class Command(command.Command):
                         for resource in resources:
                             if resource.kind == 'Secret' and resource.apiVersion == 'v1':
                                 if resource.metadata.namespace == namespace and resource.metadata.name == name:
-                                    data = request.credentials[credential.name].credential_data.data
-                                    data()
-                                    for key, value in resource.data:
-                                        data[key] = protobuf.B64Decode(value)
+                                    request.credentials[credential.name].credential_data.data(**protobuf.B64DecodeMap(resource.data))
                                     break
                         else:
                             print(f"Step \"{step.step}\" secret not found: {namespace}/{name}", file=sys.stderr)
@@ -564,9 +561,7 @@ class Command(command.Command):
                 if api:
                     connection = await self.kr8s_get(api, 'Secret', 'v1', namespace, name)
             if connection:
-                destination.connection_details()
-                for key, value in connection.data:
-                    destination.connection_details[key] = protobuf.B64Decode(value)
+                destination.connection_details(**protobuf.B64DecodeMap(connection.data))
 
     async def set_schema(self, name, selector, schemas, documents=[], api=None):
         if not name:
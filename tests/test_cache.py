@@ -0,0 +1,96 @@
+from crossplane.pythonic import cache
+
+
+def test_digest():
+    assert cache.digest('abc') == 'ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad'
+
+
+def test_lru_entries():
+    lru = cache.LRUCache(max_entries=2)
+    lru.put('a', 1)
+    lru.put('b', 2)
+    assert lru.get('a') == 1
+    lru.put('c', 3)
+    assert 'a' in lru
+    assert 'b' not in lru
+    assert 'c' in lru
+    assert lru.get('b') is None
+    assert lru.stats() == {
+        'entries': 2,
+        'bytes': 0,
+        'hits': 1,
+        'misses': 1,
+        'evictions': 1,
+    }
+
+
+def test_lru_bytes():
+    lru = cache.LRUCache(max_bytes=10)
+    lru.put('a', 1, 4)
+    lru.put('b', 2, 4)
+    assert lru.bytes == 8
+    lru.put('c', 3, 4)
+    assert list(lru) == ['b', 'c']
+    assert lru.bytes == 8
+    lru.put('c', 4, 2)
+    assert lru.bytes == 6
+    assert lru.get('c') == 4
+    # A single entry larger than the bound is still kept.
+    lru.put('d', 5, 20)
+    assert list(lru) == ['d']
+    assert lru.evictions == 3
+    assert lru.pop('d') == 5
+    assert lru.bytes == 0
+    assert not len(lru)
+
+
+def test_lru_unbounded():
+    lru = cache.LRUCache()
+    for ix in range(100):
+        lru.put(ix, ix, 1024)
+    assert len(lru) == 100
+    assert lru.evictions == 0
+    lru.clear()
+    assert len(lru) == 0
+    assert lru.bytes == 0
+
+
+def test_compile_memory():
+    codes = cache.CompileCache()
+    code, seconds = codes.compile('a = 1\n')
+    assert seconds is not None
+    again, seconds = codes.compile('a = 1\n')
+    assert again is code
+    assert seconds is None
+    namespace = {}
+    exec(code, namespace)
+    assert namespace['a'] == 1
+    stats = codes.stats()
+    assert stats['compiles'] == 1
+    assert stats['hits'] == 1
+    assert stats['loads'] == 0
+
+
+def test_compile_directory(tmp_path):
+    source = 'a = 2\n'
+    codes = cache.CompileCache(tmp_path)
+    code, seconds = codes.compile(source)
+    assert seconds is not None
+    assert (tmp_path / f"{cache.digest(source)}.marshal").is_file()
+    codes = cache.CompileCache(tmp_path)
+    code, seconds = codes.compile(source)
+    assert seconds is None
+    assert codes.stats()['loads'] == 1
+    assert codes.stats()['compiles'] == 0
+    namespace = {}
+    exec(code, namespace)
+    assert namespace['a'] == 2
+
+
+def test_compile_directory_invalid(tmp_path):
+    source = 'a = 3\n'
+    (tmp_path / f"{cache.digest(source)}.marshal").write_bytes(b'invalid')
+    codes = cache.CompileCache(tmp_path)
+    code, seconds = codes.compile(source)
+    assert seconds is not None
+    assert codes.stats()['loads'] == 0
@@ -0,0 +1,446 @@
+import argparse
+import asyncio
+import sys
+
+import grpc
+import pytest
+from crossplane.pythonic.proto.v1 import run_function_pb2 as fnv1
+
+from crossplane.pythonic import (
+    BaseComposite,
+    Columns,
+    cache,
+    executor,
+    function,
+)
+
+
+COMPOSITE = '''\
+from crossplane.pythonic import BaseComposite
+{imports}
+
+class {name}(BaseComposite):
+    def compose(self):
+        pass
+'''
+
+
+def request(composite):
+    return fnv1.RunFunctionRequest(
+        observed=fnv1.State(
+            composite=fnv1.Resource(
+                resource={
+                    'apiVersion': 'pythonic.crossplane.io/v1alpha1',
+                    'kind': 'PyTest',
+                    'metadata': {
+                        'name': 'pytest',
+                    },
+                },
+            ),
+        ),
+        input={
+            'step': 'pytest',
+            'composite': composite,
+        },
+    )
+
+
+@pytest.fixture
+def packages(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, 'path', [str(tmp_path), *sys.path])
+    package = tmp_path / 'pytestinvalidate'
+    package.mkdir()
+    (package / 'helper.py').write_text('VALUE = 1\n')
+    (package / 'first.py').write_text(COMPOSITE.format(imports='from . import helper', name='First'))
+    (package / 'second.py').write_text(COMPOSITE.format(imports='', name='Second'))
+    (package / 'third.py').write_text(COMPOSITE.format(imports='from .helper import VALUE', name='Third'))
+    yield package
+    for module in list(sys.modules):
+        if module.startswith('pytestinvalidate'):
+            del sys.modules[module]
+
+
+@pytest.mark.asyncio
+async def test_invalidate_module(packages):
+    runner = function.FunctionRunner()
+    inline = COMPOSITE.format(imports='import pytestinvalidate.helper', name='Inline')
+    for composite in ('pytestinvalidate.first.First', 'pytestinvalidate.second.Second', inline):
+        response = await runner.RunFunction(request(composite), None)
+        assert not response.results
+    assert len(runner.clazzes) == 3
+
+    runner.invalidate_module('pytestinvalidate.helper')
+    assert 'pytestinvalidate.helper' not in sys.modules
+    assert list(runner.clazzes) == ['pytestinvalidate.second.Second']
+
+    runner.invalidate_module('pytestinvalidate.second')
+    assert not len(runner.clazzes)
+
+
+@pytest.mark.asyncio
+async def test_invalidate_constant_import(packages):
+    runner = function.FunctionRunner()
+    inline = COMPOSITE.format(imports='from pytestinvalidate.helper import VALUE', name='Inline')
+    # The helper is first imported by the module composite, then already imported for the inline one.
+    for composite in ('pytestinvalidate.third.Third', 'pytestinvalidate.second.Second', inline):
+        response = await runner.RunFunction(request(composite), None)
+        assert not response.results
+    assert len(runner.clazzes) == 3
+
+    runner.invalidate_module('pytestinvalidate.helper')
+    assert list(runner.clazzes) == ['pytestinvalidate.second.Second']
+
+
+def test_module_dependencies(packages):
+    import pytestinvalidate.first
+    modules = function.module_dependencies(pytestinvalidate.first.__dict__, {'pytestinvalidate.first', 'sys'})
+    assert modules == {'pytestinvalidate.first', 'pytestinvalidate.helper'}
+
+
+THREADED = '''\
+import threading
+from crossplane.pythonic import BaseComposite
+
+class Threaded(BaseComposite):
+    def compose(self):
+        self.status.thread = threading.current_thread().name
+'''
+
+
+@pytest.mark.asyncio
+async def test_executor_thread():
+    runner = function.FunctionRunner(compose_executor=executor.ComposeExecutor('thread', 1))
+    response = await runner.RunFunction(request(THREADED), None)
+    assert not response.results
+    assert response.desired.composite.resource['status']['thread'].startswith('compose')
+    runner.executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_executor_overloaded():
+    runner = function.FunctionRunner(compose_executor=executor.ComposeExecutor('thread', 1))
+    runner.executor.pending = runner.executor.limit
+    response = await runner.RunFunction(request(THREADED), None)
+    assert response.results[0].severity == fnv1.SEVERITY_FATAL
+    assert 'retry later' in response.results[0].message
+    assert runner.executor.rejected == 1
+
+    context = AbortContext()
+    with pytest.raises(Aborted):
+        await runner.RunFunction(request(THREADED), context)
+    assert context.code == grpc.StatusCode.RESOURCE_EXHAUSTED
+    assert 'retry later' in context.details
+    runner.executor.shutdown()
+
+
+class Aborted(Exception):
+    pass
+
+
+class AbortContext:
+    def time_remaining(self):
+        return None
+
+    async def abort(self, code, details):
+        self.code = code
+        self.details = details
+        raise Aborted()
+
+
+@pytest.mark.asyncio
+async def test_executor_process():
+    args = argparse.Namespace(
+        debug=False,
+        log_name_width=40,
+        logger_level=[],
+        python_path=[],
+        allow_oversize_protos=False,
+    )
+    runner = function.FunctionRunner(
+        compose_executor=executor.ComposeExecutor('process', 1, 0, function.initialize_process, (args,)),
+    )
+    response = await runner.RunFunction(request(THREADED), None)
+    assert not response.results
+    assert response.desired.composite.resource['status']['thread'] == 'MainThread'
+    runner.executor.shutdown()
+
+
+EXITED = '''\
+import os
+from crossplane.pythonic import BaseComposite
+
+class Exited(BaseComposite):
+    def compose(self):
+        os._exit(1)
+'''
+
+
+@pytest.mark.asyncio
+async def test_executor_process_broken():
+    args = argparse.Namespace(
+        debug=False,
+        log_name_width=40,
+        logger_level=[],
+        python_path=[],
+        allow_oversize_protos=False,
+    )
+    runner = function.FunctionRunner(
+        compose_executor=executor.ComposeExecutor('process', 1, 0, function.initialize_process, (args,)),
+    )
+    context = AbortContext()
+    with pytest.raises(Aborted):
+        await runner.RunFunction(request(EXITED), context)
+    assert context.code == grpc.StatusCode.UNAVAILABLE
+    assert runner.executor.replaced == 1
+    assert runner.executor.pending == 0
+    # Later requests run in the replacement pool.
+    response = await runner.RunFunction(request(THREADED), None)
+    assert not response.results
+    runner.executor.shutdown()
+
+
+SLOW = '''\
+import asyncio
+import time
+from crossplane.pythonic import BaseComposite
+
+class Slow(BaseComposite):
+    composeTimeout = 0.1
+
+    {compose}
+'''
+
+
+@pytest.mark.asyncio
+async def test_compose_timeout_async():
+    runner = function.FunctionRunner()
+    response = await runner.RunFunction(request(SLOW.format(compose='async def compose(self):\n        await asyncio.sleep(10)')), None)
+    assert response.results[0].severity == fnv1.SEVERITY_FATAL
+    assert response.results[0].message.startswith('Compose timed out in step pytest after 0.1')
+
+
+@pytest.mark.asyncio
+async def test_compose_timeout_thread():
+    runner = function.FunctionRunner(compose_executor=executor.ComposeExecutor('thread', 1))
+    response = await runner.RunFunction(request(SLOW.format(compose='def compose(self):\n        time.sleep(0.5)')), None)
+    assert response.results[0].severity == fnv1.SEVERITY_FATAL
+    assert response.results[0].message.startswith('Compose timed out in step pytest after 0.1')
+    # The abandoned compose still occupies its worker until it completes.
+    assert runner.executor.pending == 1
+    runner.executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_compose_timeout_raised():
+    runner = function.FunctionRunner()
+    response = await runner.RunFunction(request(SLOW.format(compose='async def compose(self):\n        raise TimeoutError(\'Connect\')')), None)
+    assert response.results[0].severity == fnv1.SEVERITY_FATAL
+    assert response.results[0].message == 'Compose exception: Connect'
+
+
+@pytest.mark.asyncio
+async def test_compose_timeout_invalid():
+    runner = function.FunctionRunner()
+    for value in (0, -1, 'x'):
+        composite = request(SLOW.format(compose='def compose(self):\n        pass'))
+        composite.input['composeTimeout'] = value
+        response = await runner.RunFunction(composite, None)
+        assert response.results[0].severity == fnv1.SEVERITY_FATAL
+        assert response.results[0].message.startswith('composeTimeout must be a positive number of seconds: ')
+
+
+class Context:
+    def time_remaining(self):
+        return 0.05
+
+
+@pytest.mark.asyncio
+async def test_compose_deadline():
+    runner = function.FunctionRunner(compose_timeout=10)
+    composite = request(SLOW.format(compose='async def compose(self):\n        await asyncio.sleep(10)'))
+    composite.input['composeTimeout'] = 5
+    response = await runner.RunFunction(composite, Context())
+    assert response.results[0].severity == fnv1.SEVERITY_FATAL
+    assert response.results[0].message.startswith('Compose deadline exceeded in step pytest after 0.0')
+
+
+def test_trim_full_name():
+    runner = function.FunctionRunner()
+    assert runner.trimFullName(('response', 'desired', 'composite', 'resource', 'status', 'id')) == 'status.id'
+    assert runner.trimFullName(('request', 'observed', 'resources', 'my.vpc', 'resource', 'status', 'atProvider', 'id')) == 'my.vpc.status.atProvider.id'
+    assert runner.trimFullName(('request', 'observed', 'resources', 'vpc', 'resource', 'metadata', 'labels', 'a.b/c')) == "vpc.metadata.labels['a.b/c']"
+    assert runner.trimFullName(('request', 'required_resources', 'secret', 'items', 0, 'resource', 'data')) == 'secret[0].data'
+    assert runner.trimFullName(('request', 'extra_resources', 'secret', 'items', 1, 'resource', 'spec', 'ports', 0)) == 'secret[1].spec.ports[0]'
+    assert runner.trimFullName(('request', 'observed', 'resources', 'vpc', 'resource')) == 'request.observed.resources.vpc.resource'
+    assert runner.trimFullName(('request', 'context', 'a-b')) == "request.context['a-b']"
+
+
+def test_path_origin():
+    assert function.path_origin(('request', 'observed', 'resources', 'my.vpc', 'resource', 'spec')) == (('resource', 'my.vpc'), ('spec',))
+    assert function.path_origin(('response', 'desired', 'resources', 'vpc', 'resource')) == (('resource', 'vpc'), ())
+    assert function.path_origin(('request', 'required_resources', 'secret', 'items', 2, 'resource', 'data')) == (('required', 'secret', 2), ('data',))
+    assert function.path_origin(('request', 'context', 'a')) == (None, ('request', 'context', 'a'))
+
+
+@pytest.mark.asyncio
+async def test_step_digest():
+    runner = function.FunctionRunner()
+    composite = request(THREADED)
+    del composite.input['step']
+    response = await runner.RunFunction(composite, None)
+    assert not response.results
+    assert list(response.context['_pythonic']) == [cache.digest(THREADED)]
+
+
+REBUILD = '''\
+from crossplane.pythonic import BaseComposite
+
+class Rebuild(BaseComposite):
+    def compose(self):
+        self.resources.rebuilt('v1', 'ConfigMap').data.key = 'rebuilt'
+        self.resources.updated.data.key = 'updated'
+        del self.resources.deleted
+'''
+
+
+@pytest.mark.asyncio
+async def test_desired_copy_on_write():
+    composite = request(REBUILD)
+    for name in ('rebuilt', 'updated', 'deleted', 'untouched'):
+        composite.desired.resources[name].resource.update({
+            'apiVersion': 'v1',
+            'kind': 'ConfigMap',
+            'data': {'key': name, 'other': name},
+        })
+        composite.desired.resources[name].connection_details['secret'] = name.encode()
+        composite.desired.resources[name].ready = fnv1.READY_TRUE
+    runner = function.FunctionRunner()
+    response = await runner.RunFunction(composite, None)
+    assert not response.results
+    resources = response.desired.resources
+    assert sorted(resources) == ['rebuilt', 'untouched', 'updated']
+    assert dict(resources['rebuilt'].resource['data']) == {'key': 'rebuilt'}
+    assert dict(resources['updated'].resource['data']) == {'key': 'updated', 'other': 'updated'}
+    assert resources['untouched'] == composite.desired.resources['untouched']
+    for name in resources:
+        assert resources[name].connection_details['secret'] == name.encode()
+        assert resources[name].ready == fnv1.READY_TRUE
+    # The request itself is never modified.
+    assert dict(composite.desired.resources['rebuilt'].resource['data']) == {'key': 'rebuilt', 'other': 'rebuilt'}
+
+    clazz, modules = runner.clazzes.get(cache.digest(REBUILD))
+    instance = clazz(False, composite, None)
+    assert instance._pending == {'rebuilt', 'updated', 'deleted', 'untouched'}
+    assert len(instance.resources) == 4
+    assert 'deleted' in instance.resources
+    instance.compose()
+    assert instance._pending == {'untouched'}
+    assert [name for name, resource in instance.resources] == ['rebuilt', 'untouched', 'updated']
+    assert 'untouched' in instance.response.desired.resources
+    assert not instance._pending
+
+
+def test_columns():
+    composite = request(THREADED)
+    for ix, phase in enumerate(('Pending', 'Running')):
+        composite.observed.resources[f"pod{ix}"].resource.update({'metadata': {'name': f"pod-{ix}"}, 'status': {'phase': phase}})
+        composite.desired.resources[f"pod{ix}"].resource.update({'kind': 'Pod'})
+        composite.required_resources['pods'].items.add().resource.update({'metadata': {'name': f"required-{ix}"}})
+    composite.desired.resources['pod2'].resource.update({'kind': 'Pod'})
+    instance = BaseComposite(False, composite, None)
+    names, phases = instance.resources._columns('metadata.name', 'status.phase')
+    assert names == ['pod-0', 'pod-1', None]
+    assert phases == ['Pending', 'Running', None]
+    assert instance.resources._columns('kind', desired=True) == [['Pod', 'Pod', 'Pod']]
+    # Desired resources are read without copying them into the response.
+    assert instance._pending == {'pod0', 'pod1', 'pod2'}
+    assert instance.requireds.pods._columns('metadata.name') == [['required-0', 'required-1']]
+    assert instance.requireds.missing._columns('metadata.name') == [[]]
+    assert Columns(instance.resources, 'kind', desired=True) == [['Pod', 'Pod', 'Pod']]
+    assert Columns(instance.requireds.pods, 'metadata.name') == [['required-0', 'required-1']]
+
+
+@pytest.mark.asyncio
+async def test_phase_timings():
+    runner = function.FunctionRunner(phase_timings=True)
+    record = {}
+    response = await runner.run_request(request(THREADED), None, record)
+    assert not response.results
+    phases = ['load', 'instantiate', 'compose', 'requirements', 'usages', 'unknowns', 'ready']
+    assert list(record['phases']) == phases
+    assert sorted(response.output['phaseSeconds']) == sorted(phases)
+    assert all(seconds >= 0 for seconds in record['phases'].values())
+    assert 'phaseSeconds' not in (await function.FunctionRunner().RunFunction(request(THREADED), None)).output
+
+
+@pytest.mark.asyncio
+async def test_profile(tmp_path):
+    runner = function.FunctionRunner(profile_dir=str(tmp_path))
+    await runner.RunFunction(request(THREADED), None)
+    assert not list(tmp_path.iterdir())
+
+    runner.profiler.enable('Threaded', 2)
+    runner.profiler.enable('other')
+    for _ in range(3):
+        response = await runner.RunFunction(request(THREADED), None)
+        assert not response.results
+    profiles = sorted(tmp_path.iterdir())
+    assert len(profiles) == 2
+    assert profiles[0].name.startswith('Threaded-')
+    assert runner.profiler.targets == {'other': 1}
+
+    runner.profiler.enable('pytest')
+    response = await runner.RunFunction(request(SLOW.format(compose='async def compose(self):\n        await asyncio.sleep(0)')), None)
+    assert not response.results
+    assert len(list(tmp_path.iterdir())) == 3
+    assert runner.profiler.targets == {'other': 1}
+
+    runner.profiler.enable('*')
+    record = {}
+    await runner.run_request(request(THREADED), None, record)
+    assert record['profiled'] == '*'
+    assert runner.profiler.targets == {'other': 1}
+    with pytest.raises(ValueError):
+        runner.profiler.enable('*', 0)
+
+
+@pytest.mark.asyncio
+async def test_profile_overlapping(tmp_path):
+    for compose_executor in (None, executor.ComposeExecutor('thread', 2)):
+        directory = tmp_path / str(bool(compose_executor))
+        runner = function.FunctionRunner(profile_dir=str(directory), compose_executor=compose_executor)
+        runner.profiler.enable('*', 3)
+        slow = request(SLOW.format(compose='async def compose(self):\n        await asyncio.sleep(0.05)'))
+        threaded = request(SLOW.format(compose='def compose(self):\n        time.sleep(0.05)'))
+        responses = await asyncio.gather(*(runner.RunFunction(composite, None) for composite in (slow, slow, threaded)))
+        assert not any(response.results for response in responses)
+        # Only the first compose was profiled, the others did not use up the count.
+        assert len(list(directory.iterdir())) == 1
+        assert runner.profiler.targets == {'*': 2}
+        assert not runner.profiler.active
+        if compose_executor:
+            compose_executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_profile_dump_failed(tmp_path):
+    (tmp_path / 'file').write_text('')
+    runner = function.FunctionRunner(profile_dir=str(tmp_path / 'file'))
+    runner.profiler.enable('*')
+    response = await runner.RunFunction(request(THREADED), None)
+    assert not response.results
+    assert not runner.profiler.targets
+    assert not runner.profiler.active
+
+
+def test_preload(packages):
+    runner = function.FunctionRunner()
+    runner.preload('pytestinvalidate.first.First')
+    runner.preload(COMPOSITE.format(imports='', name='Inline'))
+    assert len(runner.clazzes) == 2
+    with pytest.raises(function.LoadError) as error:
+        runner.preload('pytestinvalidate.first.Missing')
+    assert str(error.value) == 'pytestinvalidate.first does not define: Missing'
+    with pytest.raises(function.LoadError) as error:
+        runner.preload('pytestinvalidate.missing.Missing')
+    assert str(error.value) == "Import module exception: No module named 'pytestinvalidate.missing'"
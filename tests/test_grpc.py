@@ -0,0 +1,174 @@
+import argparse
+import asyncio
+import logging
+import os
+import pathlib
+import signal
+import sys
+import time
+
+import grpc
+import pytest
+from grpc_health.v1 import health as grpc_health
+from grpc_health.v1 import health_pb2
+from grpc_health.v1 import health_pb2_grpc
+from crossplane.pythonic.proto.v1 import run_function_pb2 as fnv1
+from crossplane.pythonic.proto.v1 import run_function_pb2_grpc as grpcv1
+
+from crossplane.pythonic import (
+    function,
+    grpc as command,
+)
+
+from tests.test_function import (
+    SLOW,
+    request,
+)
+
+
+def parse(*args):
+    parser = argparse.ArgumentParser()
+    command.Command.add_parser_arguments(parser)
+    return parser.parse_args(args)
+
+
+def test_server_options():
+    assert command.server_options(parse()) == []
+    args = parse(
+        '--max-receive-message-size=-1',
+        '--max-send-message-size=8388608',
+        '--keepalive-time=30',
+        '--keepalive-timeout=5.5',
+        '--keepalive-min-ping-interval=10',
+    )
+    args.worker = 1
+    assert command.server_options(args) == [
+        ('grpc.so_reuseport', 1),
+        ('grpc.max_receive_message_length', -1),
+        ('grpc.max_send_message_length', 8388608),
+        ('grpc.keepalive_time_ms', 30000),
+        ('grpc.keepalive_timeout_ms', 5500),
+        ('grpc.http2.min_ping_interval_without_data_ms', 10000),
+        ('grpc.keepalive_permit_without_calls', 1),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_server_limits():
+    args = parse('--max-concurrent-rpcs=1', '--max-receive-message-size=1024', '--compression=gzip')
+    server = grpc.aio.server(
+        options=command.server_options(args),
+        maximum_concurrent_rpcs=args.max_concurrent_rpcs,
+        compression=command.COMPRESSIONS[args.compression],
+    )
+    grpcv1.add_FunctionRunnerServiceServicer_to_server(function.FunctionRunner(), server)
+    port = server.add_insecure_port('127.0.0.1:0')
+    await server.start()
+    try:
+        async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+            stub = grpcv1.FunctionRunnerServiceStub(channel)
+            slow = request(SLOW.format(compose='async def compose(self):\n        await asyncio.sleep(0.5)'))
+            results = await asyncio.gather(
+                stub.RunFunction(slow),
+                stub.RunFunction(slow),
+                return_exceptions=True,
+            )
+            assert isinstance(results[0], fnv1.RunFunctionResponse) != isinstance(results[1], fnv1.RunFunctionResponse)
+            error = results[0] if isinstance(results[0], grpc.aio.AioRpcError) else results[1]
+            assert error.code() == grpc.StatusCode.RESOURCE_EXHAUSTED
+
+            oversize = request('x' * 2048)
+            with pytest.raises(grpc.aio.AioRpcError) as error:
+                await stub.RunFunction(oversize)
+            assert error.value.code() == grpc.StatusCode.RESOURCE_EXHAUSTED
+    finally:
+        await server.stop(None)
+
+
+@pytest.mark.asyncio
+async def test_health():
+    server = grpc.aio.server()
+    runner = function.FunctionRunner()
+    grpcv1.add_FunctionRunnerServiceServicer_to_server(runner, server)
+    health = grpc_health.aio.HealthServicer()
+    await command.set_health(health, health_pb2.HealthCheckResponse.NOT_SERVING)
+    health_pb2_grpc.add_HealthServicer_to_server(health, server)
+    port = server.add_insecure_port('127.0.0.1:0')
+    await server.start()
+    async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+        stub = health_pb2_grpc.HealthStub(channel)
+        for service in ('', 'apiextensions.fn.proto.v1.FunctionRunnerService'):
+            response = await stub.Check(health_pb2.HealthCheckRequest(service=service))
+            assert response.status == health_pb2.HealthCheckResponse.NOT_SERVING
+        await command.set_health(health, health_pb2.HealthCheckResponse.SERVING)
+        response = await stub.Check(health_pb2.HealthCheckRequest())
+        assert response.status == health_pb2.HealthCheckResponse.SERVING
+
+        # In flight requests complete while the server reports NOT_SERVING.
+        slow = request(SLOW.format(compose='async def compose(self):\n        await asyncio.sleep(0.08)'))
+        call = grpcv1.FunctionRunnerServiceStub(channel).RunFunction(slow)
+        await asyncio.sleep(0.02)
+        stop = asyncio.create_task(command.stop_server(server, health))
+        await asyncio.sleep(0)
+        response = await health.Check(health_pb2.HealthCheckRequest(), None)
+        assert response.status == health_pb2.HealthCheckResponse.NOT_SERVING
+        assert not (await call).results
+        await stop
+
+
+def failing_worker(args, worker):
+    sys.exit(3)
+
+
+def signaled_worker(args, worker):
+    directory = pathlib.Path(args.profile_dir)
+    signal.signal(signal.SIGUSR1, lambda signum, frame: (directory / f"usr1-{worker}").touch())
+    (directory / f"ready-{worker}").touch()
+    while True:
+        signal.pause()
+
+
+def supervisor(*args):
+    supervisor = command.Command.__new__(command.Command)
+    supervisor.args = parse(*args)
+    return supervisor
+
+
+async def wait_for_files(paths):
+    for _ in range(200):
+        if all(path.exists() for path in paths):
+            return
+        await asyncio.sleep(0.05)
+    raise AssertionError(f"Missing: {paths}")
+
+
+@pytest.mark.asyncio
+async def test_supervise_restart(monkeypatch, caplog):
+    monkeypatch.setattr(command, 'run_worker', failing_worker)
+    monkeypatch.setattr(command, 'SUPERVISE_INTERVAL', 0.01)
+    monkeypatch.setattr(command, 'RESTART_DELAY', 0.05)
+    monkeypatch.setattr(command, 'RESTART_LIMIT', 2)
+    caplog.set_level(logging.INFO, command.logger.name)
+    start = time.monotonic()
+    with pytest.raises(SystemExit) as exit:
+        await supervisor('--workers=1').supervise()
+    assert exit.value.code == 1
+    # Restarted after 0.05s then 0.1s, then stopped after the third failure.
+    assert time.monotonic() - start >= 0.15
+    messages = [record.getMessage() for record in caplog.records if record.name == command.logger.name]
+    assert len([message for message in messages if message.startswith('Started worker 0')]) == 3
+    assert 'Worker 0 exited with code 3, restarting in 0.05s' in messages
+    assert 'Worker 0 exited with code 3, restarting in 0.1s' in messages
+    assert 'Worker 0 exited with code 3, failed 3 times in a row, stopping' in messages
+
+
+@pytest.mark.asyncio
+async def test_supervise_signals(monkeypatch, tmp_path):
+    monkeypatch.setattr(command, 'run_worker', signaled_worker)
+    monkeypatch.setattr(command, 'SUPERVISE_INTERVAL', 0.01)
+    supervise = asyncio.create_task(supervisor('--workers=2', f"--profile-dir={tmp_path}").supervise())
+    await wait_for_files([tmp_path / 'ready-0', tmp_path / 'ready-1'])
+    os.kill(os.getpid(), signal.SIGUSR1)
+    await wait_for_files([tmp_path / 'usr1-0', tmp_path / 'usr1-1'])
+    os.kill(os.getpid(), signal.SIGTERM)
+    await asyncio.wait_for(supervise, 10)
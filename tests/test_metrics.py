@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+from crossplane.pythonic.proto.v1 import run_function_pb2 as fnv1
+
+from crossplane.pythonic import (
+    function,
+    metrics,
+    profiling,
+)
+
+from tests.test_function import (
+    THREADED,
+    request,
+)
+
+
+def test_histogram():
+    histogram = metrics.Histogram('test_seconds', 'Test.', ('step',), (0.1, 1.0))
+    histogram.observe(('a',), 0.05)
+    histogram.observe(('a',), 0.5)
+    histogram.observe(('a',), 2.0)
+    assert list(histogram.samples()) == [
+        ('test_seconds_bucket', '{step="a",le="0.1"}', 1),
+        ('test_seconds_bucket', '{step="a",le="1.0"}', 2),
+        ('test_seconds_bucket', '{step="a",le="+Inf"}', 3),
+        ('test_seconds_sum', '{step="a"}', 2.55),
+        ('test_seconds_count', '{step="a"}', 3),
+    ]
+
+
+def test_counter():
+    counter = metrics.Counter('test_total', 'Test.', ('name',))
+    counter.inc(('a"b\n',))
+    counter.inc(('a"b\n',), 2)
+    assert list(counter.samples()) == [('test_total', '{name="a\\"b\\n"}', 3)]
+
+
+WARNED = '''\
+from crossplane.pythonic import BaseComposite
+
+class Warned(BaseComposite):
+    def compose(self):
+        self.results.warning('Warned')
+        self.results.info('Informed')
+'''
+
+FAILED = '''\
+from crossplane.pythonic import BaseComposite
+
+class Failed(BaseComposite):
+    def compose(self):
+        raise ValueError('Failed')
+'''
+
+
+@pytest.mark.asyncio
+async def test_observe():
+    runner = function.FunctionRunner()
+    runner.metrics = metrics.Metrics(runner)
+    await runner.RunFunction(request(THREADED), None)
+    await runner.RunFunction(request(WARNED), None)
+    await runner.RunFunction(request(FAILED), None)
+    text = runner.metrics.render()
+    assert 'function_pythonic_request_duration_seconds_count{composite="Threaded",step="pytest",severity="none"} 1' in text
+    assert 'function_pythonic_request_duration_seconds_count{composite="Warned",step="pytest",severity="warning"} 1' in text
+    assert 'function_pythonic_request_duration_seconds_count{composite="Failed",step="pytest",severity="fatal"} 1' in text
+    assert 'function_pythonic_phase_duration_seconds_count{composite="Threaded",step="pytest",phase="ready"} 1' in text
+    assert 'function_pythonic_phase_duration_seconds_count{composite="Failed",step="pytest",phase="compose"} 1' in text
+    assert 'composite="Failed",step="pytest",phase="ready"' not in text
+    assert 'function_pythonic_results_total{composite="Warned",step="pytest",severity="warning"} 1' in text
+    assert 'function_pythonic_results_total{composite="Warned",step="pytest",severity="normal"} 1' in text
+    assert 'function_pythonic_results_total{composite="Failed",step="pytest",severity="fatal"} 1' in text
+    assert 'function_pythonic_class_cache_misses_total 3' in text
+    # Without a compose executor its gauges have no samples.
+    assert '\nfunction_pythonic_compose_executor_pending ' not in text
+
+    data = runner.metrics.serialize_response(fnv1.RunFunctionResponse(meta={'tag': 'x'}))
+    assert runner.metrics.deserialize_request(data) == fnv1.RunFunctionRequest(meta={'tag': 'x'})
+    assert f"function_pythonic_request_bytes_sum {len(data)}" in runner.metrics.render()
+
+
+async def get(port, path, method='GET'):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    response = await reader.read()
+    writer.close()
+    return response
+
+
+@pytest.mark.asyncio
+async def test_serve(tmp_path):
+    runner = function.FunctionRunner()
+    server = await metrics.serve(metrics.Metrics(runner), '127.0.0.1:0')
+    port = server.sockets[0].getsockname()[1]
+    try:
+        response = await get(port, '/metrics')
+        assert response.startswith(b'HTTP/1.1 200 OK')
+        assert b'# TYPE function_pythonic_request_duration_seconds histogram' in response
+        assert (await get(port, '/other')).startswith(b'HTTP/1.1 404 Not Found')
+        assert (await get(port, '/profile', 'POST')).startswith(b'HTTP/1.1 404 Not Found')
+
+        runner.profiler = profiling.Profiler(tmp_path)
+        assert (await get(port, '/profile?target=Threaded&count=3', 'POST')).startswith(b'HTTP/1.1 200 OK')
+        assert (await get(port, '/profile', 'POST')).startswith(b'HTTP/1.1 200 OK')
+        assert (await get(port, '/profile?count=x', 'POST')).startswith(b'HTTP/1.1 400 Bad Request')
+        assert (await get(port, '/profile?target=Other&count=0', 'POST')).startswith(b'HTTP/1.1 400 Bad Request')
+        assert (await get(port, f"/profile?target=Other&count={metrics.PROFILE_COUNT_MAX + 1}", 'POST')).startswith(b'HTTP/1.1 400 Bad Request')
+        assert runner.profiler.targets == {'Threaded': 3, '*': 1}
+        for ix in range(metrics.PROFILE_TARGETS_MAX - 2):
+            assert (await get(port, f"/profile?target=Other{ix}", 'POST')).startswith(b'HTTP/1.1 200 OK')
+        assert (await get(port, '/profile?target=Another', 'POST')).startswith(b'HTTP/1.1 400 Bad Request')
+        assert (await get(port, '/profile?target=Threaded&count=2', 'POST')).startswith(b'HTTP/1.1 200 OK')
+        assert len(runner.profiler.targets) == metrics.PROFILE_TARGETS_MAX
+        assert runner.profiler.targets['Threaded'] == 2
+    finally:
+        server.close()
+
+
+@pytest.mark.asyncio
+async def test_serve_header_timeout(monkeypatch):
+    monkeypatch.setattr(metrics, 'HEADER_TIMEOUT', 0.05)
+    server = await metrics.serve(metrics.Metrics(function.FunctionRunner()), '127.0.0.1:0')
+    port = server.sockets[0].getsockname()[1]
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET /metrics HTTP/1.1\r\n')
+        # The connection is closed without a response, as the headers never end.
+        assert await asyncio.wait_for(reader.read(), 5) == b''
+        writer.close()
+    finally:
+        server.close()
+
+
+def test_worker_address():
+    assert metrics.worker_address('0.0.0.0:8080', 2) == '0.0.0.0:8082'
+    assert metrics.worker_address('[::]:8080', 1) == '[::]:8081'
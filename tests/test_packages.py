@@ -130,6 +130,7 @@ def test_operator_registers_resources_and_sets_global_state(
                 'standalone': True,
                 'clusterwide': True,
                 'namespaces': None,
+                'ready_flag': None,
             },
         )
     ]
@@ -169,11 +170,49 @@ def test_operator_uses_namespaces_and_skips_cluster_resources(
                 'standalone': True,
                 'clusterwide': False,
                 'namespaces': ['team-a'],
+                'ready_flag': None,
             },
         )
     ]
 
 
+@pytest.mark.asyncio
+async def test_sync_writes_existing_resources(packages_module, tmp_path, monkeypatch):
+    packages, _ = packages_module
+    runner = DummyRunner()
+    gets = []
+
+    async def get(kind, namespace=None, label_selector=None, raw=False):
+        gets.append((kind, namespace, label_selector, raw))
+        if kind == 'configmaps':
+            yield {
+                'metadata': {'labels': {packages.PACKAGE_LABEL: 'pkg'}},
+                'data': {'module.py': 'value = 1\n'},
+            }
+
+    monkeypatch.setattr(packages, 'on_resource', lambda *args: None)
+    monkeypatch.setattr(packages.kr8s.asyncio, 'get', get)
+    packages.operator(object(), runner, True, False, ['team-a', 'team-b'], False, True, str(tmp_path))
+    await packages.sync()
+
+    assert gets == [
+        ('configmaps', 'team-a', packages.PACKAGE_LABEL, True),
+        ('configmaps', 'team-b', packages.PACKAGE_LABEL, True),
+    ]
+    assert (tmp_path / 'pkg' / 'module.py').read_text() == 'value = 1\n'
+    assert runner.invalidated == ['pkg.module']
+
+    gets.clear()
+    packages.operator(object(), runner, False, True, None, True, True, str(tmp_path))
+    await packages.sync()
+
+    assert gets == [
+        ('secrets', packages.kr8s.ALL, packages.PACKAGE_LABEL, True),
+        ('environmentconfigs.v1beta1.apiextensions.crossplane.io', None, packages.PACKAGE_LABEL, True),
+        ('compositions.v1.apiextensions.crossplane.io', None, packages.PACKAGE_LABEL, True),
+    ]
+
+
 def test_on_resource_registers_handlers(packages_module):
     packages, fake_kopf = packages_module
 
@@ -329,6 +368,30 @@ def test_package_create_writes_files_and_invalidates_modules(
     assert runner.invalidated == ['pkg.__init__', 'pkg.module']
 
 
+def test_package_create_skips_unchanged_files(packages_module, tmp_path):
+    packages, _ = packages_module
+    logger = logging.getLogger(__name__)
+    runner = DummyRunner()
+
+    packages.GRPC_RUNNER = runner
+    (tmp_path / 'same.py').write_text('value = 1\n')
+    (tmp_path / 'changed.py').write_text('value = 1\n')
+
+    packages.package_create(
+        resource('configmaps'),
+        'Created',
+        tmp_path,
+        {
+            'same.py': 'value = 1\n',
+            'changed.py': 'value = 2\n',
+        },
+        logger,
+    )
+
+    assert (tmp_path / 'changed.py').read_text() == 'value = 2\n'
+    assert runner.invalidated == ['changed']
+
+
 def test_package_create_decodes_secrets(packages_module, tmp_path):
     packages, _ = packages_module
     logger = logging.getLogger(__name__)
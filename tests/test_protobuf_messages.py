@@ -1,6 +1,10 @@
 
+import io
+import json
+
 import grpc_tools.protoc
 import pytest
+import yaml
 from crossplane.pythonic import protobuf
 from google.protobuf.message import Message
 
@@ -123,6 +127,28 @@ struct: {}
     del m.list_string[0]
 
 
+def test_write_to(Message):
+    message = Message()
+    m = protobuf.Message(None, 'pytest', message.DESCRIPTOR, message)
+    m.string = 'line 1\nline 2\n'
+    m.struct.a = [1, 2.5, True, None, {'b': 'c'}]
+    m.struct.u = protobuf.Unknown()
+    m.list[0] = 'a'
+    m.map_map.a.b = 'c'
+    m.list_map[0].c = 'd'
+    def write_to(value, spec):
+        stream = io.StringIO()
+        protobuf.write_to(stream, value, spec)
+        return stream.getvalue()
+    for value in (m, m.struct, m.map_map, m.list_map, m.string, protobuf.Map(), protobuf.List()):
+        assert write_to(value, 'yaml') == yaml.dump(value, Dumper=protobuf._Dumper)
+        assert write_to(value, 'json') == json.dumps(value, indent=2, cls=protobuf._JSONEncoder)
+        assert write_to(value, 'jsonc') == json.dumps(value, separators=(',', ':'), cls=protobuf._JSONEncoder)
+    assert write_to(m.struct, 'jsonc') == '{"a":[1,2.5,true,null,{"b":"c"}],"u":"<<UNKNOWN>>"}'
+    # Unknown messages are null in JSON.
+    assert format(protobuf.Message(None, 'pytest', message.DESCRIPTOR), 'json') == 'null'
+
+
 def test_exceptions(Message):
     message = Message()
     m = protobuf.Message(None, 'pytest', message.DESCRIPTOR, message)
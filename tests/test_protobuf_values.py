@@ -1,3 +1,6 @@
+import google.protobuf.duration_pb2
+import google.protobuf.struct_pb2
+import pytest
 
 from crossplane.pythonic import protobuf
 
@@ -93,6 +96,24 @@ b: 2
     assert isinstance(value, protobuf.Value)
     assert value == 1.2
 
+def test_yaml_dumpers():
+    import yaml
+    value = protobuf.YamlAll('''\
+a: |
+  line 1
+  line 2
+b: [1, 2.5, true, null]
+---
+c: text
+''')
+    value[0].d = protobuf.Unknown()
+    expected = yaml.dump(value, Dumper=protobuf._Dumper)
+    assert '- a: |\n    line 1\n    line 2\n' in expected
+    assert '<<UNKNOWN>>' in expected
+    if protobuf._CDumper:
+        assert yaml.dump(value, Dumper=protobuf._CDumper) == expected
+    assert format(value) == expected
+
 def test_json():
     json = '''\
 {
@@ -239,3 +260,337 @@ def test_create_child():
     assert not list._getUnknowns
     list[0][0] = protobuf.Unknown()
     assert list._getUnknowns
+
+def test_lazy_dicts():
+    value = protobuf.Map(a=1)
+    assert protobuf.Value.__dictoffset__ == 0
+    assert value._cache is protobuf._Empty
+    assert value._dependencies is protobuf._Empty
+    assert value._unknowns is protobuf._Empty
+    assert value.a == 1
+    assert value._cache is not protobuf._Empty
+    value.b = protobuf.Unknown()
+    assert value._unknowns is not protobuf._Empty
+    assert protobuf.Map()._cache is protobuf._Empty
+    assert not len(protobuf._Empty)
+    value.c = [1, 2]
+    del value.c[0]
+    assert value.c == [2]
+
+def test_cached_kind():
+    value = protobuf.Map(a='b')
+    child = value.a
+    assert child._kind == 'string_value'
+    value.a = {'c': 1}
+    assert child._kind == 'struct_value'
+    assert child.c == 1
+    value.a = [1]
+    assert child._kind == 'list_value'
+    value.a = protobuf.Unknown()
+    assert not value.a
+    unknown = protobuf.Unknown()
+    assert unknown._kind == 'Unknown'
+    unknown.a = 1
+    assert unknown._kind == 'struct_value'
+    unknown = protobuf.Unknown()
+    unknown[0] = 1
+    assert unknown._kind == 'list_value'
+    assert unknown() is unknown
+    assert unknown._kind == 'struct_value'
+    value = protobuf.Map(a='b')
+    child = value.a
+    value.a = 1
+    value.a = [1]
+    assert child._kind == 'list_value'
+    assert child == [1]
+    assert format(child, 'yaml') == '- 1\n'
+
+def test_tracked():
+    observed = protobuf.Map(a={'b': 1}, c=[1, 2])
+    desired = protobuf.Map()
+    desired.x.y = observed.a.b
+    desired.x.z[0].w = observed.missing
+    desired.v = observed.c
+    assert desired._getDependencies == {
+        'x.y': 'a.b',
+        'x.z[0].w': 'missing',
+        'v': 'c',
+        'v[0]': 'c[0]',
+        'v[1]': 'c[1]',
+    }
+    assert desired._getUnknowns == {'x.z[0].w': 'missing'}
+    assert desired.x._getUnknowns == {'x.z[0].w': 'missing'}
+    assert not desired.v._getUnknowns
+    # Replaced Values are no longer part of the tree.
+    desired.x.z = [1]
+    assert desired._getDependencies == {'x.y': 'a.b', 'v': 'c', 'v[0]': 'c[0]', 'v[1]': 'c[1]'}
+    assert not desired._getUnknowns
+    desired.x.z[0] = observed.missing
+    observed.missing = 3
+    desired._patchUnknowns(protobuf.Map(x={'z': [4]}))
+    assert desired.x.z == [4]
+    assert not desired._getUnknowns
+    desired.x.y = protobuf.Unknown()
+    desired._renderUnknowns(lambda path: '.'.join(path))
+    assert desired.x.y == 'UNKNOWN:'
+    del desired.x
+    assert desired._getDependencies == {'v': 'c', 'v[0]': 'c[0]', 'v[1]': 'c[1]'}
+
+def test_convert():
+    tree = {'a': [1, 'b', None, True, {'c': 2.5}], 'd': {'e': []}}
+    value = protobuf.Value(None, None, tree)
+    assert value == tree
+    assert value.a[3]._kind == 'bool_value'
+    assert value.a[2]._kind == 'null_value'
+    assert protobuf.List(*tree['a']) == tree['a']
+    observed = protobuf.Map(x=1)
+    # Trees containing wrappers or tuples fall back to converting each key, tracking dependencies.
+    value = protobuf.Map()
+    value.f = {'g': observed.x, 'h': (1, 2), 'i': {'j': 1}}
+    assert value.f == {'g': 1, 'h': [1, 2], 'i': {'j': 1}}
+    assert value._getDependencies == {'f.g': 'x'}
+
+def test_copy():
+    observed = protobuf.Map(spec={'a': {'b': 1, 'c': [1, 2]}, 'd': 'e'})
+    desired = protobuf.Map()
+    desired.spec = observed.spec
+    assert 'spec' in desired._copies
+    assert desired.spec == observed.spec
+    assert desired._getDependencies == {
+        'spec': 'spec',
+        'spec.a': 'spec.a',
+        'spec.a.b': 'spec.a.b',
+        'spec.a.c': 'spec.a.c',
+        'spec.a.c[0]': 'spec.a.c[0]',
+        'spec.a.c[1]': 'spec.a.c[1]',
+        'spec.d': 'spec.d',
+    }
+    # Changed values no longer depend on the source, reassigned ones depend on their new source.
+    desired.spec.a.b = 2
+    desired.spec.d = observed.spec.a.b
+    del desired.spec.a.c[0]
+    assert desired._getDependencyPaths == {
+        ('spec',): ('spec',),
+        ('spec', 'a'): ('spec', 'a'),
+        ('spec', 'a', 'c'): ('spec', 'a', 'c'),
+        ('spec', 'd'): ('spec', 'a', 'b'),
+    }
+    # Copies into lists follow deleted items.
+    desired.l = [observed.spec.d, observed.spec.a]
+    del desired.l[0]
+    assert desired.l._copies == {0: observed.spec.a}
+    assert desired.l._getDependencies == {'l[0]': 'spec.a', 'l[0].b': 'spec.a.b', 'l[0].c': 'spec.a.c', 'l[0].c[0]': 'spec.a.c[0]', 'l[0].c[1]': 'spec.a.c[1]'}
+    # Sources with unknowns are still assigned key by key.
+    source = protobuf.Map(a=1)
+    source.b = observed.missing
+    desired.u = source
+    assert 'u' not in desired._copies
+    assert desired._getUnknowns == {'u.b': 'missing'}
+
+
+def test_copy_into_own_subtree():
+    value = protobuf.Map(x=1)
+    value.a = value
+    assert value == {'x': 1, 'a': {'x': 1}}
+    value = protobuf.Map(x=1, a={'y': 2})
+    value.a.b.c = value.a
+    assert value == {'x': 1, 'a': {'y': 2, 'b': {'c': {'y': 2}}}}
+    value.l = [1, 2]
+    value.l[protobuf.append] = value.l
+    assert value.l == [1, 2, [1, 2]]
+    # Values replaced in their parent are detached, but still share its protobuf.
+    held = value.a
+    value.a = {'z': 3}
+    value.a.w = held
+    assert value.a == {'z': 3, 'w': {'z': 3}}
+    value = protobuf.Map(x=1, a={'y': 2})
+    value.a(z=value)
+    assert value == {'x': 1, 'a': {'z': {'x': 1, 'a': {'y': 2}}}}
+    value.a.z(value.a, 3)
+    assert value.a == {'z': [{'z': {'x': 1, 'a': {'y': 2}}}, 3]}
+    # Root Values of the same protobuf share it.
+    shared = google.protobuf.struct_pb2.Value()
+    shared.struct_value.update({'a': {'b': 1}})
+    value = protobuf.Value(None, None, shared)
+    value.a.c = protobuf.Value(None, None, shared)
+    assert value == {'a': {'b': 1, 'c': {'a': {'b': 1}}}}
+
+
+def test_copy_overrides():
+    observed = protobuf.Map(spec={'a': {'b': 1, 'c': [1, 2]}})
+    desired = protobuf.Map()
+    desired.spec = observed.spec
+    # Assigned paths no longer depend on the source, even if assigned an equal value.
+    desired.spec.a.b = 1
+    desired.spec.a.d = 2
+    desired.spec.e.f = 3
+    desired.spec.a.c[1](x=1)
+    assert desired._getDependencies == {
+        'spec': 'spec',
+        'spec.a': 'spec.a',
+        'spec.a.c': 'spec.a.c',
+        'spec.a.c[0]': 'spec.a.c[0]',
+    }
+    # Copies of desired sources keep their dependencies when the source then changes.
+    source = protobuf.Map(x={'y': 1})
+    desired = protobuf.Map()
+    desired.c = source.x
+    source.x.y = 2
+    del source.x.y
+    assert desired._getDependencyPaths == {('c',): ('x',), ('c', 'y'): ('x', 'y')}
+
+
+def test_view_into_own_subtree():
+    value = protobuf.Map(a={'b': 1})
+    value.a.c = protobuf.View(value.a)
+    assert value == {'a': {'b': 1, 'c': {'b': 1}}}
+    value.a.d = protobuf.View(value)
+    assert value == {'a': {'b': 1, 'c': {'b': 1}, 'd': {'a': {'b': 1, 'c': {'b': 1}}}}}
+    value = protobuf.Map(a={'b': 1}, l=[1])
+    value.l[protobuf.append] = protobuf.View(value)
+    assert value.l == [1, {'a': {'b': 1}, 'l': [1]}]
+    value.a(protobuf.View(value.a), protobuf.View(value).a)
+    assert value.a == [{'b': 1}, {'b': 1}]
+
+
+def test_equality():
+    a = protobuf.Map(x={'y': [1, 'b', None]}, z=1.5)
+    b = protobuf.Map(z=1.5, x={'y': [1, 'b', None]})
+    assert a == b
+    assert hash(a) == hash(b)
+    assert a == {'x': {'y': [1, 'b', None]}, 'z': 1.5}
+    assert a != {'x': {'y': [1, 'b']}, 'z': 1.5}
+    b.x.y[2] = False
+    assert a != b
+    # Unknowns are equal to unknowns wherever they came from.
+    a.u = a.missing
+    assert a != b
+    b.x.y[2] = None
+    b.u = protobuf.Unknown()
+    assert a == b
+    assert hash(a) == hash(b)
+    assert a.x == b.x
+    # Deep trees do not recurse.
+    deep = google.protobuf.struct_pb2.Value()
+    node = deep
+    for _ in range(2000):
+        node = node.struct_value.fields['a'].list_value.values.add()
+    node.number_value = 1
+    other = google.protobuf.struct_pb2.Value()
+    other.CopyFrom(deep)
+    assert protobuf.Value(None, None, deep) == protobuf.Value(None, None, other)
+    assert hash(protobuf.Value(None, None, deep)) == hash(protobuf.Value(None, None, other))
+
+def test_view():
+    value = protobuf.Map(spec={'region': 'us', 'count': 2, 'ratio': 0.5, 'tags': ['a', {'b': True}], 'none': None})
+    view = protobuf.View(value)
+    assert view.spec.region == 'us'
+    assert view.spec.count == 2
+    assert isinstance(view.spec.count, int)
+    assert view.spec.ratio == 0.5
+    assert view.spec.none is None
+    assert view.spec.tags[1].b is True
+    assert view.spec.tags[-2] == 'a'
+    assert not view.spec.missing.deeper
+    assert not view.spec.tags[5]
+    assert len(view.spec) == 5
+    assert 'region' in view.spec
+    assert 'a' in view.spec.tags
+    assert [key for key, _ in view.spec] == ['count', 'none', 'ratio', 'region', 'tags']
+    # Nothing is cached by reading through a view.
+    assert not value._cache
+    assert view.spec == value.spec
+    assert view.spec.tags == ['a', {'b': True}]
+    assert hash(view.spec) == hash(protobuf.View(value.spec))
+    assert format(view.spec, 'jsonc') == format(value.spec, 'jsonc')
+    assert str(view) == str(value)
+    with pytest.raises(ValueError):
+        view.spec.region = 'eu'
+    with pytest.raises(ValueError):
+        del view.spec
+    desired = protobuf.Map()
+    desired.spec = view.spec
+    desired.tag = view.spec.tags[0]
+    desired.missing = view.spec.missing
+    assert desired.spec == value.spec
+    assert desired.tag == 'a'
+    assert 'missing' in desired._getUnknowns
+
+
+def test_path():
+    value = protobuf.Map(metadata={'labels': {'a.b/c': 'x'}}, status={'loadBalancer': {'ingress': [{'ip': '1.2.3.4'}]}, 'none': None})
+    ingress = protobuf.Path('status.loadBalancer.ingress')
+    assert ingress.get(value) == [{'ip': '1.2.3.4'}]
+    assert len(ingress(value)) == 1
+    assert protobuf.Path('status.loadBalancer.ingress[0].ip').get(value) == '1.2.3.4'
+    assert protobuf.Path('status.loadBalancer.ingress[-1].ip').get(protobuf.View(value)) == '1.2.3.4'
+    assert protobuf.Path("metadata.labels['a.b/c']").get(value) == 'x'
+    assert protobuf.Path(('metadata', 'labels', 'a.b/c')).get(value) == 'x'
+    assert protobuf.Path('status.missing.ip').get(value) is None
+    assert protobuf.Path('status.missing.ip').get(value, 'default') == 'default'
+    assert protobuf.Path('status.none').has(value)
+    assert protobuf.Path('status.none').get(value, 'default') is None
+    assert not protobuf.Path('status.loadBalancer.ingress[1]').has(value)
+    # Nothing is cached by reading through a path.
+    assert not value._cache
+    path = protobuf.Path('status.loadBalancer.ingress[0].hostname')
+    path.set(value, 'example.com')
+    assert value.status.loadBalancer.ingress[0].hostname == 'example.com'
+    protobuf.Path('spec.source').set(value, value.status.missing)
+    assert 'spec.source' in value._getUnknowns
+    assert str(protobuf.Path("metadata.labels['a.b/c'][0]")) == "metadata.labels['a.b/c'][0]"
+    assert protobuf.Path('a.b') == protobuf.Path(('a', 'b'))
+    duration = google.protobuf.duration_pb2.Duration(seconds=5)
+    assert protobuf.Path('seconds').get(duration) == 5
+    with pytest.raises(AttributeError):
+        protobuf.Path('invalid').get(duration)
+    for invalid in ('.a', 'a..b', 'a.[0]', 'a[x]', 'a.', 'a[0]b'):
+        with pytest.raises(ValueError):
+            protobuf.Path(invalid)
+
+
+def test_columns():
+    value = protobuf.List({'metadata': {'name': 'a'}, 'count': 1}, {'metadata': {'name': 'b'}, 'count': 2.5}, {'other': True})
+    names, counts = value._columns('metadata.name', protobuf.Path('count'))
+    assert names == ['a', 'b', None]
+    assert counts == [1, 2.5, None]
+    assert protobuf.Map(b={'x': 2}, a={'x': 1})._columns('x') == [[1, 2]]
+    assert protobuf.Unknown()._columns('x') == [[]]
+    assert protobuf.Columns(value, 'count') == [[1, 2.5, None]]
+    # Nothing is cached by reading columns.
+    assert not value._cache
+
+
+def test_columns_numpy():
+    numpy = pytest.importorskip('numpy')
+    value = protobuf.List({'name': 'a', 'count': 1}, {'name': 'b', 'count': 2.5, 'tags': ['x']})
+    names, counts, tags = value._columns('name', 'count', 'tags', numpy=True)
+    assert names.tolist() == ['a', 'b']
+    assert counts.dtype == numpy.float64
+    assert tags.dtype == object
+    assert tags[0] is None
+    assert tags[1] == ['x']
+
+
+def test_b64_maps():
+    binary = bytes(range(256))
+    data = protobuf.Map(text=protobuf.B64Encode('value'), binary=protobuf.B64Encode(binary), none=None)
+    assert protobuf.B64DecodeMap(data) == {'text': b'value', 'binary': binary}
+    assert protobuf.B64DecodeMap(protobuf.View(data)) == {'text': b'value', 'binary': binary}
+    assert protobuf.B64DecodeMap({'text': 'dmFsdWU='}) == {'text': b'value'}
+    assert protobuf.B64DecodeMap(data.missing) == {}
+    encoded = protobuf.B64EncodeMap({'text': 'value', 'binary': binary})
+    assert encoded == {'text': 'dmFsdWU=', 'binary': protobuf.B64Encode(binary)}
+    assert protobuf.B64Decode(encoded['text']) == 'value'
+    secret = protobuf.Map(data=encoded)
+    assert protobuf.B64DecodeMap(secret.data) == {'text': b'value', 'binary': binary}
+    # Not cached by reading the map.
+    assert not secret.data._cache
+    resource = protobuf.Map()
+    resource.data = protobuf.B64DecodeMap(protobuf.Map(data=protobuf.B64EncodeMap({'text': 'value'})).data)
+    resource.text = protobuf.B64DecodeMap(secret.data)['text']
+    assert resource == {'data': {'text': 'value'}, 'text': 'value'}
+    with pytest.raises(TypeError, match='B64EncodeMap value of count is not a string or bytes: int'):
+        protobuf.B64EncodeMap({'text': 'value', 'count': 1})
+    with pytest.raises(TypeError):
+        protobuf.B64EncodeMap(data)